@@ -10,7 +10,9 @@ from boxing.models.boxers_model import Boxers
 from boxing.models.ring_model import RingModel
 from boxing.models.user_model import Users
 from boxing.utils.logger import configure_logger
+from boxing.utils.table_versions import TableVersions
 from boxing.models.favorites_model import Favorite
+from boxing.signals import boxers_changed
 
 
 
@@ -48,6 +50,9 @@ def create_app(config_class=ProductionConfig):
 
 
     ring_model = RingModel()
+    # The leaderboard's ETag comes from this counter, bumped whenever a write to boxers commits
+    table_versions = TableVersions()
+    table_versions.track("boxers", boxers_changed)
 
 
     ####################################################
@@ -695,8 +700,12 @@ def create_app(config_class=ProductionConfig):
         Query Parameters:
             - sort (str): The field to sort by ('wins', or 'win_pct'). Default is 'wins'.
 
+        Responses carry an ETag. A request whose If-None-Match holds the ETag of the
+        current boxers gets an empty 304 without the leaderboard being read.
+
         Returns:
             JSON response with a sorted leaderboard of boxers.
+            304 if the client's copy is current.
 
         Raises:
             400 error if an invalid sort parameter is provided.
@@ -716,16 +725,25 @@ def create_app(config_class=ProductionConfig):
                     "message": f"Invalid sort parameter '{sort_by}'. Must be one of: {', '.join(valid_sort_fields)}"
                 }), 400)
 
+            etag = table_versions.etag("boxers")
+            if request.if_none_match.contains_weak(etag):
+                app.logger.info("Leaderboard unchanged since the client's copy; returning 304")
+                response = make_response("", 304)
+                response.set_etag(etag, weak=True)
+                return response
+
             app.logger.info(f"Generating leaderboard sorted by '{sort_by}'")
 
             leaderboard_data = Boxers.get_leaderboard(sort_by)
 
             app.logger.info(f"Leaderboard generated successfully. {len(leaderboard_data)} boxers ranked.")
 
-            return make_response(jsonify({
+            response = make_response(jsonify({
                 "status": "success",
                 "leaderboard": leaderboard_data
             }), 200)
+            response.set_etag(etag, weak=True)
+            return response
 
         except Exception as e:
             app.logger.error(f"Error generating leaderboard: {e}")
@@ -1,9 +1,12 @@
 import logging
 from typing import List
 
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
 from boxing.db import db
+from boxing.signals import boxers_changed
 from boxing.utils.logger import configure_logger
 
 
@@ -238,3 +241,27 @@ def create_boxer(cls, name: str, weight: float, height: float, reach: float, age
         leaderboard.sort(key=lambda b: b[sort_by], reverse=True)
         logger.info("Leaderboard retrieved successfully.")
         return leaderboard
+
+
+# Boxers written in a transaction are noted at flush and announced once it commits, so
+# receivers never see a change that is later rolled back
+@event.listens_for(Session, "after_flush")
+def _note_boxer_writes(session, flush_context) -> None:
+    if any(isinstance(obj, Boxers) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["boxers_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _send_boxers_changed(session) -> None:
+    if session.info.pop("boxers_changed", False):
+        boxers_changed.send(Boxers)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_boxer_writes(session) -> None:
+    session.info.pop("boxers_changed", None)
+
+
+@event.listens_for(Boxers.__table__, "after_drop")
+def _send_boxers_reset(target, connection, **kw) -> None:
+    boxers_changed.send(Boxers)
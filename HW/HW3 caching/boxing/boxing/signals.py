@@ -0,0 +1,15 @@
+"""Change events for the boxers table.
+
+The signal is sent by the Boxers model after a transaction that wrote boxers commits,
+and after the table is dropped, with the Boxers class as the sender.
+
+Signals:
+    boxers_changed: no arguments - boxers were created, updated or deleted.
+
+"""
+from blinker import Namespace
+
+
+_signals = Namespace()
+
+boxers_changed = _signals.signal("boxers-changed")
@@ -0,0 +1,66 @@
+from boxing.models.boxers_model import Boxers
+from boxing.signals import boxers_changed
+from boxing.utils.table_versions import TableVersions
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_bump_changes_etag():
+    """Test that bumping a table changes its ETag and no other."""
+    versions = TableVersions(max_age_seconds=0)
+    boxers_tag = versions.etag("boxers")
+    users_tag = versions.etag("users")
+
+    assert versions.bump("boxers") == 1
+    assert versions.etag("boxers") != boxers_tag
+    assert versions.etag("users") == users_tag
+
+
+def test_etag_rolls_over_after_max_age():
+    """Test that an ETag expires after max_age_seconds even without a change."""
+    clock = FakeClock()
+    versions = TableVersions(max_age_seconds=60, clock=clock)
+    tag = versions.etag("boxers")
+
+    clock.now = 59
+    assert versions.etag("boxers") == tag
+    clock.now = 60
+    assert versions.etag("boxers") != tag
+
+
+def test_committed_boxer_writes_bump_the_table(session):
+    """Test that a committed write to boxers bumps the table and a rolled back one does not."""
+    versions = TableVersions(max_age_seconds=0)
+    versions.track("boxers", boxers_changed)
+
+    session.add(Boxers("Ali", 210, 75, 78, 30))
+    session.flush()
+    session.rollback()
+    assert versions.get("boxers") == 0
+
+    session.add(Boxers("Ali", 210, 75, 78, 30))
+    session.commit()
+    assert versions.get("boxers") == 1
+
+
+def test_leaderboard_returns_304_for_current_etag(client, mocker):
+    """Test that a matching If-None-Match gets a 304 without the leaderboard being read."""
+    get_leaderboard = mocker.patch.object(
+        Boxers, "get_leaderboard", create=True, return_value=[{"name": "Ali", "wins": 1}]
+    )
+
+    response = client.get("/api/leaderboard")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    get_leaderboard.reset_mock()
+    response = client.get("/api/leaderboard", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    get_leaderboard.assert_not_called()
@@ -1,14 +1,36 @@
+import atexit
+import io
+import json
+import os
+import time
+from dataclasses import asdict
+from typing import Optional
+
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Flask, jsonify, make_response, Response, request, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 
 from config import ProductionConfig
 
 from playlist.db import db
+from playlist.ingest import ingest_songs
+from playlist.models.catalog_changes_model import CatalogChanges, ChangesCompactedError
+from playlist.models.play_count_buffer import PlayCountBuffer
+from playlist.models.play_event_log import PlayEventLog
+from playlist.models.play_history_model import DAY_SECONDS, PlayEvents, PlayRollupsDaily, PlayRollupsHourly
 from playlist.models.song_model import Songs
 from playlist.models.playlist_model import PlaylistModel
+from playlist.models.song_cache import SongCache, dump_song, load_song
+from playlist.models.trending_songs import TrendingSongs
 from playlist.models.user_model import Users
+from playlist.models.user_playlist_model import Playlists
+from playlist.signals import play_counts_updated, songs_created, songs_deleted, songs_reset, songs_updated
+from playlist.utils.api_utils import random_pool
+from playlist.utils.background_flusher import BackgroundFlusher
+from playlist.utils.cache import TTLCache
 from playlist.utils.logger import configure_logger
+from playlist.utils.shared_cache import SharedCache
+from playlist.utils.table_versions import TableVersions
 
 
 load_dotenv()
@@ -33,6 +55,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
     db.init_app(app)
     with app.app_context():
         db.create_all()
+        Songs.ensure_search_index()
 
     # Initialize login manager
     login_manager = LoginManager()
@@ -50,7 +73,82 @@ def create_app(config_class=ProductionConfig) -> Flask:
             "message": "Authentication required"
         }), 401)
 
-    playlist_model = PlaylistModel()
+    ingest_http_workers = int(os.getenv("INGEST_HTTP_WORKERS", 1))
+    play_count_buffer = PlayCountBuffer()
+    trending_songs = TrendingSongs()
+    play_event_log = PlayEventLog()
+    # Buffers only check their time threshold when a play is recorded, so a quiet worker
+    # would otherwise hold its last plays until shutdown
+    background_flusher = BackgroundFlusher(context=app.app_context)
+    background_flusher.register("play counts", play_count_buffer.flush, play_count_buffer.flush_interval)
+    background_flusher.register("play log", play_event_log.flush, play_event_log.flush_interval_ms / 1000)
+    catalog_changes_retention = float(os.getenv("CATALOG_CHANGES_RETENTION", 7 * DAY_SECONDS))
+    background_flusher.register(
+        "catalog changes compaction",
+        lambda: CatalogChanges.compact(catalog_changes_retention),
+        float(os.getenv("CATALOG_COMPACTION_INTERVAL", 60))
+    )
+    # ETags for the catalog, leaderboard and playlist routes come from these change counters
+    table_versions = TableVersions()
+    table_versions.track("songs", songs_created, songs_updated, songs_deleted, play_counts_updated, songs_reset)
+    shared_cache = SharedCache.from_env(namespace="playlist:song", dumps=dump_song, loads=load_song)
+    song_cache = SongCache(shared_cache=shared_cache)
+
+    # Each user's stored playlist is kept in memory between requests and checked against its
+    # stored version on every request, so changes made through other workers are picked up
+    playlist_models = TTLCache(
+        max_entries=int(os.getenv("PLAYLIST_CACHE_MAX_ENTRIES", 1000)),
+        ttl_seconds=float(os.getenv("PLAYLIST_CACHE_TTL", 600))
+    )
+
+    def get_playlist_model() -> PlaylistModel:
+        """Returns the up-to-date playlist of the logged-in user."""
+        user_id = current_user.id
+        playlist_model = playlist_models.get_or_load(
+            user_id,
+            lambda: PlaylistModel(
+                play_count_buffer=play_count_buffer,
+                song_cache=song_cache,
+                user_id=user_id,
+                debug_checks=app.debug,
+                trending=trending_songs,
+                play_log=play_event_log
+            )
+        )
+        playlist_model.refresh()
+        return playlist_model
+
+    def not_modified(etag: str, vary: Optional[str] = None) -> Optional[Response]:
+        """Returns a 304 response if the client already holds the representation tagged ``etag``.
+
+        ``vary`` names the request header the representation was chosen by, if any; a 304
+        must carry the same Vary as the full response it stands in for.
+        """
+        if not request.if_none_match.contains_weak(etag):
+            return None
+        app.logger.info(f"{request.path} unchanged since the client's copy; returning 304")
+        response = make_response("", 304)
+        return with_etag(response, etag, vary)
+
+    def with_etag(response: Response, etag: str, vary: Optional[str] = None) -> Response:
+        """Tags a full response so the client can revalidate it with If-None-Match."""
+        response.set_etag(etag, weak=True)
+        if vary:
+            response.vary.add(vary)
+        return response
+
+    background_flusher.start()
+
+    @atexit.register
+    def flush_play_counts() -> None:
+        """Write any buffered play counts to the database when the process exits."""
+        background_flusher.stop(timeout=5)
+        try:
+            with app.app_context():
+                play_count_buffer.flush()
+                play_event_log.flush()
+        except Exception as e:
+            app.logger.error(f"Failed to flush buffered play counts on shutdown: {e}")
 
     @app.route('/api/health', methods=['GET'])
     def healthcheck() -> Response:
@@ -241,8 +339,12 @@ def create_app(config_class=ProductionConfig) -> Flask:
         try:
             app.logger.info("Received request to recreate Users table")
             with app.app_context():
+                # User IDs are reused after a reset, so stored playlists must not carry over
+                Playlists.clear_all(delete_playlists=True)
                 Users.__table__.drop(db.engine)
                 Users.__table__.create(db.engine)
+            playlist_models.clear()
+            table_versions.bump("playlists")
             app.logger.info("Users table recreated successfully")
             return make_response(jsonify({
                 "status": "success",
@@ -276,8 +378,15 @@ def create_app(config_class=ProductionConfig) -> Flask:
         try:
             app.logger.info("Received request to recreate Songs table")
             with app.app_context():
+                Playlists.clear_all()
+                PlayEvents.delete_all()
                 Songs.__table__.drop(db.engine)
                 Songs.__table__.create(db.engine)
+                CatalogChanges.record_reset()
+            table_versions.bump("playlists")
+            # Song IDs are reused after a reset, so buffered plays must not be applied to new songs
+            play_count_buffer.clear()
+            play_event_log.clear()
             app.logger.info("Songs table recreated successfully")
             return make_response(jsonify({
                 "status": "success",
@@ -365,6 +474,64 @@ def create_app(config_class=ProductionConfig) -> Flask:
             }), 500)
 
 
+    @app.route('/api/create-songs-bulk', methods=['POST'])
+    @login_required
+    def add_songs_bulk() -> Response:
+        """Route to add many songs to the catalog from a CSV or JSONL request body.
+
+        Query Parameters:
+            - format (str, optional): "csv" or "jsonl". Defaults to the request Content-Type
+              (text/csv or application/x-ndjson), then to csv.
+            - on_conflict (str, optional): "skip" (default) to keep existing songs with the same
+              artist, title and year, or "upsert" to overwrite their genre and duration.
+
+        Rows are validated with "INGEST_HTTP_WORKERS" processes (default 1, in the request
+        thread). The CLI ingest uses a process per CPU; forking that many from a threaded
+        web worker holding open database connections is not safe.
+
+        Returns:
+            JSON response with the number of rows received, written and rejected,
+            the first row errors, and the ingest throughput.
+
+        Raises:
+            400 error if the format or conflict policy is invalid.
+            500 error if there is an issue writing the songs to the database.
+
+        """
+        app.logger.info("Received request to bulk add songs")
+
+        try:
+            fmt = request.args.get('format')
+            if fmt is None:
+                fmt = 'jsonl' if request.mimetype in ('application/x-ndjson', 'application/jsonl') else 'csv'
+            on_conflict = request.args.get('on_conflict', 'skip')
+
+            if fmt not in ('csv', 'jsonl') or on_conflict not in ('skip', 'upsert'):
+                app.logger.warning(f"Invalid bulk ingest parameters: format={fmt}, on_conflict={on_conflict}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "format must be 'csv' or 'jsonl' and on_conflict must be 'skip' or 'upsert'"
+                }), 400)
+
+            stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+            report = ingest_songs(stream, fmt=fmt, on_conflict=on_conflict, workers=ingest_http_workers)
+
+            app.logger.info(f"Bulk add finished: {report['written']} songs written, {report['invalid']} rows rejected")
+            return make_response(jsonify({
+                "status": "success",
+                "message": f"Processed {report['received']} rows",
+                **report
+            }), 200)
+
+        except Exception as e:
+            app.logger.error(f"Failed to bulk add songs: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while bulk adding songs",
+                "details": str(e)
+            }), 500)
+
+
     @app.route('/api/delete-song/<int:song_id>', methods=['DELETE'])
     @login_required
     def delete_song(song_id: int) -> Response:
@@ -415,11 +582,17 @@ def create_app(config_class=ProductionConfig) -> Flask:
     def get_all_songs() -> Response:
         """Route to retrieve all songs in the catalog (non-deleted), with an option to sort by play count.
 
-        Query Parameter:
+        Query Parameters:
             - sort_by_play_count (bool, optional): If true, sort songs by play count.
+            - stream (bool, optional): If true, stream the catalog as newline-delimited JSON
+              (one song per line). Sending ``Accept: application/x-ndjson`` does the same.
+
+        Responses carry an ETag. A request whose If-None-Match holds the ETag of the
+        current catalog gets an empty 304 without the catalog being read.
 
         Returns:
-            JSON response containing the list of songs.
+            JSON response containing the list of songs, or an NDJSON stream of songs.
+            304 if the client's copy is current.
 
         Raises:
             500 error if there is an issue retrieving songs from the catalog.
@@ -431,15 +604,33 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
             app.logger.info(f"Received request to retrieve all songs from catalog (sort_by_play_count={sort_by_play_count})")
 
+            stream = (
+                request.args.get('stream', 'false').lower() in ('1', 'true')
+                or request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+            )
+            etag = table_versions.etag("songs", variant="ndjson" if stream else "json")
+            # The format follows the Accept header, so shared caches must key on it too
+            unchanged = not_modified(etag, vary='Accept')
+            if unchanged is not None:
+                return unchanged
+
+            if stream:
+                app.logger.info("Streaming songs from the catalog as NDJSON")
+                return with_etag(Response(
+                    stream_with_context(generate_ndjson(Songs.iter_all_songs(sort_by_play_count=sort_by_play_count))),
+                    status=200,
+                    mimetype='application/x-ndjson'
+                ), etag, vary='Accept')
+
             songs = Songs.get_all_songs(sort_by_play_count=sort_by_play_count)
 
             app.logger.info(f"Successfully retrieved {len(songs)} songs from the catalog")
 
-            return make_response(jsonify({
+            return with_etag(make_response(jsonify({
                 "status": "success",
                 "message": "Songs retrieved successfully",
                 "songs": songs
-            }), 200)
+            }), 200), etag, vary='Accept')
 
         except Exception as e:
             app.logger.error(f"Failed to retrieve songs: {e}")
@@ -450,6 +641,18 @@ def create_app(config_class=ProductionConfig) -> Flask:
             }), 500)
 
 
+    def generate_ndjson(rows, lines_per_chunk: int = 500):
+        """Serialize rows as newline-delimited JSON, a few hundred lines per chunk."""
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(row, separators=(",", ":")))
+            if len(lines) >= lines_per_chunk:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+
     @app.route('/api/get-song-from-catalog-by-id/<int:song_id>', methods=['GET'])
     @login_required
     def get_song_by_id(song_id: int) -> Response:
@@ -560,23 +763,93 @@ def create_app(config_class=ProductionConfig) -> Flask:
             }), 500)
 
 
+    @app.route('/api/search-songs', methods=['GET'])
+    @login_required
+    def search_songs() -> Response:
+        """Route to full-text search the catalog by artist, title and genre.
+
+        Query Parameters:
+            - q (str): The search text. Every word must match, as a prefix.
+            - limit (int, optional): The maximum number of results to return (default 20, max 100).
+            - offset (int, optional): The number of ranked results to skip (default 0).
+
+        Returns:
+            JSON response containing the matching songs, best match first, and the offset
+            of the next page (null if there are no more results).
+
+        Raises:
+            400 error if the query is empty or limit/offset are invalid.
+            500 error if there is an issue searching the catalog.
+
+        """
+        try:
+            query = request.args.get('q', '')
+            try:
+                limit = min(int(request.args.get('limit', 20)), 100)
+                offset = int(request.args.get('offset', 0))
+            except ValueError:
+                app.logger.warning("Invalid search parameters: limit and offset must be integers")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "limit and offset must be integers"
+                }), 400)
+
+            app.logger.info(f"Received request to search songs for '{query}'")
+
+            songs, has_more = Songs.search_songs(query, limit=limit, offset=offset)
+
+            app.logger.info(f"Search for '{query}' returned {len(songs)} songs")
+            return make_response(jsonify({
+                "status": "success",
+                "songs": songs,
+                "next_offset": offset + len(songs) if has_more else None
+            }), 200)
+
+        except ValueError as e:
+            app.logger.warning(f"Invalid search request: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400)
+
+        except Exception as e:
+            app.logger.error(f"Failed to search songs: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while searching songs",
+                "details": str(e)
+            }), 500)
+
+
     @app.route('/api/get-random-song', methods=['GET'])
     @login_required
     def get_random_song() -> Response:
         """Route to retrieve a random song from the catalog.
 
+        Query Parameters:
+            - mode (str, optional): "uniform" (default) gives every song the same chance;
+              "popular" favors songs in proportion to their play count.
+
         Returns:
             JSON response containing the details of a random song.
 
         Raises:
-            400 error if no songs exist in the catalog.
+            400 error if no songs exist in the catalog or the mode is unknown.
             500 error if there is an issue retrieving the song
 
         """
         try:
-            app.logger.info("Received request to retrieve a random song from the catalog")
+            mode = request.args.get("mode", "uniform")
+            app.logger.info(f"Received request to retrieve a random song from the catalog (mode: {mode})")
 
-            song = Songs.get_random_song()
+            if mode not in ("uniform", "popular"):
+                app.logger.warning(f"Unknown random song mode: {mode}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "mode must be 'uniform' or 'popular'"
+                }), 400)
+
+            song = Songs.get_popular_random_song() if mode == "popular" else Songs.get_random_song()
             if not song:
                 app.logger.warning("No songs found in the catalog.")
                 return make_response(jsonify({
@@ -584,7 +857,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
                     "message": "No songs available in the catalog"
                 }), 400)
 
-            app.logger.info(f"Successfully retrieved random song: {song.title} by {song.artist}")
+            app.logger.info(f"Successfully retrieved random song: {song['title']} by {song['artist']}")
 
             return make_response(jsonify({
                 "status": "success",
@@ -592,6 +865,13 @@ def create_app(config_class=ProductionConfig) -> Flask:
                 "song": song
             }), 200)
 
+        except ValueError as e:
+            app.logger.warning(f"No songs found in the catalog: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "No songs available in the catalog"
+            }), 400)
+
         except Exception as e:
             app.logger.error(f"Failed to retrieve random song: {e}")
             return make_response(jsonify({
@@ -627,6 +907,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info("Received request to add song to playlist")
 
             data = request.get_json()
@@ -698,6 +979,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info("Received request to remove song from playlist")
 
             data = request.get_json()
@@ -767,6 +1049,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info(f"Received request to remove song at track number {track_number} from playlist")
 
             playlist_model.remove_song_by_track_number(track_number)
@@ -806,6 +1089,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info("Received request to clear the playlist")
 
             playlist_model.clear_playlist()
@@ -846,6 +1130,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info("Received request to play the current song")
 
             current_song = playlist_model.get_current_song()
@@ -895,6 +1180,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info("Received request to play the entire playlist")
 
             if playlist_model.check_if_empty():
@@ -935,6 +1221,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info("Received request to play the rest of the playlist")
 
             if playlist_model.check_if_empty():
@@ -982,6 +1269,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info("Received request to rewind the playlist")
 
             if playlist_model.check_if_empty():
@@ -1024,6 +1312,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
             500 error if there is an issue updating the track number.
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info(f"Received request to go to track number {track_number}")
 
             if not playlist_model.is_valid_track_number(track_number):
@@ -1071,6 +1360,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info("Received request to go to a random track")
 
             if playlist_model.get_playlist_length() == 0:
@@ -1096,6 +1386,56 @@ def create_app(config_class=ProductionConfig) -> Flask:
                 "details": str(e)
             }), 500)
 
+    @app.route('/api/set-shuffle', methods=['POST'])
+    @login_required
+    def set_shuffle() -> Response:
+        """Route to turn shuffle mode on or off.
+
+        In shuffle mode, /api/go-to-random-track walks a shuffled order of the playlist,
+        visiting every track once before repeating any.
+
+        Expected JSON Input:
+            - enabled (bool): Whether shuffle mode should be on.
+
+        Returns:
+            JSON response indicating whether shuffle mode is now on.
+
+        Raises:
+            400 error if 'enabled' is missing or not a boolean.
+            500 error if there is an issue shuffling the playlist.
+
+        """
+        try:
+            playlist_model = get_playlist_model()
+            data = request.get_json()
+
+            enabled = data.get("enabled") if isinstance(data, dict) else None
+            if not isinstance(enabled, bool):
+                app.logger.warning(f"Invalid shuffle request: {data}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "Request body must include 'enabled' as true or false"
+                }), 400)
+
+            app.logger.info(f"Received request to turn shuffle mode {'on' if enabled else 'off'}")
+            if enabled:
+                playlist_model.enable_shuffle()
+            else:
+                playlist_model.disable_shuffle()
+
+            return make_response(jsonify({
+                "status": "success",
+                "shuffle": playlist_model.shuffle_enabled
+            }), 200)
+
+        except Exception as e:
+            app.logger.error(f"Failed to change shuffle mode: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while changing shuffle mode",
+                "details": str(e)
+            }), 500)
+
 
     ############################################################
     #
@@ -1109,23 +1449,41 @@ def create_app(config_class=ProductionConfig) -> Flask:
     def get_all_songs_from_playlist() -> Response:
         """Retrieve all songs in the playlist.
 
+        Responses carry an ETag built from the stored playlist's version. The version is
+        checked against the database first, so a change made through another worker is
+        never answered with a 304; if the client's If-None-Match matches, an empty 304 is
+        returned without reading the songs.
+
         Returns:
             JSON response containing the list of songs.
+            304 if the client's copy is current.
 
         Raises:
             500 error if there is an issue retrieving the playlist.
 
         """
+        def playlist_etag(playlist_model: PlaylistModel) -> str:
+            return table_versions.etag(
+                "songs", "playlists", variant=f"{playlist_model.user_id}.{playlist_model.version}"
+            )
+
         try:
             app.logger.info("Received request to retrieve all songs from the playlist.")
 
+            # Refreshing costs one indexed version lookup and picks up other workers' changes
+            playlist_model = get_playlist_model()
+            etag = playlist_etag(playlist_model)
+            unchanged = not_modified(etag)
+            if unchanged is not None:
+                return unchanged
+
             songs = playlist_model.get_all_songs()
 
             app.logger.info(f"Successfully retrieved {len(songs)} songs from the playlist.")
-            return make_response(jsonify({
+            return with_etag(make_response(jsonify({
                 "status": "success",
                 "songs": songs
-            }), 200)
+            }), 200), etag)
 
         except Exception as e:
             app.logger.error(f"Failed to retrieve songs from playlist: {e}")
@@ -1153,6 +1511,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info(f"Received request to retrieve song at track number {track_number}.")
 
             song = playlist_model.get_song_by_track_number(track_number)
@@ -1192,6 +1551,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info("Received request to retrieve the current song.")
 
             current_song = playlist_model.get_current_song()
@@ -1214,26 +1574,33 @@ def create_app(config_class=ProductionConfig) -> Flask:
     @app.route('/api/get-playlist-length-duration', methods=['GET'])
     @login_required
     def get_playlist_length_and_duration() -> Response:
-        """Retrieve the length (number of songs) and total duration of the playlist.
+        """Retrieve the length (number of songs), total duration and genre breakdown of the playlist.
+
+        The duration and genres come from running totals kept by the playlist, so this
+        does not look up every song.
 
         Returns:
-            JSON response containing the playlist length and total duration.
+            JSON response containing the playlist length, total duration and the
+            song count and duration of each genre.
 
         Raises:
             500 error if there is an issue retrieving playlist information.
 
         """
         try:
+            playlist_model = get_playlist_model()
             app.logger.info("Received request to retrieve playlist length and duration.")
 
             playlist_length = playlist_model.get_playlist_length()
             playlist_duration = playlist_model.get_playlist_duration()
+            genres = playlist_model.get_genre_breakdown()
 
             app.logger.info(f"Playlist contains {playlist_length} songs with a total duration of {playlist_duration} seconds.")
             return make_response(jsonify({
                 "status": "success",
                 "playlist_length": playlist_length,
-                "playlist_duration": playlist_duration
+                "playlist_duration": playlist_duration,
+                "genres": genres
             }), 200)
 
         except Exception as e:
@@ -1271,6 +1638,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             data = request.get_json()
 
             required_fields = ["artist", "title", "year"]
@@ -1323,6 +1691,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
 
         """
         try:
+            playlist_model = get_playlist_model()
             data = request.get_json()
 
             required_fields = ["artist", "title", "year"]
@@ -1375,6 +1744,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
             500 error if an error occurs while updating the playlist.
         """
         try:
+            playlist_model = get_playlist_model()
             data = request.get_json()
 
             required_fields = ["artist", "title", "year", "track_number"]
@@ -1425,6 +1795,7 @@ def create_app(config_class=ProductionConfig) -> Flask:
             500 error if an error occurs while swapping songs in the playlist.
         """
         try:
+            playlist_model = get_playlist_model()
             data = request.get_json()
 
             required_fields = ["track_number_1", "track_number_2"]
@@ -1459,6 +1830,63 @@ def create_app(config_class=ProductionConfig) -> Flask:
             }), 500)
 
 
+    @app.route('/api/playlist/batch', methods=['POST'])
+    @login_required
+    def apply_playlist_batch() -> Response:
+        """Apply a list of add, remove and move operations to the playlist in one request.
+
+        Expected JSON Input:
+            - operations (list): The operations to apply in order, each one of
+                - {"op": "add", "song_id": int}
+                - {"op": "remove", "song_id": int}
+                - {"op": "move", "song_id": int, "track_number": int}
+
+        Returns:
+            JSON response with the song IDs of the playlist in their new order.
+
+        Raises:
+            400 error if the input is invalid or any operation cannot be applied,
+                in which case the playlist is left unchanged.
+            500 error if an error occurs while updating the playlist.
+        """
+        try:
+            playlist_model = get_playlist_model()
+            data = request.get_json()
+
+            operations = data.get("operations") if isinstance(data, dict) else None
+            if not isinstance(operations, list):
+                app.logger.warning("Batch request without an operations list")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "Request body must include an 'operations' list"
+                }), 400)
+
+            app.logger.info(f"Received request to apply {len(operations)} playlist operations")
+            playlist = playlist_model.apply_batch(operations)
+
+            app.logger.info(f"Successfully applied {len(operations)} playlist operations")
+            return make_response(jsonify({
+                "status": "success",
+                "playlist": playlist,
+                "playlist_length": len(playlist)
+            }), 200)
+
+        except ValueError as e:
+            app.logger.warning(f"Rejected playlist batch: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400)
+
+        except Exception as e:
+            app.logger.error(f"Failed to apply playlist batch: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while applying the playlist batch",
+                "details": str(e)
+            }), 500)
+
+
 
     ############################################################
     #
@@ -1472,23 +1900,66 @@ def create_app(config_class=ProductionConfig) -> Flask:
         """
         Route to retrieve a leaderboard of songs sorted by play count.
 
+        Query Parameters:
+            - limit (int, optional): The maximum number of songs to return. If omitted,
+              every song is returned.
+            - cursor (str, optional): The next_cursor from a previous page.
+            - min_plays (int, optional): Only include songs with at least this many plays.
+            - exact (bool, optional): If true, write buffered plays to the database first
+              so the counts include every play so far.
+
+        Responses carry an ETag. A request whose If-None-Match holds the ETag of the
+        current play counts gets an empty 304 without the leaderboard being read.
+
         Returns:
-            JSON response with a sorted leaderboard of songs.
+            JSON response with a sorted leaderboard of songs and the cursor of the next page.
+            304 if the client's copy is current.
 
         Raises:
+            400 error if limit, cursor or min_plays is invalid.
             500 error if there is an issue generating the leaderboard.
 
         """
         try:
             app.logger.info("Received request to generate song leaderboard")
 
-            leaderboard_data = Songs.get_all_songs(sort_by_play_count=True)
+            try:
+                limit = request.args.get('limit')
+                limit = int(limit) if limit is not None else None
+                min_plays = int(request.args.get('min_plays', 0))
+            except ValueError:
+                app.logger.warning("Invalid leaderboard parameters: limit and min_plays must be integers")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "limit and min_plays must be integers"
+                }), 400)
+            cursor = request.args.get('cursor')
+
+            if request.args.get('exact', 'false').lower() == 'true':
+                flushed = play_count_buffer.flush()
+                app.logger.info(f"Flushed {flushed} buffered plays for an exact leaderboard")
+
+            # Taken after any flush, whose plays change the leaderboard
+            etag = table_versions.etag("songs")
+            unchanged = not_modified(etag)
+            if unchanged is not None:
+                return unchanged
+
+            leaderboard_data, next_cursor = Songs.get_leaderboard(limit=limit, cursor=cursor, min_plays=min_plays)
 
             app.logger.info(f"Successfully generated song leaderboard with {len(leaderboard_data)} entries")
-            return make_response(jsonify({
+            return with_etag(make_response(jsonify({
                 "status": "success",
-                "leaderboard": leaderboard_data
-            }), 200)
+                "leaderboard": leaderboard_data,
+                "next_cursor": next_cursor
+            }), 200), etag)
+
+        except ValueError as e:
+            app.logger.warning(f"Invalid leaderboard request: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400)
 
         except Exception as e:
             app.logger.error(f"Failed to generate song leaderboard: {e}")
@@ -1498,6 +1969,314 @@ def create_app(config_class=ProductionConfig) -> Flask:
                 "details": str(e)
             }), 500)
 
+
+    @app.route('/api/play-stats', methods=['GET'])
+    @login_required
+    def get_play_stats() -> Response:
+        """
+        Route to retrieve play counts from the play history, by hour or day.
+
+        Counts are read from the hourly and daily rollups, never from the raw play log.
+        Only the logged-in user's plays are counted.
+
+        Query Parameters:
+            - granularity (str, optional): "hour" or "day" (default).
+            - since (int, optional): The start of the range in Unix seconds. Defaults to
+              7 days before until for "day", or 24 hours before until for "hour".
+            - until (int, optional): The end of the range in Unix seconds (exclusive).
+              Defaults to now.
+            - group_by (str, optional): "bucket" (default) for one row per hour or day,
+              or "song" or "user" for totals per song or user over the range.
+            - user_id (int, optional): Must be the logged-in user's ID if given.
+            - song_id (int, optional): Only count plays of this song.
+            - exact (bool, optional): If true, write logged plays first so the counts
+              include every play so far.
+
+        Returns:
+            JSON response with the play counts.
+
+        Raises:
+            400 error if a parameter is invalid.
+            403 error if user_id is another user's ID.
+            500 error if there is an issue reading the play statistics.
+
+        """
+        try:
+            app.logger.info("Received request for play statistics")
+
+            granularity = request.args.get('granularity', 'day')
+            if granularity not in ("hour", "day"):
+                app.logger.warning(f"Invalid play stats granularity: {granularity}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "granularity must be 'hour' or 'day'"
+                }), 400)
+            rollup = PlayRollupsHourly if granularity == "hour" else PlayRollupsDaily
+
+            try:
+                until = int(request.args.get('until', time.time()))
+                default_span = 7 * DAY_SECONDS if granularity == "day" else DAY_SECONDS
+                since = int(request.args.get('since', until - default_span))
+                user_id = request.args.get('user_id')
+                user_id = int(user_id) if user_id is not None else None
+                song_id = request.args.get('song_id')
+                song_id = int(song_id) if song_id is not None else None
+            except ValueError:
+                app.logger.warning("Invalid play stats parameters: since, until, user_id and song_id must be integers")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "since, until, user_id and song_id must be integers"
+                }), 400)
+
+            if user_id is not None and user_id != current_user.id:
+                app.logger.warning(f"User {current_user.id} requested the play statistics of user {user_id}")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "Play statistics are only available for your own plays"
+                }), 403)
+            user_id = current_user.id
+
+            if request.args.get('exact', 'false').lower() == 'true':
+                flushed = play_event_log.flush()
+                app.logger.info(f"Wrote {flushed} logged plays for exact play statistics")
+
+            # Align since down to a bucket so the first partial hour or day is included
+            since -= since % rollup.bucket_seconds
+            stats = rollup.get_stats(
+                since,
+                until,
+                group_by=request.args.get('group_by', 'bucket'),
+                user_id=user_id,
+                song_id=song_id
+            )
+
+            app.logger.info(f"Returning {len(stats)} rows of {granularity} play statistics")
+            return make_response(jsonify({
+                "status": "success",
+                "granularity": granularity,
+                "since": since,
+                "until": until,
+                "stats": stats
+            }), 200)
+
+        except ValueError as e:
+            app.logger.warning(f"Invalid play stats request: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400)
+
+        except Exception as e:
+            app.logger.error(f"Failed to retrieve play statistics: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while retrieving play statistics",
+                "details": str(e)
+            }), 500)
+
+
+    @app.route('/api/trending-songs', methods=['GET'])
+    @login_required
+    def get_trending_songs() -> Response:
+        """
+        Route to retrieve the most played songs over a recent window.
+
+        Plays are counted in memory as they happen, so this reflects what is popular now
+        rather than all-time play counts. Counts are per worker process.
+
+        Query Parameters:
+            - window (str, optional): "15m", "1h" (default) or "24h".
+            - limit (int, optional): The maximum number of songs to return. Defaults to 10.
+
+        Returns:
+            JSON response with the trending songs, each with its plays in the window.
+
+        Raises:
+            400 error if the window or limit is invalid.
+            500 error if there is an issue retrieving the trending songs.
+
+        """
+        try:
+            window = request.args.get('window', '1h')
+            try:
+                limit = int(request.args.get('limit', 10))
+            except ValueError:
+                app.logger.warning("Invalid trending songs limit: must be an integer")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "limit must be an integer"
+                }), 400)
+            app.logger.info(f"Received request for the top {limit} trending songs over {window}")
+
+            top = trending_songs.top(window, limit)
+            songs = Songs.get_song_snapshots_by_ids([song_id for song_id, _ in top])
+            trending = [
+                {**asdict(songs[song_id]), "window_plays": plays}
+                for song_id, plays in top if song_id in songs
+            ]
+
+            app.logger.info(f"Returning {len(trending)} trending songs over {window}")
+            return make_response(jsonify({
+                "status": "success",
+                "window": window,
+                "songs": trending
+            }), 200)
+
+        except ValueError as e:
+            app.logger.warning(f"Invalid trending songs request: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400)
+
+        except Exception as e:
+            app.logger.error(f"Failed to retrieve trending songs: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while retrieving trending songs",
+                "details": str(e)
+            }), 500)
+
+
+    @app.route('/api/catalog-changes', methods=['GET'])
+    @login_required
+    def get_catalog_changes() -> Response:
+        """
+        Route to retrieve the changes to the song catalog since a sequence number.
+
+        Every song create, update, delete and play count change gets the next sequence
+        number. Clients keep a copy of the catalog, remember "next_since" from the last
+        response and poll with it, receiving only the songs that changed since, each with
+        its current data ("song" is null for deleted songs). If "reset" is true the
+        catalog was dropped and the client should empty its copy before applying the
+        changes. Changes older than CATALOG_CHANGES_RETENTION seconds are compacted away
+        in the background every CATALOG_COMPACTION_INTERVAL seconds.
+
+        Query Parameters:
+            - since (int, optional): The last sequence number applied. Defaults to 0.
+            - limit (int, optional): The maximum number of changes to return. Defaults to 1000.
+
+        Returns:
+            JSON response with the changes, "next_since", "latest_seq", "has_more" and "reset".
+
+        Raises:
+            400 error if since or limit is invalid.
+            410 error if the requested changes have been compacted; the client must reload
+                the whole catalog and poll again from the returned "latest_seq".
+            500 error if there is an issue retrieving the changes.
+
+        """
+        try:
+            try:
+                since = int(request.args.get('since', 0))
+                limit = int(request.args.get('limit', 1000))
+            except ValueError:
+                app.logger.warning("Invalid catalog changes request: since and limit must be integers")
+                return make_response(jsonify({
+                    "status": "error",
+                    "message": "since and limit must be integers"
+                }), 400)
+            app.logger.info(f"Received request for catalog changes after seq {since}")
+
+            feed = CatalogChanges.get_changes(since, limit)
+            songs = Songs.get_song_snapshots_by_ids(
+                [change["song_id"] for change in feed["changes"] if change["kind"] != "deleted"]
+            )
+            for change in feed["changes"]:
+                song = songs.get(change["song_id"])
+                change["song"] = asdict(song) if song is not None else None
+
+            app.logger.info(f"Returning {len(feed['changes'])} catalog changes after seq {since}")
+            return make_response(jsonify({
+                "status": "success",
+                **feed
+            }), 200)
+
+        except ChangesCompactedError as e:
+            app.logger.warning(f"Catalog changes requested after compaction: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": str(e),
+                "latest_seq": e.latest_seq
+            }), 410)
+
+        except ValueError as e:
+            app.logger.warning(f"Invalid catalog changes request: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400)
+
+        except Exception as e:
+            app.logger.error(f"Failed to retrieve catalog changes: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while retrieving catalog changes",
+                "details": str(e)
+            }), 500)
+
+
+    @app.route('/api/cache-stats', methods=['GET'])
+    @login_required
+    def get_cache_stats() -> Response:
+        """
+        Route to retrieve hit/miss/eviction/expiration counters for the playlist song cache.
+
+        Returns:
+            JSON response with the song cache statistics.
+
+        Raises:
+            500 error if there is an issue reading the cache statistics.
+
+        """
+        try:
+            app.logger.info("Received request to retrieve song cache stats")
+
+            stats = song_cache.get_stats()
+
+            return make_response(jsonify({
+                "status": "success",
+                "cache": stats
+            }), 200)
+
+        except Exception as e:
+            app.logger.error(f"Failed to retrieve song cache stats: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while retrieving cache stats",
+                "details": str(e)
+            }), 500)
+
+
+    @app.route('/api/random-pool-stats', methods=['GET'])
+    @login_required
+    def get_random_pool_stats() -> Response:
+        """
+        Route to retrieve the depth and refill latency of the pooled random.org integers.
+
+        Returns:
+            JSON response with the random pool statistics.
+
+        Raises:
+            500 error if there is an issue reading the pool statistics.
+
+        """
+        try:
+            app.logger.info("Received request to retrieve random pool stats")
+
+            return make_response(jsonify({
+                "status": "success",
+                "random_pool": random_pool.stats()
+            }), 200)
+
+        except Exception as e:
+            app.logger.error(f"Failed to retrieve random pool stats: {e}")
+            return make_response(jsonify({
+                "status": "error",
+                "message": "An internal error occurred while retrieving random pool stats",
+                "details": str(e)
+            }), 500)
+
     return app
 
 if __name__ == '__main__':
@@ -0,0 +1,109 @@
+"""Peak RSS of /api/get-all-songs-from-catalog in list mode vs. NDJSON streaming mode.
+
+Usage:
+    python benchmarks/bench_catalog_export.py [--rows 1000000]
+
+A SQLite catalog with the requested number of rows is built in a temporary file.
+Each mode is then run in a fresh child process so its peak RSS (ru_maxrss) is
+measured in isolation.
+
+"""
+import argparse
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_catalog(db_path: str, rows: int) -> None:
+    """Create the schema through the app and bulk insert synthetic songs."""
+    from playlist.db import db
+    from playlist.models.song_model import Songs
+
+    app = make_app(db_path)
+    with app.app_context():
+        table = Songs.__table__
+        batch = 50000
+        for start in range(0, rows, batch):
+            db.session.execute(table.insert(), [
+                {
+                    "artist": f"Artist {i % 5000}",
+                    "title": f"Title {i}",
+                    "year": 1950 + i % 70,
+                    "genre": "Rock",
+                    "duration": 120 + i % 300,
+                    "play_count": i % 1000,
+                }
+                for i in range(start, min(start + batch, rows))
+            ])
+        db.session.commit()
+
+
+def make_app(db_path: str):
+    from app import create_app
+    from config import TestConfig
+
+    class BenchConfig(TestConfig):
+        SECRET_KEY = "bench"
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+
+    app = create_app(BenchConfig)
+    # Per-request info logging is not what is being measured
+    for name in list(logging.root.manager.loggerDict) + [app.logger.name]:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    return app
+
+
+def run_mode(db_path: str, mode: str) -> None:
+    """Fetch the catalog once in the given mode and print elapsed time and peak RSS."""
+    app = make_app(db_path)
+    client = app.test_client()
+    client.put("/api/create-user", json={"username": "bench", "password": "bench"})
+    client.post("/api/login", json={"username": "bench", "password": "bench"})
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+
+    if mode == "stream":
+        response = client.get("/api/get-all-songs-from-catalog?stream=1", buffered=False)
+        received = sum(len(chunk) for chunk in response.response)
+    else:
+        response = client.get("/api/get-all-songs-from-catalog")
+        received = len(response.get_data())
+
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode:>6}: {elapsed:6.2f}s  {received / 1e6:7.1f} MB sent  "
+          f"peak RSS {peak_kb / 1024:7.1f} MiB (+{(peak_kb - baseline_kb) / 1024:.1f} MiB over idle app)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--mode", choices=["list", "stream"], help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.db, args.mode)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "catalog.db")
+        print(f"Building catalog with {args.rows} rows...")
+        build_catalog(db_path, args.rows)
+        for mode in ("list", "stream"):
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, "--db", db_path],
+                check=True,
+                stderr=subprocess.DEVNULL
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Repeated polling of the catalog, leaderboard and playlist routes with and without ETags.
+
+Usage:
+    python benchmarks/bench_conditional_get.py [--rows 20000] [--playlist 500] [--polls 200]
+
+A SQLite catalog with the requested number of rows is built in a temporary file, and
+a logged-in user's playlist is filled with songs from it. Each route is then polled
+``--polls`` times the way a client did before ETags (a plain GET every time) and the
+way a client revalidating its copy does now (If-None-Match with the ETag of a response
+fetched just before). Nothing changes between polls, so every conditional poll is a 304
+as long as the conditional loop finishes within ETAG_MAX_AGE (60 seconds by default).
+
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_catalog_export import build_catalog, make_app  # noqa: E402
+
+
+ROUTES = [
+    "/api/get-all-songs-from-catalog",
+    "/api/song-leaderboard?limit=100",
+    "/api/get-all-songs-from-playlist",
+]
+
+
+def poll(client, path: str, polls: int, etag: str = None) -> tuple[float, int, int]:
+    """GETs a route repeatedly and returns (seconds per request, bytes per request, 304 count)."""
+    headers = {"If-None-Match": etag} if etag else {}
+    received = not_modified = 0
+    start = time.perf_counter()
+    for _ in range(polls):
+        response = client.get(path, headers=headers)
+        received += len(response.get_data())
+        not_modified += response.status_code == 304
+    elapsed = time.perf_counter() - start
+    return elapsed / polls, received // polls, not_modified
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--playlist", type=int, default=500)
+    parser.add_argument("--polls", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "catalog.db")
+        print(f"Building catalog with {args.rows} rows...")
+        build_catalog(db_path, args.rows)
+
+        app = make_app(db_path)
+        logging.disable(logging.INFO)
+        client = app.test_client()
+        client.put("/api/create-user", json={"username": "bench", "password": "bench"})
+        client.post("/api/login", json={"username": "bench", "password": "bench"})
+        client.post("/api/playlist/batch", json={
+            "operations": [{"op": "add", "song_id": song_id} for song_id in range(1, args.playlist + 1)]
+        })
+
+        print(f"{'route':<36} {'mode':<13} {'ms/request':>10} {'bytes/request':>14} {'304s':>6}")
+        for path in ROUTES:
+            first = client.get(path)
+            if first.status_code != 200:
+                print(f"{path:<36} failed with {first.status_code}: {first.get_data()[:200]!r}")
+                continue
+            seconds, size, not_modified = poll(client, path, args.polls)
+            print(f"{path:<36} {'full GET':<13} {seconds * 1000:>10.3f} {size:>14} {not_modified:>6}")
+
+            # The full GETs can outlast ETAG_MAX_AGE, so revalidate against a fresh tag
+            etag = client.get(path).headers["ETag"]
+            seconds, size, not_modified = poll(client, path, args.polls, etag)
+            print(f"{path:<36} {'If-None-Match':<13} {seconds * 1000:>10.3f} {size:>14} {not_modified:>6}")
+
+
+if __name__ == "__main__":
+    main()
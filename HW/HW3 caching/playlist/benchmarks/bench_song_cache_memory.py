@@ -0,0 +1,94 @@
+"""Memory held by the playlist song cache: ORM instances vs. SongSnapshot values.
+
+Usage:
+    python benchmarks/bench_song_cache_memory.py [--songs 100000]
+
+A SQLite catalog with the requested number of songs is built in memory. Every song
+is then loaded into a fresh TTLCache twice: once as Songs ORM instances (the old
+cache contents) and once as SongSnapshot values built from row tuples. The memory
+retained by each cache is measured with tracemalloc.
+
+"""
+import argparse
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_app():
+    from app import create_app
+    from config import TestConfig
+
+    app = create_app(TestConfig)
+    for name in list(logging.root.manager.loggerDict) + [app.logger.name]:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    return app
+
+
+def build_catalog(songs: int) -> list[int]:
+    from playlist.db import db
+    from playlist.models.song_model import Songs
+
+    db.session.execute(Songs.__table__.insert(), [
+        {
+            "artist": f"Artist {i % 5000}",
+            "title": f"Title {i}",
+            "year": 1950 + i % 70,
+            "genre": "Rock",
+            "duration": 120 + i % 300,
+            "play_count": i % 1000,
+        }
+        for i in range(songs)
+    ])
+    db.session.commit()
+    return list(range(1, songs + 1))
+
+
+def measure(label: str, load) -> int:
+    """Loads every song into a new cache and returns the bytes the cache keeps alive."""
+    from playlist.db import db
+    from playlist.utils.cache import TTLCache
+
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    cache = TTLCache(max_entries=10_000_000, ttl_seconds=3600)
+    for song_id, song in load().items():
+        cache.set(song_id, song)
+    gc.collect()
+
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{label:>10}: {retained / 2**20:7.1f} MiB  ({retained / len(cache):6.0f} bytes per cached song)")
+
+    del cache
+    db.session.expunge_all()
+    return retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--songs", type=int, default=100_000)
+    args = parser.parse_args()
+
+    from playlist.models.song_model import Songs
+
+    app = make_app()
+    with app.app_context():
+        song_ids = build_catalog(args.songs)
+        print(f"Caching {args.songs} songs...")
+        # The ORM instances stay in the session's identity map while cached, as they did
+        # when the cache held Songs objects, so that memory is counted against them
+        orm = measure("ORM", lambda: Songs.get_songs_by_ids(song_ids))
+        snapshots = measure("snapshots", lambda: Songs.get_song_snapshots_by_ids(song_ids))
+        print(f"Snapshots use {orm / snapshots:.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
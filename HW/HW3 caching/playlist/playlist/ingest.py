@@ -0,0 +1,253 @@
+"""Bulk loading of songs into the catalog from CSV or JSONL.
+
+Usage:
+    python -m playlist.ingest songs.csv [--format csv|jsonl] [--on-conflict skip|upsert]
+                                        [--workers N] [--batch-size N]
+
+CSV input needs a header row with artist, title, year, genre and duration columns.
+JSONL input has one JSON object with those keys per line.
+
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, TextIO, Union
+
+from playlist.models.song_model import Songs, validate_song_fields
+from playlist.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+SONG_FIELDS = ("artist", "title", "year", "genre", "duration")
+MAX_REPORTED_ERRORS = 100
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Union[dict, str]]:
+    """Yields raw rows from a CSV or JSONL stream.
+
+    JSONL lines are yielded unparsed so that decoding happens in the validation workers.
+
+    Args:
+        stream (TextIO): The input text stream.
+        fmt (str): Either "csv" or "jsonl".
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "jsonl":
+        for line in stream:
+            if line.strip():
+                yield line
+    else:
+        raise ValueError(f"Unsupported ingest format: {fmt}. Use 'csv' or 'jsonl'.")
+
+
+def normalize_row(raw: Union[dict, str]) -> dict:
+    """Converts a raw CSV/JSONL row into a validated song dictionary.
+
+    Args:
+        raw (Union[dict, str]): A CSV row dict or a JSONL line.
+
+    Returns:
+        dict: The song with stripped strings and integer year and duration.
+
+    Raises:
+        ValueError: If the row cannot be parsed or fails song validation.
+    """
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    if not isinstance(raw, dict):
+        raise ValueError("Row must be an object")
+
+    missing_fields = [field for field in SONG_FIELDS if raw.get(field) in (None, "")]
+    if missing_fields:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+    song = {}
+    for field in ("artist", "title", "genre"):
+        if not isinstance(raw[field], str):
+            raise ValueError(f"{field.capitalize()} must be a non-empty string.")
+        song[field] = raw[field].strip()
+    for field in ("year", "duration"):
+        value = raw[field]
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(f"{field.capitalize()} must be an integer.")
+        song[field] = int(value)
+
+    validate_song_fields(**song)
+    return song
+
+
+def _validate_chunk(chunk: list[tuple[int, Union[dict, str]]]) -> tuple[list[dict], list[tuple[int, str]]]:
+    """Validates a chunk of (row number, raw row) pairs. Runs in a worker process."""
+    valid, errors = [], []
+    for row_number, raw in chunk:
+        try:
+            valid.append(normalize_row(raw))
+        except ValueError as e:
+            errors.append((row_number, str(e)))
+    return valid, errors
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    numbered = enumerate(rows, start=1)
+    while True:
+        chunk = list(islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _validated_chunks(rows: Iterable, batch_size: int, workers: int) -> Iterator[tuple[list[dict], list]]:
+    """Validates rows in batches, in parallel worker processes when workers > 1.
+
+    At most two batches per worker are in flight, so memory stays bounded for large inputs.
+    Batches are yielded in input order. Workers are spawned rather than forked, because the
+    calling process already runs the app's background flusher thread and a fork would copy
+    its locks in whatever state they happen to be in.
+    """
+    chunks = _chunks(rows, batch_size)
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield _validate_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(_validate_chunk, chunk))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def ingest_songs(
+    stream: TextIO,
+    fmt: str = "csv",
+    on_conflict: str = "skip",
+    workers: Optional[int] = None,
+    batch_size: int = 10000,
+    progress: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """Validates and inserts every song from a CSV or JSONL stream.
+
+    Must be called inside a Flask application context. Each batch is validated
+    (in parallel when ``workers`` > 1) and written with Songs.bulk_insert_songs in its
+    own transaction. Invalid rows are skipped and reported.
+
+    Args:
+        stream (TextIO): The input text stream.
+        fmt (str): Either "csv" or "jsonl".
+        on_conflict (str): "skip" or "upsert" for songs whose (artist, title, year) exists.
+        workers (int, optional): Number of validation processes. Defaults to the
+                                 "INGEST_WORKERS" environment variable, or the CPU count.
+        batch_size (int): Rows per validation batch and insert transaction.
+        progress (Callable[[dict], None], optional): Called with the running report
+                                                     after every batch.
+
+    Returns:
+        dict: Counts of received, valid, invalid and written rows, the first
+              MAX_REPORTED_ERRORS row errors, and the elapsed time and throughput.
+
+    Raises:
+        ValueError: If the format or conflict policy is invalid.
+        SQLAlchemyError: If a database write fails.
+    """
+    if on_conflict not in ("skip", "upsert"):
+        raise ValueError(f"Invalid conflict policy: {on_conflict}. Use 'skip' or 'upsert'.")
+    if workers is None:
+        workers = int(os.getenv("INGEST_WORKERS", os.cpu_count() or 1))
+
+    logger.info(f"Starting bulk ingest (format={fmt}, on_conflict={on_conflict}, workers={workers})")
+
+    report = {
+        "received": 0,
+        "valid": 0,
+        "invalid": 0,
+        "written": 0,
+        "errors": [],
+        "elapsed_seconds": 0.0,
+        "rows_per_second": 0.0,
+    }
+    start = time.perf_counter()
+
+    for valid, errors in _validated_chunks(read_rows(stream, fmt), batch_size, workers):
+        report["written"] += Songs.bulk_insert_songs(valid, on_conflict=on_conflict)
+        report["received"] += len(valid) + len(errors)
+        report["valid"] += len(valid)
+        report["invalid"] += len(errors)
+
+        room = MAX_REPORTED_ERRORS - len(report["errors"])
+        report["errors"].extend({"row": row, "error": error} for row, error in errors[:room])
+
+        elapsed = time.perf_counter() - start
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["rows_per_second"] = round(report["received"] / elapsed, 1) if elapsed else 0.0
+
+        logger.info(
+            f"Ingested {report['received']} rows ({report['written']} written, "
+            f"{report['invalid']} invalid) at {report['rows_per_second']} rows/s"
+        )
+        if progress is not None:
+            progress(report)
+
+    logger.info(f"Bulk ingest finished: {report['received']} rows in {report['elapsed_seconds']}s")
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m playlist.ingest",
+        description="Bulk load songs into the catalog from CSV or JSONL."
+    )
+    parser.add_argument("path", help="CSV or JSONL file to load, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"],
+                        help="Input format. Defaults to the file extension.")
+    parser.add_argument("--on-conflict", choices=["skip", "upsert"], default="skip",
+                        help="What to do with songs whose (artist, title, year) already exists.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of validation processes.")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per insert transaction.")
+    args = parser.parse_args(argv)
+
+    fmt = args.format
+    if fmt is None:
+        fmt = "jsonl" if args.path.endswith((".jsonl", ".ndjson")) else "csv"
+
+    from app import create_app
+
+    def print_progress(report: dict) -> None:
+        print(
+            f"{report['received']} rows, {report['written']} written, {report['invalid']} invalid, "
+            f"{report['rows_per_second']} rows/s",
+            flush=True
+        )
+
+    app = create_app()
+    with app.app_context():
+        if args.path == "-":
+            report = ingest_songs(sys.stdin, fmt, args.on_conflict, args.workers, args.batch_size, print_progress)
+        else:
+            with open(args.path, newline="", encoding="utf-8") as stream:
+                report = ingest_songs(stream, fmt, args.on_conflict, args.workers, args.batch_size, print_progress)
+
+    print(json.dumps(report, indent=2))
+    return 0 if report["invalid"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
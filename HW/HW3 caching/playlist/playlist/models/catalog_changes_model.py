@@ -0,0 +1,209 @@
+import logging
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from playlist.db import db
+from playlist.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class ChangesCompactedError(ValueError):
+    """Raised when a client asks for changes that have already been compacted away.
+
+    Attributes:
+        latest_seq (int): The newest sequence number, to resume from after a full reload.
+
+    """
+
+    def __init__(self, message: str, latest_seq: int):
+        super().__init__(message)
+        self.latest_seq = latest_seq
+
+
+class CatalogChanges(db.Model):
+    """
+    A feed of changes to the song catalog, numbered by an increasing sequence.
+
+    A row is written in the same transaction as every song create, update, delete and
+    play count change, so the feed never shows a change that was rolled back and never
+    misses one that was committed. Clients remember the last ``seq`` they saw and ask
+    for what came after it.
+
+    ``seq`` uses SQLite AUTOINCREMENT, so numbers are never reused even after old rows
+    are compacted away. A "reset" row has no song: the whole catalog was dropped and
+    everything after it rebuilds the catalog from scratch.
+
+    """
+
+    __tablename__ = "catalog_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = db.Column(db.Integer, primary_key=True)
+    song_id = db.Column(db.Integer, nullable=True, index=True)
+    kind = db.Column(db.String(16), nullable=False)
+    changed_at = db.Column(db.Integer, nullable=False, index=True)  # Unix seconds
+
+    @classmethod
+    def record(cls, song_ids: Iterable[int], kind: str) -> None:
+        """
+        Adds one change per song to the current transaction, without committing.
+
+        Args:
+            song_ids (Iterable[int]): The songs that changed.
+            kind (str): One of "created", "updated", "deleted" or "play_count".
+        """
+        now = int(time.time())
+        rows = [{"song_id": song_id, "kind": kind, "changed_at": now} for song_id in song_ids]
+        if rows:
+            db.session.execute(insert(cls), rows)
+
+    @classmethod
+    def record_from_query(cls, song_ids_query, kind: str) -> None:
+        """
+        Adds one change for each song ID a SELECT returns, without committing.
+
+        The IDs never leave the database, which suits bulk writes whose affected IDs
+        are only known by a query, such as every ID above the previous maximum.
+
+        Args:
+            song_ids_query: A SELECT of a single song ID column.
+            kind (str): The kind of change.
+        """
+        subquery = song_ids_query.subquery()
+        source = select(subquery.c[0], literal(kind), literal(int(time.time())))
+        db.session.execute(insert(cls).from_select(["song_id", "kind", "changed_at"], source))
+
+    @classmethod
+    def record_reset(cls) -> None:
+        """
+        Records that the whole catalog was dropped, in its own transaction.
+
+        Raises:
+            SQLAlchemyError: If any database error occurs.
+        """
+        try:
+            db.session.execute(insert(cls).values(song_id=None, kind="reset", changed_at=int(time.time())))
+            db.session.commit()
+            logger.info("Recorded a catalog reset in the change feed")
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while recording a catalog reset: {e}")
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def get_changes(cls, since: int, limit: int = 1000) -> dict:
+        """
+        Returns the catalog changes after a sequence number, one per song.
+
+        Several changes to the same song are collapsed into its latest one, so a client
+        that was away for a while gets one row per song that changed rather than every
+        step. If the catalog was reset after ``since``, only changes after the latest
+        reset are returned and ``reset`` is True: the client should drop its copy and
+        apply the changes to an empty catalog.
+
+        Args:
+            since (int): The last sequence number the client has applied. 0 for none.
+            limit (int, optional): The maximum number of changes to return. Defaults to 1000.
+
+        Returns:
+            dict: With "changes" (dicts of seq, song_id and kind, in seq order), "reset",
+                  "next_since" (the seq to ask from next), "latest_seq" and "has_more".
+
+        Raises:
+            ChangesCompactedError: If changes after ``since`` have been compacted away.
+            ValueError: If since or limit is out of range.
+            SQLAlchemyError: If any database error occurs.
+        """
+        if since < 0:
+            raise ValueError("since must not be negative")
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+
+        try:
+            oldest, latest = db.session.execute(select(func.min(cls.seq), func.max(cls.seq))).one()
+            latest = latest or 0
+            if oldest is not None and since < oldest - 1:
+                raise ChangesCompactedError(
+                    f"Changes after {since} have been compacted; the oldest kept change is {oldest}",
+                    latest
+                )
+
+            last_reset = db.session.execute(
+                select(func.max(cls.seq)).where(cls.kind == "reset", cls.seq > since)
+            ).scalar()
+            if last_reset is not None:
+                since = last_reset
+
+            latest_per_song = (
+                select(func.max(cls.seq).label("seq"))
+                .where(cls.seq > since, cls.song_id.isnot(None))
+                .group_by(cls.song_id)
+                .subquery()
+            )
+            rows = db.session.execute(
+                select(cls.seq, cls.song_id, cls.kind)
+                .join(latest_per_song, cls.seq == latest_per_song.c.seq)
+                .order_by(cls.seq)
+                .limit(limit + 1)
+            ).all()
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while reading catalog changes: {e}")
+            raise
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        changes = [{"seq": row.seq, "song_id": row.song_id, "kind": row.kind} for row in rows]
+        # Past the last returned row, or straight to the latest seq if nothing more is pending
+        next_since = rows[-1].seq if has_more else max(latest, since)
+
+        logger.info(f"Returning {len(changes)} catalog changes after seq {since} (latest {latest})")
+        return {
+            "changes": changes,
+            "reset": last_reset is not None,
+            "next_since": next_since,
+            "latest_seq": latest,
+            "has_more": has_more,
+        }
+
+    @classmethod
+    def compact(cls, max_age_seconds: float, now: Optional[float] = None) -> int:
+        """
+        Deletes changes older than ``max_age_seconds``, always keeping the newest one.
+
+        Clients whose ``since`` falls before the remaining changes must resync the whole
+        catalog; get_changes tells them so with ChangesCompactedError.
+
+        Args:
+            max_age_seconds (float): How long changes are kept.
+            now (float, optional): The current Unix time. Defaults to the clock.
+
+        Returns:
+            int: The number of changes deleted.
+
+        Raises:
+            SQLAlchemyError: If any database error occurs.
+        """
+        cutoff = int((now if now is not None else time.time()) - max_age_seconds)
+        try:
+            newest = db.session.execute(select(func.max(cls.seq))).scalar()
+            if newest is None:
+                return 0
+            result = db.session.execute(delete(cls).where(cls.changed_at < cutoff, cls.seq < newest))
+            db.session.commit()
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while compacting catalog changes: {e}")
+            db.session.rollback()
+            raise
+
+        if result.rowcount:
+            logger.info(f"Compacted {result.rowcount} catalog changes older than {max_age_seconds}s")
+        return result.rowcount
@@ -0,0 +1,127 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from playlist.models.song_model import Songs
+from playlist.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class PlayCountBuffer:
+    """
+    A write-behind accumulator for song play counts.
+
+    Plays are counted in memory and written to the database in one transaction,
+    as atomic ``play_count = play_count + n`` updates, once enough plays are pending
+    or enough time has passed since the last flush. The time threshold is only checked
+    when a play is recorded; register ``flush`` with a BackgroundFlusher so a quiet
+    worker still writes its plays on the interval.
+
+    """
+
+    def __init__(self, flush_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        """Initializes an empty buffer.
+
+        The thresholds default to the environment variables "PLAY_COUNT_FLUSH_SIZE"
+        (100 plays) and "PLAY_COUNT_FLUSH_INTERVAL" (5 seconds).
+
+        Args:
+            flush_size (int, optional): Flush once this many plays are pending.
+            flush_interval (float, optional): Flush once this many seconds have passed
+                                              since the last flush.
+
+        """
+        self.flush_size = flush_size if flush_size is not None else int(os.getenv("PLAY_COUNT_FLUSH_SIZE", 100))
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else float(os.getenv("PLAY_COUNT_FLUSH_INTERVAL", 5))
+        )
+
+        self._pending: Counter = Counter()
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, song_id: int, count: int = 1) -> None:
+        """Records plays for a song, flushing if a threshold has been reached.
+
+        Args:
+            song_id (int): The ID of the song that was played.
+            count (int, optional): The number of plays to record. Defaults to 1.
+
+        Raises:
+            SQLAlchemyError: If a triggered flush fails.
+        """
+        with self._lock:
+            self._pending[song_id] += count
+            self._pending_total += count
+            should_flush = (
+                self._pending_total >= self.flush_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+        logger.debug(f"Buffered {count} play(s) for song ID {song_id}")
+
+        if should_flush:
+            self.flush()
+
+    def pending(self, song_id: int) -> int:
+        """Returns the number of plays recorded for a song but not yet written.
+
+        Args:
+            song_id (int): The ID of the song.
+
+        Returns:
+            int: The number of buffered plays.
+        """
+        with self._lock:
+            return self._pending.get(song_id, 0)
+
+    def pending_counts(self) -> dict[int, int]:
+        """Returns a copy of all buffered play counts, keyed by song ID."""
+        with self._lock:
+            return dict(self._pending)
+
+    def clear(self) -> None:
+        """Discards every buffered play count without writing it."""
+        with self._lock:
+            self._pending.clear()
+            self._pending_total = 0
+
+    def flush(self) -> int:
+        """Writes every buffered play count to the database in one transaction.
+
+        If the write fails the plays are put back in the buffer so they are not lost.
+
+        Returns:
+            int: The number of plays written.
+
+        Raises:
+            SQLAlchemyError: If the database write fails.
+        """
+        with self._lock:
+            increments = dict(self._pending)
+            total = self._pending_total
+            self._pending.clear()
+            self._pending_total = 0
+            self._last_flush = time.monotonic()
+
+        if not increments:
+            return 0
+
+        try:
+            Songs.increment_play_counts(increments)
+        except Exception:
+            logger.error(f"Failed to flush {total} buffered plays; keeping them for the next flush")
+            with self._lock:
+                self._pending.update(increments)
+                self._pending_total += total
+            raise
+
+        logger.info(f"Flushed {total} buffered plays for {len(increments)} songs")
+        return total
@@ -0,0 +1,157 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from playlist.models.play_history_model import PlayEvents
+from playlist.models.user_playlist_model import Playlists
+from playlist.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class PlayEventLog:
+    """
+    A write-behind appender for the play history log.
+
+    Plays are collected in memory and written to the play_events table, together with
+    their hourly and daily rollups, in one transaction once enough plays are pending or
+    enough time has passed since the last write. Like PlayCountBuffer, the time threshold
+    is only checked when a play is recorded; register ``flush`` with a BackgroundFlusher
+    so a quiet worker still writes its plays on the interval.
+
+    Stored playlists' current track numbers move with every play, so they are written
+    behind here too: only the latest number per playlist is kept, and written after
+    the plays.
+
+    """
+
+    def __init__(
+        self,
+        flush_size: Optional[int] = None,
+        flush_interval_ms: Optional[float] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """Initializes an empty log buffer.
+
+        The thresholds default to the environment variables "PLAY_LOG_FLUSH_SIZE"
+        (100 plays) and "PLAY_LOG_FLUSH_INTERVAL_MS" (1000 milliseconds).
+
+        Args:
+            flush_size (int, optional): Write once this many plays are pending.
+            flush_interval_ms (float, optional): Write once this many milliseconds have
+                                                 passed since the last write.
+            clock (Callable[[], float], optional): Returns the current Unix time in seconds,
+                                                   used to timestamp plays.
+
+        """
+        self.flush_size = flush_size if flush_size is not None else int(os.getenv("PLAY_LOG_FLUSH_SIZE", 100))
+        self.flush_interval_ms = (
+            flush_interval_ms if flush_interval_ms is not None
+            else float(os.getenv("PLAY_LOG_FLUSH_INTERVAL_MS", 1000))
+        )
+        self._clock = clock
+
+        self._pending: list[tuple[int, Optional[int], int]] = []
+        self._current_tracks: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, song_id: int, user_id: Optional[int] = None) -> None:
+        """Records a play, writing the buffer if a threshold has been reached.
+
+        Args:
+            song_id (int): The ID of the song that was played.
+            user_id (int, optional): The ID of the user who played it.
+
+        Raises:
+            SQLAlchemyError: If a triggered flush fails.
+        """
+        played_at = int(self._clock())
+        with self._lock:
+            self._pending.append((song_id, user_id, played_at))
+            should_flush = (
+                len(self._pending) >= self.flush_size
+                or (time.monotonic() - self._last_flush) * 1000 >= self.flush_interval_ms
+            )
+
+        logger.debug(f"Logged a play of song ID {song_id} by user {user_id}")
+
+        if should_flush:
+            self.flush()
+
+    def record_current_track(self, playlist_id: int, track_number: int) -> None:
+        """Records a stored playlist's new current track number, to be written on the next flush.
+
+        Args:
+            playlist_id (int): The ID of the stored playlist.
+            track_number (int): Its current track number.
+        """
+        with self._lock:
+            self._current_tracks[playlist_id] = track_number
+
+    def current_track(self, playlist_id: int) -> Optional[int]:
+        """Returns a playlist's current track number if one is waiting to be written."""
+        with self._lock:
+            return self._current_tracks.get(playlist_id)
+
+    def pending(self) -> int:
+        """Returns the number of plays logged but not yet written."""
+        with self._lock:
+            return len(self._pending)
+
+    def clear(self) -> None:
+        """Discards every pending play and current track without writing them."""
+        with self._lock:
+            self._pending.clear()
+            self._current_tracks.clear()
+
+    def flush(self) -> int:
+        """Writes every pending play to the log and the rollups in one transaction,
+        then the pending current track numbers in another.
+
+        If a write fails what it held is put back in the buffer so it is not lost.
+
+        Returns:
+            int: The number of plays written.
+
+        Raises:
+            SQLAlchemyError: If a database write fails.
+        """
+        with self._lock:
+            events = self._pending
+            self._pending = []
+            current_tracks = self._current_tracks
+            self._current_tracks = {}
+            self._last_flush = time.monotonic()
+
+        if events:
+            try:
+                PlayEvents.append_many(events)
+            except Exception:
+                logger.error(f"Failed to write {len(events)} logged plays; keeping them for the next flush")
+                with self._lock:
+                    self._pending[:0] = events
+                    self._restore_current_tracks(current_tracks)
+                raise
+            logger.info(f"Wrote {len(events)} logged plays")
+
+        if current_tracks:
+            try:
+                Playlists.store_current_tracks(current_tracks)
+            except Exception:
+                logger.error(f"Failed to store {len(current_tracks)} current tracks; keeping them for the next flush")
+                with self._lock:
+                    self._restore_current_tracks(current_tracks)
+                raise
+            logger.debug(f"Stored the current track of {len(current_tracks)} playlists")
+
+        return len(events)
+
+    def _restore_current_tracks(self, current_tracks: Dict[int, int]) -> None:
+        # Callers hold the lock; numbers recorded since the flush began are newer
+        for playlist_id, track_number in current_tracks.items():
+            self._current_tracks.setdefault(playlist_id, track_number)
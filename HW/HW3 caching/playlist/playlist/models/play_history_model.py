@@ -0,0 +1,196 @@
+import logging
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from playlist.db import db
+from playlist.models.song_model import SQLITE_MAX_IN_PARAMS
+from playlist.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+HOUR_SECONDS = 60 * 60
+DAY_SECONDS = 24 * HOUR_SECONDS
+
+# Rollup rows need a concrete user_id for their primary key; plays without a user use this
+ANONYMOUS_USER_ID = 0
+
+
+class PlayEvents(db.Model):
+    """
+    The append-only log of every play, one row per play.
+
+    Rows are only ever inserted, in batches by PlayEventLog. Questions about plays are
+    answered from the hourly and daily rollups, which are updated in the same
+    transaction as each batch, so the log itself is never scanned.
+
+    """
+
+    __tablename__ = "play_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    song_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    played_at = db.Column(db.Integer, nullable=False, index=True)  # Unix seconds
+
+    @classmethod
+    def append_many(cls, events: list[tuple[int, Optional[int], int]]) -> None:
+        """
+        Appends plays to the log and adds them to the rollups in one transaction.
+
+        The events are written with multi-row INSERT statements, and each rollup with
+        multi-row upserts that add to the existing counts, so a batch costs a handful of
+        statements however many plays it holds.
+
+        Args:
+            events (list[tuple[int, Optional[int], int]]): (song ID, user ID or None,
+                                                           Unix time of the play) tuples.
+
+        Raises:
+            SQLAlchemyError: If any database error occurs.
+        """
+        if not events:
+            return
+
+        hourly, daily = Counter(), Counter()
+        for song_id, user_id, played_at in events:
+            user_id = user_id if user_id is not None else ANONYMOUS_USER_ID
+            hourly[(played_at - played_at % HOUR_SECONDS, user_id, song_id)] += 1
+            daily[(played_at - played_at % DAY_SECONDS, user_id, song_id)] += 1
+
+        try:
+            rows = [{"song_id": song_id, "user_id": user_id, "played_at": played_at}
+                    for song_id, user_id, played_at in events]
+            for chunk in _chunks(rows, 3):
+                db.session.execute(insert(cls).values(chunk))
+
+            for rollup, counts in ((PlayRollupsHourly, hourly), (PlayRollupsDaily, daily)):
+                rollup.add_counts(counts)
+
+            db.session.commit()
+            logger.info(f"Appended {len(events)} plays to the play log "
+                        f"({len(hourly)} hourly and {len(daily)} daily rollup rows)")
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while appending plays to the play log: {e}")
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def delete_all(cls) -> None:
+        """
+        Deletes the whole play log and its rollups, as when the songs they refer to are reset.
+
+        Raises:
+            SQLAlchemyError: If any database error occurs.
+        """
+        try:
+            for table in (cls, PlayRollupsHourly, PlayRollupsDaily):
+                db.session.execute(delete(table))
+            db.session.commit()
+            logger.info("Deleted the play log and its rollups")
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while deleting the play log: {e}")
+            db.session.rollback()
+            raise
+
+
+class _PlayRollup:
+    """Columns and queries shared by the hourly and daily rollup tables."""
+
+    bucket_seconds: int
+
+    bucket_start = db.Column(db.Integer, primary_key=True)  # Unix seconds, aligned to the bucket
+    user_id = db.Column(db.Integer, primary_key=True)
+    song_id = db.Column(db.Integer, primary_key=True)
+    plays = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def add_counts(cls, counts: Counter) -> None:
+        """Adds play counts keyed by (bucket start, user ID, song ID), without committing."""
+        table = cls.__table__
+        rows = [{"bucket_start": bucket_start, "user_id": user_id, "song_id": song_id, "plays": plays}
+                for (bucket_start, user_id, song_id), plays in counts.items()]
+        for chunk in _chunks(rows, 4):
+            statement = sqlite_insert(table).values(chunk)
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=["bucket_start", "user_id", "song_id"],
+                set_={"plays": table.c.plays + statement.excluded.plays}
+            ))
+
+    @classmethod
+    def get_stats(
+        cls,
+        since: int,
+        until: int,
+        group_by: str = "bucket",
+        user_id: Optional[int] = None,
+        song_id: Optional[int] = None
+    ) -> list[dict]:
+        """
+        Sums plays from the rollup over the buckets starting in [since, until).
+
+        Args:
+            since (int): The start of the range, in Unix seconds.
+            until (int): The end of the range, in Unix seconds (exclusive).
+            group_by (str, optional): "bucket" for one row per hour or day, or "song" or
+                                      "user" for one row per song or user. Defaults to "bucket".
+            user_id (int, optional): Only count plays by this user.
+            song_id (int, optional): Only count plays of this song.
+
+        Returns:
+            list[dict]: Rows with the group key and "plays". Buckets are in time order;
+                        songs and users are ordered by plays, most first.
+
+        Raises:
+            ValueError: If group_by is not "bucket", "song" or "user".
+            SQLAlchemyError: If any database error occurs.
+        """
+        columns = {"bucket": cls.bucket_start, "song": cls.song_id, "user": cls.user_id}
+        if group_by not in columns:
+            raise ValueError(f"Invalid group_by: {group_by}. Use 'bucket', 'song' or 'user'.")
+
+        key = columns[group_by]
+        plays = func.sum(cls.plays).label("plays")
+        query = select(key, plays).where(cls.bucket_start >= since, cls.bucket_start < until)
+        if user_id is not None:
+            query = query.where(cls.user_id == user_id)
+        if song_id is not None:
+            query = query.where(cls.song_id == song_id)
+        query = query.group_by(key).order_by(key if group_by == "bucket" else plays.desc(), key)
+
+        try:
+            rows = db.session.execute(query).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while reading {cls.__tablename__}: {e}")
+            raise
+
+        name = key.key
+        return [{name: row[0], "plays": row[1]} for row in rows]
+
+
+class PlayRollupsHourly(_PlayRollup, db.Model):
+    """Plays per hour, user and song, maintained by PlayEvents.append_many."""
+
+    __tablename__ = "play_rollups_hourly"
+    bucket_seconds = HOUR_SECONDS
+
+
+class PlayRollupsDaily(_PlayRollup, db.Model):
+    """Plays per UTC day, user and song, maintained by PlayEvents.append_many."""
+
+    __tablename__ = "play_rollups_daily"
+    bucket_seconds = DAY_SECONDS
+
+
+def _chunks(rows: list[dict], columns: int):
+    """Splits rows so that no statement binds more than SQLITE_MAX_IN_PARAMS parameters."""
+    size = max(1, SQLITE_MAX_IN_PARAMS // columns)
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
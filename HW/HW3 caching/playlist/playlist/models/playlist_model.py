@@ -1,11 +1,21 @@
 import logging
-import os
-import time
-from typing import List
-
-from playlist.models.song_model import Songs
-from playlist.utils.api_utils import get_random
+import threading
+from typing import Iterable, List, Optional, Sequence
+
+from playlist.models.play_count_buffer import PlayCountBuffer
+from playlist.models.play_event_log import PlayEventLog
+from playlist.models.song_cache import SongCache
+from playlist.models.song_snapshot import SongSnapshot
+from playlist.models.trending_songs import TrendingSongs
+from playlist.models.user_playlist_model import Playlists, StalePlaylistError
+from playlist.signals import songs_reset, songs_updated
+from playlist.utils.api_utils import RANDOM_POOL_RANGE, get_pooled_random
+from playlist.utils.indexed_playlist import IndexedPlaylist
 from playlist.utils.logger import configure_logger
+from playlist.utils.playlist_totals import PlaylistTotals
+from playlist.utils.rwlock import RWLock, read_locked, write_locked
+from playlist.utils.shared_cache import SharedCache
+from playlist.utils.shuffle import ShuffleOrder
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
@@ -15,59 +25,247 @@ class PlaylistModel:
     """
     A class to manage a playlist of songs.
 
+    One instance may be shared by many request threads. Reads of the playlist and current
+    track take a shared lock and run in parallel; anything that changes them takes the
+    exclusive lock for the whole check-and-update, so compound operations such as
+    playing and advancing are atomic. The song cache has its own locks.
+
+    A model created for a user is backed by that user's stored playlist: it is loaded
+    from the database and every change is written through before it is applied in memory.
+    The current track number is the exception: it is written behind with the play log.
+
+    The total duration and per-genre counts are kept as running totals, updated as songs
+    are added and removed. If the playlist is changed some other way, such as being
+    replaced or edited directly, the totals are rebuilt from the songs on the next read.
+
+    In shuffle mode, random jumps walk a shuffled order of the playlist that is drawn
+    from a single pooled random value and patched as songs are added and removed.
+
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        play_count_buffer: Optional[PlayCountBuffer] = None,
+        shared_cache: Optional[SharedCache] = None,
+        song_cache: Optional[SongCache] = None,
+        user_id: Optional[int] = None,
+        debug_checks: bool = False,
+        trending: Optional[TrendingSongs] = None,
+        play_log: Optional[PlayEventLog] = None
+    ):
         """Initializes the PlaylistModel with an empty playlist and the current track set to 1.
 
-        The playlist is a list of Songs, and the current track number is 1-indexed.
-        The TTL (Time To Live) for song caching is set to a default value from the environment variable "TTL",
-        which defaults to 60 seconds if not set.
+        The playlist is an ordered collection of song IDs, and the current track number is 1-indexed.
+        Songs are looked up through a SongCache; see SongCache for its TTL and size settings.
+
+        Args:
+            play_count_buffer (PlayCountBuffer, optional): Where plays are recorded before being
+                                                           written to the database. A private
+                                                           buffer is created if not given.
+            shared_cache (SharedCache, optional): A cache tier shared with other worker processes,
+                                                  used when a private song cache is created.
+            song_cache (SongCache, optional): The song cache to use. Models serving different
+                                              users should share one. A private cache is
+                                              created if not given.
+            user_id (int, optional): Load and persist the playlist of this user. Must be called
+                                     inside a Flask application context. If not given, the
+                                     playlist only lives in memory.
+            debug_checks (bool, optional): Recompute the running totals from scratch on every
+                                           read and fail if they disagree. Defaults to False.
+            trending (TrendingSongs, optional): Where plays are counted for trending songs.
+                                                Plays are not counted if not given.
+            play_log (PlayEventLog, optional): Where plays are appended to the play history,
+                                               with this model's user. Plays are not logged
+                                               if not given.
 
         """
-        self.current_track_number = 1
-        self.playlist: List[int] = []
-        self._song_cache: dict[int, Songs] = {}
-        self._ttl: dict[int, float] = {}
-        self.ttl_seconds = int(os.getenv("TTL", 60))  # Default TTL is 60 seconds
+        self._lock = RWLock()
+        self._current_track_number = 1
+        self._playlist = IndexedPlaylist()
+        self._totals = PlaylistTotals()
+        self._totals_playlist = self._playlist
+        self._totals_version = self._playlist.version
+        # Bumped whenever songs in the playlist change in the catalog; see _on_songs_changed
+        self._songs_generation = 0
+        self._songs_generation_lock = threading.Lock()
+        self._totals_generation = 0
+        self._totals_rebuild_lock = threading.Lock()
+        self.debug_checks = debug_checks
+        self._shuffle: Optional[ShuffleOrder] = None
+        self.song_cache = song_cache if song_cache is not None else SongCache(shared_cache=shared_cache)
+        self.play_count_buffer = play_count_buffer if play_count_buffer is not None else PlayCountBuffer()
+        self.trending = trending
+        self.play_log = play_log
+
+        self.user_id = user_id
+        self._playlist_id = None
+        self._version = None
+        if user_id is not None:
+            self._load()
+
+        # Updated songs may have a new genre or duration
+        songs_updated.connect(self._on_songs_changed)
+        songs_reset.connect(self._on_songs_changed)
+
+    @property
+    def playlist(self) -> IndexedPlaylist:
+        """The song IDs in the playlist, in track order.
+
+        Membership checks and swaps are O(1); positional lookups, inserts and
+        removals are O(log n).
+
+        """
+        return self._playlist
+
+    @playlist.setter
+    @write_locked
+    def playlist(self, song_ids: Iterable[int]) -> None:
+        playlist = IndexedPlaylist(song_ids)
+        self._write_through(Playlists.replace_songs, playlist.to_list())
+        self._playlist = playlist
+        if self._shuffle is not None:
+            self._shuffle.reset(playlist)
+
+    @property
+    def version(self) -> Optional[int]:
+        """The stored playlist's version as of the last load or change, or None without one.
+
+        This is the in-memory copy; call refresh() first to pick up changes from other workers.
+
+        """
+        return self._version
+
+    @property
+    def current_track_number(self) -> int:
+        """The 1-indexed number of the track that plays next."""
+        return self._current_track_number
+
+    @current_track_number.setter
+    @write_locked
+    def current_track_number(self, track_number: int) -> None:
+        if track_number != self._current_track_number:
+            self._store_current_track(track_number)
+        self._current_track_number = track_number
 
 
     ##################################################
-    # Song Management Functions
+    # Persistence Functions
     ##################################################
 
-    def _get_song_from_cache_or_db(self, song_id: int) -> Songs:
+    def _load(self) -> None:
+        """Replaces the in-memory playlist with the user's stored playlist."""
+        playlist_id, song_ids, current_track_number, version = Playlists.load_for_user(self.user_id)
+        self._playlist_id = playlist_id
+        self._playlist = IndexedPlaylist(song_ids)
+        # A track number still waiting in the play log is newer than the stored one
+        pending_track = self.play_log.current_track(playlist_id) if self.play_log is not None else None
+        self._current_track_number = pending_track if pending_track is not None else current_track_number
+        self._version = version
+        if self._shuffle is not None:
+            self._shuffle.reset(song_ids)
+
+    def refresh(self) -> bool:
+        """
+        Reloads the stored playlist if another worker changed it since it was loaded.
+
+        This costs one indexed lookup of the playlist's version. The write lock is only
+        taken when the version differs, so the usual case, nothing changed, does not
+        hold up readers. Models that are not backed by a user's stored playlist never
+        reload.
+
+        Returns:
+            bool: True if the playlist was reloaded.
+        """
+        if self.user_id is None or Playlists.get_version(self._playlist_id) == self._version:
+            return False
+
+        with self._lock.write():
+            # Another request may have reloaded or written it while this one waited
+            if Playlists.get_version(self._playlist_id) == self._version:
+                return False
+            logger.info(f"Stored playlist of user {self.user_id} changed elsewhere; reloading")
+            self._load()
+            return True
+
+    def _store_current_track(self, track_number: int) -> None:
         """
-        Retrieves a song by ID, using the internal cache if possible.
+        Stores the current track number of the stored playlist, if there is one.
+
+        The track number changes with every play, so it is not versioned content: it is
+        written behind with the play log when the model has one, and directly otherwise.
+        """
+        if self.user_id is None:
+            return
+        if self.play_log is not None:
+            self.play_log.record_current_track(self._playlist_id, track_number)
+        else:
+            Playlists.store_current_tracks({self._playlist_id: track_number})
+
+    def _write_through(self, change, *args) -> None:
+        """
+        Applies a change to the stored playlist, if there is one, before it is made in memory.
+
+        Callers hold the write lock. If another worker changed the playlist first, the
+        in-memory copy is reloaded and StalePlaylistError is raised so the request can
+        be retried against the current state.
+        """
+        if self.user_id is None:
+            return
+        try:
+            self._version = change(self._playlist_id, self._version, *args)
+        except StalePlaylistError:
+            self._load()
+            raise
 
-        This method checks whether a cached version of the song is available
-        and still valid. If not, it queries the database, updates the cache, and returns the song.
+
+    ##################################################
+    # Song Management Functions
+    ##################################################
+
+    def _get_song_from_cache_or_db(self, song_id: int) -> SongSnapshot:
+        """
+        Retrieves a song by ID through the song cache, loading it from the database on a miss.
 
         Args:
             song_id (int): The unique ID of the song to retrieve.
 
         Returns:
-            Songs: The song object corresponding to the given ID.
+            SongSnapshot: The song corresponding to the given ID.
 
         Raises:
             ValueError: If the song cannot be found in the database.
         """
-        now = time.time()
+        return self.song_cache.get_song(song_id)
 
-        if song_id in self._song_cache and self._ttl.get(song_id, 0) > now:
-            logger.debug(f"Song ID {song_id} retrieved from cache")
-            return self._song_cache[song_id]
+    def _get_songs_from_cache_or_db(self, song_ids: List[int]) -> List[SongSnapshot]:
+        """
+        Retrieves many songs by ID through the song cache, loading all misses with one query.
 
-        try:
-            song = Songs.get_song_by_id(song_id)
-            logger.info(f"Song ID {song_id} loaded from DB")
-        except ValueError as e:
-            logger.error(f"Song ID {song_id} not found in DB: {e}")
-            raise ValueError(f"Song ID {song_id} not found in database") from e
+        Args:
+            song_ids (List[int]): The IDs of the songs to retrieve, in the order wanted.
 
-        self._song_cache[song_id] = song
-        self._ttl[song_id] = now + self.ttl_seconds
-        return song
+        Returns:
+            List[SongSnapshot]: The songs corresponding to the given IDs, in the same order.
+
+        Raises:
+            ValueError: If any of the songs cannot be found in the database.
+        """
+        return self.song_cache.get_songs(song_ids)
+
+    def _on_songs_changed(self, sender, song_ids: Optional[List[int]] = None) -> None:
+        # The RWLock is not taken: a signal may be sent by a thread that holds it for reading
+        if song_ids is None or any(song_id in self._playlist for song_id in song_ids):
+            with self._songs_generation_lock:
+                self._songs_generation += 1
+
+    def get_cache_stats(self) -> dict:
+        """
+        Returns hit, miss, eviction and expiration counters for the song cache.
+
+        Returns:
+            dict: The song cache statistics.
+        """
+        return self.song_cache.get_stats()
 
     def add_song_to_playlist(self, song_id: int) -> None:
         """
@@ -83,20 +281,30 @@ class PlaylistModel:
 
         song_id = self.validate_song_id(song_id, check_in_playlist=False)
 
-        if song_id in self.playlist:
-            logger.error(f"Song with ID {song_id} already exists in the playlist")
-            raise ValueError(f"Song with ID {song_id} already exists in the playlist")
-
         try:
             song = self._get_song_from_cache_or_db(song_id)
         except ValueError as e:
             logger.error(f"Failed to add song: {e}")
             raise
 
-        self.playlist.append(song.id)
+        # The song is loaded before taking the write lock, so readers are not held up by the DB
+        with self._lock.write():
+            if song_id in self.playlist:
+                logger.error(f"Song with ID {song_id} already exists in the playlist")
+                raise ValueError(f"Song with ID {song_id} already exists in the playlist")
+
+            self._write_through(Playlists.append_song, song.id, len(self.playlist) + 1)
+            in_sync = self._totals_in_sync()
+            self.playlist.append(song.id)
+            if in_sync:
+                self._totals.add(song)
+                self._mark_totals_in_sync()
+            if self._shuffle is not None:
+                self._shuffle.add(song.id)
         logger.info(f"Successfully added to playlist: {song.artist} - {song.title} ({song.year})")
 
 
+    @write_locked
     def remove_song_by_song_id(self, song_id: int) -> None:
         """Removes a song from the playlist by its song ID.
 
@@ -116,9 +324,11 @@ class PlaylistModel:
             logger.warning(f"Song with ID {song_id} not found in the playlist")
             raise ValueError(f"Song with ID {song_id} not found in the playlist")
 
-        self.playlist.remove(song_id)
+        self._write_through(Playlists.remove_at, self.playlist.index(song_id) + 1)
+        self._remove_at(self.playlist.index(song_id))
         logger.info(f"Successfully removed song with ID {song_id} from the playlist")
 
+    @write_locked
     def remove_song_by_track_number(self, track_number: int) -> None:
         """Removes a song from the playlist by its track number (1-indexed).
 
@@ -135,9 +345,11 @@ class PlaylistModel:
         track_number = self.validate_track_number(track_number)
         playlist_index = track_number - 1
 
+        self._write_through(Playlists.remove_at, track_number)
+        self._remove_at(playlist_index)
         logger.info(f"Successfully removed song at track number {track_number}")
-        del self.playlist[playlist_index]
 
+    @write_locked
     def clear_playlist(self) -> None:
         """Clears all songs from the playlist.
 
@@ -152,36 +364,151 @@ class PlaylistModel:
         except ValueError:
             logger.warning("Clearing an empty playlist")
 
+        self._write_through(Playlists.replace_songs, [])
         self.playlist.clear()
+        self._totals.clear()
+        self._mark_totals_in_sync()
+        if self._shuffle is not None:
+            self._shuffle.reset([])
         logger.info("Successfully cleared the playlist")
 
 
+    def apply_batch(self, operations: Sequence[dict]) -> List[int]:
+        """
+        Applies a list of add, remove and move operations to the playlist as one change.
+
+        Each operation is a dict with an "op" and a "song_id":
+
+            - {"op": "add", "song_id": 5} appends a song.
+            - {"op": "remove", "song_id": 5} removes a song.
+            - {"op": "move", "song_id": 5, "track_number": 2} moves a song to a track number.
+
+        Operations apply in order, so later ones see the effect of earlier ones. Every song
+        they refer to is validated up front with a single batched lookup. The operations are
+        then applied to a copy of the playlist, and the result is stored with one write and
+        swapped in. If any operation is invalid, nothing changes.
+
+        Args:
+            operations (Sequence[dict]): The operations to apply.
+
+        Returns:
+            List[int]: The song IDs of the playlist after the batch, in track order.
+
+        Raises:
+            ValueError: If an operation is malformed, refers to a song that is not in the
+                        catalog, adds a song already in the playlist, or removes or moves
+                        a song that is not in it.
+        """
+        logger.info(f"Received request to apply a batch of {len(operations)} playlist operations")
+
+        parsed = []
+        for number, operation in enumerate(operations, start=1):
+            if not isinstance(operation, dict) or operation.get("op") not in ("add", "remove", "move"):
+                logger.error(f"Invalid batch operation {number}: {operation}")
+                raise ValueError(f"Operation {number} must have an op of 'add', 'remove' or 'move'")
+            if "song_id" not in operation:
+                logger.error(f"Batch operation {number} is missing song_id")
+                raise ValueError(f"Operation {number} is missing song_id")
+            try:
+                song_id = int(operation["song_id"])
+                if song_id < 0:
+                    raise ValueError
+            except (TypeError, ValueError):
+                logger.error(f"Invalid song id in batch operation {number}: {operation['song_id']}")
+                raise ValueError(f"Operation {number}: invalid song id: {operation['song_id']}") from None
+            track_number = None
+            if operation["op"] == "move":
+                if "track_number" not in operation:
+                    logger.error(f"Batch operation {number} is missing track_number")
+                    raise ValueError(f"Operation {number} is missing track_number")
+                track_number = operation["track_number"]
+            parsed.append((operation["op"], song_id, track_number))
+
+        # One batched lookup validates every song before the lock is taken
+        songs = {song.id: song for song in self._get_songs_from_cache_or_db([song_id for _, song_id, _ in parsed])}
+
+        with self._lock.write():
+            in_sync = self._totals_in_sync()
+            playlist = IndexedPlaylist(self.playlist)
+            added, removed = [], []
+
+            for number, (op, song_id, track_number) in enumerate(parsed, start=1):
+                if op == "add":
+                    if song_id in playlist:
+                        raise ValueError(f"Operation {number}: song with ID {song_id} already exists in the playlist")
+                    playlist.append(song_id)
+                    added.append(song_id)
+                    continue
+
+                if song_id not in playlist:
+                    raise ValueError(f"Operation {number}: song with ID {song_id} not found in the playlist")
+                if op == "remove":
+                    playlist.remove(song_id)
+                    removed.append(song_id)
+                else:
+                    try:
+                        track_number = int(track_number)
+                    except (TypeError, ValueError):
+                        raise ValueError(f"Operation {number}: invalid track number: {track_number}") from None
+                    if not 1 <= track_number <= len(playlist):
+                        raise ValueError(f"Operation {number}: invalid track number: {track_number}")
+                    playlist.remove(song_id)
+                    playlist.insert(track_number - 1, song_id)
+
+            song_ids = playlist.to_list()
+            self._write_through(Playlists.replace_songs, song_ids)
+            self._playlist = playlist
+
+            if self._shuffle is not None:
+                for song_id in removed:
+                    if song_id in self._shuffle:
+                        self._shuffle.remove(song_id)
+                for song_id in added:
+                    if song_id in playlist and song_id not in self._shuffle:
+                        self._shuffle.add(song_id)
+
+            if in_sync:
+                # A song may be added and removed again within one batch, so net out first
+                for song_id in removed:
+                    if song_id in self._totals:
+                        self._totals.remove(song_id)
+                for song_id in added:
+                    if song_id in playlist and song_id not in self._totals:
+                        self._totals.add(songs[song_id])
+                self._mark_totals_in_sync()
+
+        logger.info(f"Applied {len(parsed)} batch operations; the playlist now has {len(song_ids)} songs")
+        return song_ids
+
+
     ##################################################
     # Playlist Retrieval Functions
     ##################################################
 
 
-    def get_all_songs(self) -> List[Songs]:
+    @read_locked
+    def get_all_songs(self) -> List[SongSnapshot]:
         """Returns a list of all songs in the playlist using cached song data.
 
         Returns:
-            List[Song]: A list of all songs in the playlist.
+            List[SongSnapshot]: A list of all songs in the playlist.
 
         Raises:
             ValueError: If the playlist is empty.
         """
         self.check_if_empty()
         logger.info("Retrieving all songs in the playlist")
-        return [self._get_song_from_cache_or_db(song_id) for song_id in self.playlist]
+        return self._get_songs_from_cache_or_db(list(self.playlist))
 
-    def get_song_by_song_id(self, song_id: int) -> Songs:
+    @read_locked
+    def get_song_by_song_id(self, song_id: int) -> SongSnapshot:
         """Retrieves a song from the playlist by its song ID using the cache or DB.
 
         Args:
             song_id (int): The ID of the song to retrieve.
 
         Returns:
-            Song: The song with the specified ID.
+            SongSnapshot: The song with the specified ID.
 
         Raises:
             ValueError: If the playlist is empty or the song is not found.
@@ -193,14 +520,15 @@ class PlaylistModel:
         logger.info(f"Successfully retrieved song: {song.artist} - {song.title} ({song.year})")
         return song
 
-    def get_song_by_track_number(self, track_number: int) -> Songs:
+    @read_locked
+    def get_song_by_track_number(self, track_number: int) -> SongSnapshot:
         """Retrieves a song from the playlist by its track number (1-indexed).
 
         Args:
             track_number (int): The track number of the song to retrieve.
 
         Returns:
-            Song: The song at the specified track number.
+            SongSnapshot: The song at the specified track number.
 
         Raises:
             ValueError: If the playlist is empty or the track number is invalid.
@@ -215,11 +543,12 @@ class PlaylistModel:
         logger.info(f"Successfully retrieved song: {song.artist} - {song.title} ({song.year})")
         return song
 
-    def get_current_song(self) -> Songs:
+    @read_locked
+    def get_current_song(self) -> SongSnapshot:
         """Returns the current song being played.
 
         Returns:
-            Song: The currently playing song.
+            SongSnapshot: The currently playing song.
 
         Raises:
             ValueError: If the playlist is empty.
@@ -228,6 +557,7 @@ class PlaylistModel:
         logger.info("Retrieving the current song being played")
         return self.get_song_by_track_number(self.current_track_number)
 
+    @read_locked
     def get_playlist_length(self) -> int:
         """Returns the number of songs in the playlist.
 
@@ -239,23 +569,128 @@ class PlaylistModel:
         logger.info(f"Retrieving playlist length: {length} songs")
         return length
 
+    @read_locked
     def get_playlist_duration(self) -> int:
         """
-        Returns the total duration of the playlist in seconds using cached songs.
+        Returns the total duration of the playlist in seconds from the running totals.
 
         Returns:
             int: The total duration of all songs in the playlist in seconds.
+
+        Raises:
+            ValueError: If the totals must be rebuilt and a song cannot be found in the database.
         """
-        total_duration = sum(self._get_song_from_cache_or_db(song_id).duration for song_id in self.playlist)
+        total_duration = self._get_totals().duration
         logger.info(f"Retrieving total playlist duration: {total_duration} seconds")
         return total_duration
 
+    @read_locked
+    def get_genre_breakdown(self) -> dict:
+        """
+        Returns the number of songs and total duration of each genre in the playlist.
+
+        Returns:
+            dict: Maps each genre to a dict with its "count" and "duration" (in seconds).
+
+        Raises:
+            ValueError: If the totals must be rebuilt and a song cannot be found in the database.
+        """
+        breakdown = self._get_totals().genre_breakdown()
+        logger.info(f"Retrieving playlist genre breakdown: {breakdown}")
+        return breakdown
+
+
+    ##################################################
+    # Running Totals Functions
+    ##################################################
+
+
+    def _totals_in_sync(self) -> bool:
+        """Returns True if the running totals match the playlist and its songs as they are now."""
+        # Versions only count changes to one IndexedPlaylist, so a replacement must not match
+        return (
+            self._totals_playlist is self._playlist
+            and self._totals_version == self._playlist.version
+            and self._totals_generation == self._songs_generation
+        )
+
+    def _mark_totals_in_sync(self) -> None:
+        """Records that the running totals match the playlist after a change applied to both."""
+        self._totals_playlist = self._playlist
+        self._totals_version = self._playlist.version
+
+    def _remove_at(self, playlist_index: int) -> None:
+        """Removes the song at a 0-based index from the playlist and the running totals."""
+        in_sync = self._totals_in_sync()
+        song_id = self.playlist[playlist_index]
+        del self.playlist[playlist_index]
+        if in_sync:
+            self._totals.remove(song_id)
+            self._mark_totals_in_sync()
+        if self._shuffle is not None:
+            self._shuffle.remove(song_id)
+
+    @read_locked
+    def _get_totals(self) -> PlaylistTotals:
+        """
+        Returns the running totals, rebuilding them first if the playlist changed without them.
+
+        Callers hold at least the read lock, so the playlist cannot change during a rebuild.
+        Rebuilds are serialized, so concurrent readers that find the totals out of date
+        build them once. A rebuild is only published if no song in the playlist changed in
+        the catalog while it ran; otherwise it is returned to this caller and the next
+        read rebuilds again.
+
+        Raises:
+            ValueError: If a song cannot be found in the database while rebuilding.
+            RuntimeError: If debug checks are on and the totals disagree with a full recompute.
+        """
+        if self._totals_in_sync():
+            if self.debug_checks:
+                self.check_totals()
+            return self._totals
+
+        with self._totals_rebuild_lock:
+            if self._totals_in_sync():
+                return self._totals
+
+            playlist, version = self._playlist, self._playlist.version
+            with self._songs_generation_lock:
+                generation = self._songs_generation
+            logger.info("Rebuilding the running totals of the playlist")
+            totals = PlaylistTotals(self._get_songs_from_cache_or_db(list(playlist)))
+            with self._songs_generation_lock:
+                changed = generation != self._songs_generation
+            if changed:
+                logger.info("Songs changed while the running totals were rebuilt; not keeping them")
+                return totals
+
+            self._totals = totals
+            self._totals_generation = generation
+            self._totals_playlist, self._totals_version = playlist, version
+            return totals
+
+    @read_locked
+    def check_totals(self) -> None:
+        """
+        Confirms the running totals against a full recompute from the playlist's songs.
+
+        Raises:
+            RuntimeError: If the totals disagree with the recompute.
+            ValueError: If a song cannot be found in the database.
+        """
+        expected = PlaylistTotals(self._get_songs_from_cache_or_db(list(self.playlist)))
+        if self._totals != expected or len(self._totals) != len(self.playlist):
+            logger.error(f"Running totals {self._totals!r} do not match a recompute {expected!r}")
+            raise RuntimeError("Playlist running totals are inconsistent")
+
 
     ##################################################
     # Playlist Movement Functions
     ##################################################
 
 
+    @write_locked
     def go_to_track_number(self, track_number: int) -> None:
         """Sets the current track number to the specified track number.
 
@@ -271,21 +706,71 @@ class PlaylistModel:
         logger.info(f"Setting current track number to {track_number}")
         self.current_track_number = track_number
 
+    @write_locked
     def go_to_random_track(self) -> None:
         """Sets the current track number to a randomly selected track.
 
+        In shuffle mode this is the next track of the shuffled order, so every track is
+        visited once before any repeats and no random.org value is used.
+
         Raises:
             ValueError: If the playlist is empty.
 
         """
         self.check_if_empty()
 
-        # Get a random index using the random.org API
-        random_track = get_random(self.get_playlist_length())
+        if self._shuffle is not None:
+            random_track = self._next_shuffled_track()
+            logger.info(f"Setting current track number to next shuffled track: {random_track}")
+            self.current_track_number = random_track
+            return
+
+        # Get a random index from the pooled random.org integers
+        random_track = get_pooled_random(self.get_playlist_length())
 
         logger.info(f"Setting current track number to random track: {random_track}")
         self.current_track_number = random_track
 
+    @property
+    def shuffle_enabled(self) -> bool:
+        """Whether random jumps walk a shuffled order instead of picking tracks independently."""
+        return self._shuffle is not None
+
+    @write_locked
+    def enable_shuffle(self) -> None:
+        """
+        Turns on shuffle mode with a new shuffled order of the playlist.
+
+        The order is seeded with one value from the random.org pool; every later step and
+        reshuffle uses a PRNG derived from it. Enabling shuffle again draws a new order.
+
+        Raises:
+            RuntimeError: If the random pool is empty and the request to random.org fails.
+        """
+        seed = get_pooled_random(RANDOM_POOL_RANGE)
+        self._shuffle = ShuffleOrder(self.playlist, seed)
+        logger.info(f"Enabled shuffle mode over {len(self._shuffle)} songs")
+
+    @write_locked
+    def disable_shuffle(self) -> None:
+        """Turns off shuffle mode, so random jumps pick any track again."""
+        self._shuffle = None
+        logger.info("Disabled shuffle mode")
+
+    def _next_shuffled_track(self) -> int:
+        """Steps the shuffled order and returns the track number of the song it lands on.
+
+        Callers hold the write lock. If the playlist was edited without going through this
+        model's methods, the order is reshuffled from the current playlist first.
+        """
+        song_id = self._shuffle.next()
+        if len(self._shuffle) != len(self.playlist) or song_id not in self.playlist:
+            logger.warning("Shuffle order is out of date with the playlist; reshuffling")
+            self._shuffle.reset(self.playlist)
+            song_id = self._shuffle.next()
+        return self.playlist.index(song_id) + 1
+
+    @write_locked
     def move_song_to_beginning(self, song_id: int) -> None:
         """Moves a song to the beginning of the playlist.
 
@@ -300,11 +785,16 @@ class PlaylistModel:
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
 
+        self._write_through(Playlists.move_song, self.playlist.index(song_id) + 1, 1)
+        in_sync = self._totals_in_sync()
         self.playlist.remove(song_id)
         self.playlist.insert(0, song_id)
+        if in_sync:
+            self._mark_totals_in_sync()
 
         logger.info(f"Successfully moved song with ID {song_id} to the beginning")
 
+    @write_locked
     def move_song_to_end(self, song_id: int) -> None:
         """Moves a song to the end of the playlist.
 
@@ -319,11 +809,16 @@ class PlaylistModel:
         self.check_if_empty()
         song_id = self.validate_song_id(song_id)
 
+        self._write_through(Playlists.move_song, self.playlist.index(song_id) + 1, len(self.playlist))
+        in_sync = self._totals_in_sync()
         self.playlist.remove(song_id)
         self.playlist.append(song_id)
+        if in_sync:
+            self._mark_totals_in_sync()
 
         logger.info(f"Successfully moved song with ID {song_id} to the end")
 
+    @write_locked
     def move_song_to_track_number(self, song_id: int, track_number: int) -> None:
         """Moves a song to a specific track number in the playlist.
 
@@ -342,11 +837,16 @@ class PlaylistModel:
 
         playlist_index = track_number - 1
 
+        self._write_through(Playlists.move_song, self.playlist.index(song_id) + 1, track_number)
+        in_sync = self._totals_in_sync()
         self.playlist.remove(song_id)
         self.playlist.insert(playlist_index, song_id)
+        if in_sync:
+            self._mark_totals_in_sync()
 
         logger.info(f"Successfully moved song with ID {song_id} to track number {track_number}")
 
+    @write_locked
     def swap_songs_in_playlist(self, song1_id: int, song2_id: int) -> None:
         """Swaps the positions of two songs in the playlist.
 
@@ -367,9 +867,13 @@ class PlaylistModel:
             logger.error(f"Cannot swap a song with itself: {song1_id}")
             raise ValueError(f"Cannot swap a song with itself: {song1_id}")
 
-        index1, index2 = self.playlist.index(song1_id), self.playlist.index(song2_id)
-
-        self.playlist[index1], self.playlist[index2] = self.playlist[index2], self.playlist[index1]
+        self._write_through(
+            Playlists.swap_positions, self.playlist.index(song1_id) + 1, self.playlist.index(song2_id) + 1
+        )
+        in_sync = self._totals_in_sync()
+        self.playlist.swap(song1_id, song2_id)
+        if in_sync:
+            self._mark_totals_in_sync()
 
         logger.info(f"Successfully swapped songs with IDs {song1_id} and {song2_id}")
 
@@ -386,47 +890,73 @@ class PlaylistModel:
             ValueError: If the playlist is empty.
 
         """
-        self.check_if_empty()
-        current_song = self.get_song_by_track_number(self.current_track_number)
-
-        logger.info(f"Playing song: {current_song.title} (ID: {current_song.id}) at track number: {self.current_track_number}")
-        current_song.update_play_count()
-        logger.info(f"Updated play count for song: {current_song.title} (ID: {current_song.id})")
-
-        self.current_track_number = (self.current_track_number % self.get_playlist_length()) + 1
-        logger.info(f"Advanced to track number: {self.current_track_number}")
+        with self._lock.write():
+            self.check_if_empty()
+            track_number = self.current_track_number
+            current_song = self.get_song_by_track_number(track_number)
+            self.current_track_number = (track_number % self.get_playlist_length()) + 1
+            next_track_number = self.current_track_number
+
+        logger.info(f"Playing song: {current_song.title} (ID: {current_song.id}) at track number: {track_number}")
+        # Recording may flush to the DB, so it happens outside the lock
+        self._record_play(current_song)
+        logger.info(f"Advanced to track number: {next_track_number}")
 
     def play_entire_playlist(self) -> None:
         """Plays all songs in the playlist from the beginning.
 
+        The track range is read and the current track moved under the lock; the songs
+        are then looked up with one batched query and their plays recorded outside it,
+        so recording, which may flush to the DB, does not hold up other requests.
+
         Raises:
             ValueError: If the playlist is empty.
 
         """
-        self.check_if_empty()
-        logger.info("Starting to play the entire playlist.")
+        with self._lock.write():
+            self.check_if_empty()
+            logger.info("Starting to play the entire playlist.")
+            song_ids = self.playlist.to_list()
+            # Playing through the last track wraps back to the first
+            self.current_track_number = 1
 
-        self.current_track_number = 1
-        for _ in range(self.get_playlist_length()):
-            self.play_current_song()
+        for song in self._get_songs_from_cache_or_db(song_ids):
+            self._record_play(song)
 
         logger.info("Finished playing the entire playlist.")
 
     def play_rest_of_playlist(self) -> None:
         """Plays the remaining songs in the playlist from the current track onward.
 
+        The track range is read and the current track moved under the lock; the songs
+        are then looked up with one batched query and their plays recorded outside it.
+
         Raises:
             ValueError: If the playlist is empty.
 
         """
-        self.check_if_empty()
-        logger.info(f"Playing the rest of the playlist from track number: {self.current_track_number}")
+        with self._lock.write():
+            self.check_if_empty()
+            logger.info(f"Playing the rest of the playlist from track number: {self.current_track_number}")
+            song_ids = self.playlist.to_list()[self.current_track_number - 1:]
+            # Playing through the last track wraps back to the first
+            self.current_track_number = 1
 
-        for _ in range(self.get_playlist_length() - self.current_track_number + 1):
-            self.play_current_song()
+        for song in self._get_songs_from_cache_or_db(song_ids):
+            self._record_play(song)
 
         logger.info("Finished playing the rest of the playlist.")
 
+    def _record_play(self, song: SongSnapshot) -> None:
+        """Counts a play of a song and, where configured, adds it to trending and the play history."""
+        self.play_count_buffer.record(song.id)
+        if self.trending is not None:
+            self.trending.record(song.id)
+        if self.play_log is not None:
+            self.play_log.record(song.id, self.user_id)
+        logger.info(f"Recorded play for song: {song.title} (ID: {song.id})")
+
+    @write_locked
     def rewind_playlist(self) -> None:
         """Resets the playlist to the first track.
 
@@ -451,6 +981,7 @@ class PlaylistModel:
     #
     ####################################################################################################
 
+    @read_locked
     def validate_song_id(self, song_id: int, check_in_playlist: bool = True) -> int:
         """
         Validates the given song ID.
@@ -488,6 +1019,7 @@ class PlaylistModel:
 
         return song_id
 
+    @read_locked
     def validate_track_number(self, track_number: int) -> int:
         """
         Validates the given track number, ensuring it is within the playlist's range.
@@ -512,6 +1044,7 @@ class PlaylistModel:
 
         return track_number
 
+    @read_locked
     def check_if_empty(self) -> None:
         """
         Checks if the playlist is empty and raises a ValueError if it is.
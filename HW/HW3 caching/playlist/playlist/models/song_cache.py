@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+from typing import Iterable, List, Optional
+
+from playlist.models.song_model import Songs
+from playlist.models.song_snapshot import SongSnapshot
+from playlist.signals import play_counts_updated, songs_created, songs_deleted, songs_reset, songs_updated
+from playlist.utils.cache import TTLCache
+from playlist.utils.logger import configure_logger
+from playlist.utils.shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+def dump_song(song: SongSnapshot) -> str:
+    """Serializes a song as a compact JSON array for the shared cache."""
+    return json.dumps(song.to_row(), separators=(",", ":"))
+
+
+def load_song(data: str) -> SongSnapshot:
+    """Rebuilds a song snapshot from a shared cache record."""
+    return SongSnapshot.from_row(json.loads(data))
+
+
+class SongCache:
+    """
+    The process-wide cache of catalog songs used by every playlist.
+
+    Songs are held as immutable SongSnapshot values. One instance is shared by all
+    PlaylistModel instances in a worker so that each song is cached once, however
+    many playlists contain it.
+
+    """
+
+    def __init__(self, shared_cache: Optional[SharedCache] = None):
+        """Initializes empty song caches and subscribes them to catalog change signals.
+
+        The TTL (Time To Live) for song caching is set to a default value from the environment variable "TTL",
+        which defaults to 60 seconds if not set. The cache holds at most "CACHE_MAX_ENTRIES" songs
+        (default 10000) and evicts the least recently used song once full. Concurrent misses for
+        the same song share a single load, and for "CACHE_STALE_SECONDS" (default 5) after an
+        entry expires, callers are served the old copy while one of them refreshes it.
+
+        IDs that are not in the catalog are remembered in a separate negative cache for
+        "NEGATIVE_CACHE_TTL" seconds (default 10), holding at most "NEGATIVE_CACHE_MAX_ENTRIES"
+        IDs (default 10000), so repeated lookups of unknown IDs do not reach the database.
+
+        When a shared cache is given it sits between the in-process cache and the database,
+        and invalidations it receives from other workers are applied to the in-process cache.
+        Cached songs are invalidated whenever the catalog signals that they were created,
+        updated, deleted or played, so the TTL only bounds staleness from outside writers.
+
+        Args:
+            shared_cache (SharedCache, optional): A cache tier shared with other worker processes.
+
+        """
+        self.ttl_seconds = int(os.getenv("TTL", 60))  # Default TTL is 60 seconds
+        self.max_entries = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+        self.stale_seconds = float(os.getenv("CACHE_STALE_SECONDS", 5))
+        self.songs = TTLCache(
+            max_entries=self.max_entries,
+            ttl_seconds=self.ttl_seconds,
+            stale_seconds=self.stale_seconds
+        )
+        self.negative_ttl_seconds = float(os.getenv("NEGATIVE_CACHE_TTL", 10))
+        self.negative_max_entries = int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", 10000))
+        self.missing = TTLCache(
+            max_entries=self.negative_max_entries,
+            ttl_seconds=self.negative_ttl_seconds
+        )
+        self.shared = shared_cache
+        if shared_cache is not None:
+            shared_cache.subscribe(self._apply_remote_invalidation)
+
+        songs_created.connect(self._on_songs_changed)
+        songs_updated.connect(self._on_songs_changed)
+        songs_deleted.connect(self._on_songs_changed)
+        play_counts_updated.connect(self._on_play_counts_updated)
+        songs_reset.connect(self._on_songs_reset)
+
+    def get_song(self, song_id: int) -> SongSnapshot:
+        """
+        Retrieves a song by ID, using the internal cache if possible.
+
+        This method checks whether a cached version of the song is available
+        and still valid, first in process and then in the shared cache. If not, it queries
+        the database, updates both caches, and returns the song.
+
+        Concurrent callers that miss on the same song wait for a single load instead of
+        each querying the database. IDs recently found missing fail without a query.
+
+        Args:
+            song_id (int): The unique ID of the song to retrieve.
+
+        Returns:
+            SongSnapshot: The song corresponding to the given ID.
+
+        Raises:
+            ValueError: If the song cannot be found in the database.
+        """
+        if self.missing.get(song_id) is not None:
+            logger.debug(f"Song ID {song_id} is in the negative cache")
+            raise ValueError(f"Song ID {song_id} not found in database")
+
+        return self.songs.get_or_load(song_id, lambda: self._load_song(song_id))
+
+    def _load_song(self, song_id: int) -> SongSnapshot:
+        """Loads a song missing from the in-process cache from the shared cache or the database."""
+        if self.shared is not None:
+            song = self.shared.get(song_id)
+            if song is not None:
+                logger.debug(f"Song ID {song_id} retrieved from shared cache")
+                return song
+
+        # A song changed while the query runs must not be published to other workers,
+        # and one created meanwhile must not be remembered as missing
+        with self.songs.batch_load() as store_song, self.missing.batch_load() as store_missing:
+            try:
+                song = SongSnapshot.from_song(Songs.get_song_by_id(song_id))
+                logger.info(f"Song ID {song_id} loaded from DB")
+            except ValueError as e:
+                logger.error(f"Song ID {song_id} not found in DB: {e}")
+                store_missing(song_id, True)
+                raise ValueError(f"Song ID {song_id} not found in database") from e
+
+            if store_song(song_id, song) and self.shared is not None:
+                self.shared.set(song_id, song)
+        return song
+
+    def get_songs(self, song_ids: List[int]) -> List[SongSnapshot]:
+        """
+        Retrieves many songs by ID, loading every cache miss with one batched query.
+
+        Cache hits are served directly. Misses are looked up in the shared cache with one
+        round trip, and all remaining IDs are fetched together through Songs.get_song_snapshots_by_ids
+        and written back to both caches.
+
+        Args:
+            song_ids (List[int]): The IDs of the songs to retrieve, in the order wanted.
+
+        Returns:
+            List[SongSnapshot]: The songs corresponding to the given IDs, in the same order.
+
+        Raises:
+            ValueError: If any of the songs cannot be found in the database.
+        """
+        found = {}
+        missing = []
+        for song_id in dict.fromkeys(song_ids):
+            song = self.songs.get(song_id)
+            if song is not None:
+                found[song_id] = song
+            else:
+                missing.append(song_id)
+
+        known_missing = [song_id for song_id in missing if self.missing.get(song_id) is not None]
+        if known_missing:
+            logger.error(f"Song IDs {known_missing} are in the negative cache")
+            raise ValueError(f"Song ID {known_missing[0]} not found in database")
+
+        if missing:
+            # Songs invalidated while they are being loaded are returned but not cached, and
+            # IDs invalidated while they are being looked up are not remembered as missing
+            with self.songs.batch_load() as store_song, self.missing.batch_load() as store_missing:
+                if self.shared is not None:
+                    shared = self.shared.get_many(missing)
+                    for song_id, song in shared.items():
+                        store_song(song_id, song)
+                    found.update(shared)
+                    missing = [song_id for song_id in missing if song_id not in shared]
+
+                if missing:
+                    loaded = Songs.get_song_snapshots_by_ids(missing)
+                    logger.info(f"Loaded {len(loaded)} songs from DB for {len(missing)} cache misses")
+
+                    not_found = [song_id for song_id in missing if song_id not in loaded]
+                    if not_found:
+                        logger.error(f"Song IDs {not_found} not found in DB")
+                        for song_id in not_found:
+                            store_missing(song_id, True)
+                        raise ValueError(f"Song ID {not_found[0]} not found in database")
+
+                    stored = {song_id: song for song_id, song in loaded.items() if store_song(song_id, song)}
+                    if stored and self.shared is not None:
+                        self.shared.set_many(stored)
+                    found.update(loaded)
+
+        return [found[song_id] for song_id in song_ids]
+
+    def invalidate(self, song_ids: Iterable[int]) -> None:
+        """
+        Drops songs from the in-process cache and, if configured, from the shared cache
+        of every worker.
+
+        Args:
+            song_ids (Iterable[int]): The IDs of the songs that changed or were deleted.
+        """
+        song_ids = list(song_ids)
+        for song_id in song_ids:
+            self.songs.invalidate(song_id)
+            self.missing.invalidate(song_id)
+        if self.shared is not None:
+            self.shared.invalidate(*song_ids)
+        logger.info(f"Invalidated cached song IDs {song_ids}")
+
+    def clear(self) -> None:
+        """
+        Drops every song from the in-process cache and, if configured, from the shared cache
+        of every worker.
+        """
+        self.songs.clear()
+        self.missing.clear()
+        if self.shared is not None:
+            self.shared.clear()
+        logger.info("Cleared the song cache")
+
+    def get_stats(self) -> dict:
+        """
+        Returns hit, miss, eviction and expiration counters for the song cache.
+
+        Counters for the negative cache of unknown IDs are included under "negative", and
+        for the shared cache, if configured, under "shared".
+
+        Returns:
+            dict: The song cache statistics.
+        """
+        stats = self.songs.stats()
+        stats["negative"] = self.missing.stats()
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        logger.info(f"Retrieving song cache stats: {stats}")
+        return stats
+
+    def _on_songs_changed(self, sender, song_ids: Optional[List[int]] = None) -> None:
+        # Created songs are invalidated too: SQLite reuses the IDs of deleted rows
+        if song_ids is None:
+            self.clear()
+        else:
+            self.invalidate(song_ids)
+
+    def _on_play_counts_updated(self, sender, increments: dict) -> None:
+        self.invalidate(increments)
+
+    def _on_songs_reset(self, sender) -> None:
+        self.clear()
+
+    def _apply_remote_invalidation(self, song_ids: Optional[List[int]]) -> None:
+        """Applies an invalidation published by any worker to the in-process cache."""
+        if song_ids is None:
+            self.songs.clear()
+            self.missing.clear()
+            return
+        for song_id in song_ids:
+            self.songs.invalidate(song_id)
+            self.missing.invalidate(song_id)
@@ -1,15 +1,78 @@
 import logging
+import os
+import re
+from typing import Iterator, Optional
 
+from sqlalchemy import and_, bindparam, event, func, or_, select, text, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from playlist.db import db
+from playlist.models.catalog_changes_model import CatalogChanges
+from playlist.models.song_snapshot import SongSnapshot
+from playlist.signals import play_counts_updated, songs_created, songs_deleted, songs_reset, songs_updated
+from playlist.utils.alias_sampler import LazyAliasSampler
 from playlist.utils.logger import configure_logger
-from playlist.utils.api_utils import get_random
+from playlist.utils.api_utils import get_pooled_random, random_pool
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# Older SQLite builds cap bound parameters per statement at 999
+SQLITE_MAX_IN_PARAMS = 500
+
+# External-content FTS5 index over the searchable song columns, kept in sync by triggers.
+# Only artist, title and genre changes touch the index, so play count updates stay cheap.
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5(
+        artist, title, genre,
+        content='Songs', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS songs_fts_insert AFTER INSERT ON Songs BEGIN
+        INSERT INTO songs_fts(rowid, artist, title, genre) VALUES (new.id, new.artist, new.title, new.genre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS songs_fts_delete AFTER DELETE ON Songs BEGIN
+        INSERT INTO songs_fts(songs_fts, rowid, artist, title, genre)
+        VALUES ('delete', old.id, old.artist, old.title, old.genre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS songs_fts_update AFTER UPDATE OF artist, title, genre ON Songs BEGIN
+        INSERT INTO songs_fts(songs_fts, rowid, artist, title, genre)
+        VALUES ('delete', old.id, old.artist, old.title, old.genre);
+        INSERT INTO songs_fts(rowid, artist, title, genre) VALUES (new.id, new.artist, new.title, new.genre);
+    END""",
+]
+
+# ID draws that may land on deleted rows before get_random_song falls back to picking by position
+RANDOM_SONG_MAX_PROBES = 4
+
+# Positions drawn by that fallback before giving up on a catalog that keeps shrinking under it
+RANDOM_SONG_MAX_REDRAWS = 3
+
+# bm25() column weights for (artist, title, genre): title matches rank highest
+SEARCH_BM25_WEIGHTS = (5.0, 10.0, 1.0)
+
+
+def validate_song_fields(artist: str, title: str, year: int, genre: str, duration: int) -> None:
+    """Validates the fields of a song.
+
+    Kept separate from Songs.validate so callers can check raw values (for example in
+    bulk ingest worker processes) without building ORM instances.
+
+    Raises:
+        ValueError: If any required fields are invalid.
+    """
+    if not artist or not isinstance(artist, str):
+        raise ValueError("Artist must be a non-empty string.")
+    if not title or not isinstance(title, str):
+        raise ValueError("Title must be a non-empty string.")
+    if not isinstance(year, int) or year <= 1900:
+        raise ValueError("Year must be an integer greater than 1900.")
+    if not genre or not isinstance(genre, str):
+        raise ValueError("Genre must be a non-empty string.")
+    if not isinstance(duration, int) or duration <= 0:
+        raise ValueError("Duration must be a positive integer.")
+
 
 class Songs(db.Model):
     """Represents a song in the catalog.
@@ -31,22 +94,20 @@ class Songs(db.Model):
     duration = db.Column(db.Integer, nullable=False)
     play_count = db.Column(db.Integer, nullable=False, default=0)
 
+    __table_args__ = (
+        # Serves the leaderboard's keyset pagination on (play_count DESC, id)
+        db.Index("ix_songs_play_count_id", play_count.desc(), id),
+        # The compound key; bulk ingest resolves conflicts against it with ON CONFLICT
+        db.UniqueConstraint("artist", "title", "year", name="uq_songs_artist_title_year"),
+    )
+
     def validate(self) -> None:
         """Validates the song instance before committing to the database.
 
         Raises:
             ValueError: If any required fields are invalid.
         """
-        if not self.artist or not isinstance(self.artist, str):
-            raise ValueError("Artist must be a non-empty string.")
-        if not self.title or not isinstance(self.title, str):
-            raise ValueError("Title must be a non-empty string.")
-        if not isinstance(self.year, int) or self.year <= 1900:
-            raise ValueError("Year must be an integer greater than 1900.")
-        if not self.genre or not isinstance(self.genre, str):
-            raise ValueError("Genre must be a non-empty string.")
-        if not isinstance(self.duration, int) or self.duration <= 0:
-            raise ValueError("Duration must be a positive integer.")
+        validate_song_fields(self.artist, self.title, self.year, self.genre, self.duration)
 
     @classmethod
     def create_song(cls, artist: str, title: str, year: int, genre: str, duration: int) -> None:
@@ -87,8 +148,11 @@ class Songs(db.Model):
                 raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} already exists.")
 
             db.session.add(song)
+            db.session.flush()
+            CatalogChanges.record([song.id], "created")
             db.session.commit()
             logger.info(f"Song successfully added: {artist} - {title} ({year})")
+            songs_created.send(cls, song_ids=[song.id])
 
         except IntegrityError:
             logger.error(f"Song already exists: {artist} - {title} ({year})")
@@ -100,6 +164,72 @@ class Songs(db.Model):
             db.session.rollback()
             raise
 
+    @classmethod
+    def bulk_insert_songs(cls, rows: list[dict], on_conflict: str = "skip") -> int:
+        """
+        Inserts many already-validated songs with one executemany in a single transaction.
+
+        Rows that collide with an existing (artist, title, year) are either skipped or
+        have their genre and duration overwritten, depending on ``on_conflict``.
+
+        Args:
+            rows (list[dict]): Songs with artist, title, year, genre and duration keys.
+            on_conflict (str): "skip" to keep the existing song, or "upsert" to update it.
+
+        Returns:
+            int: The number of rows inserted or updated.
+
+        Raises:
+            ValueError: If on_conflict is not "skip" or "upsert".
+            SQLAlchemyError: For any database-related issues.
+        """
+        if on_conflict not in ("skip", "upsert"):
+            raise ValueError(f"Invalid conflict policy: {on_conflict}. Use 'skip' or 'upsert'.")
+        if not rows:
+            return 0
+
+        statement = sqlite_insert(cls.__table__)
+        conflict_key = ["artist", "title", "year"]
+        if on_conflict == "skip":
+            statement = statement.on_conflict_do_nothing(index_elements=conflict_key)
+        else:
+            statement = statement.on_conflict_do_update(
+                index_elements=conflict_key,
+                set_={"genre": statement.excluded.genre, "duration": statement.excluded.duration}
+            )
+
+        try:
+            # New rows get IDs above the current maximum, which is how the change feed finds them
+            max_id = db.session.execute(select(func.coalesce(func.max(cls.id), 0))).scalar()
+            result = db.session.execute(statement, rows)
+            if result.rowcount:
+                CatalogChanges.record_from_query(select(cls.id).where(cls.id > max_id), "created")
+                if on_conflict == "upsert":
+                    keys = [(row["artist"], row["title"], row["year"]) for row in rows]
+                    for start in range(0, len(keys), SQLITE_MAX_IN_PARAMS // 3):
+                        CatalogChanges.record_from_query(
+                            select(cls.id).where(
+                                cls.id <= max_id,
+                                tuple_(cls.artist, cls.title, cls.year).in_(
+                                    keys[start:start + SQLITE_MAX_IN_PARAMS // 3]
+                                )
+                            ),
+                            "updated"
+                        )
+            db.session.commit()
+            logger.info(f"Bulk inserted {len(rows)} songs ({result.rowcount} written, on_conflict={on_conflict})")
+            if result.rowcount:
+                # executemany does not report the affected IDs
+                songs_created.send(cls, song_ids=None)
+                if on_conflict == "upsert":
+                    songs_updated.send(cls, song_ids=None)
+            return result.rowcount
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while bulk inserting songs: {e}")
+            db.session.rollback()
+            raise
+
     @classmethod
     def delete_song(cls, song_id: int) -> None:
         """
@@ -121,8 +251,10 @@ class Songs(db.Model):
                 raise ValueError(f"Song with ID {song_id} not found")
 
             db.session.delete(song)
+            CatalogChanges.record([song_id], "deleted")
             db.session.commit()
             logger.info(f"Successfully deleted song with ID {song_id}")
+            songs_deleted.send(cls, song_ids=[song_id])
 
         except SQLAlchemyError as e:
             logger.error(f"Database error while deleting song with ID {song_id}: {e}")
@@ -160,6 +292,79 @@ class Songs(db.Model):
             logger.error(f"Database error while retrieving song by ID {song_id}: {e}")
             raise
 
+    @classmethod
+    def get_songs_by_ids(cls, song_ids: list[int]) -> dict[int, "Songs"]:
+        """
+        Retrieves many songs from the catalog with as few queries as possible.
+
+        IDs are looked up with ``WHERE id IN (...)`` in chunks of SQLITE_MAX_IN_PARAMS
+        so that a single query never exceeds SQLite's bound parameter limit.
+
+        Args:
+            song_ids (list[int]): The IDs of the songs to retrieve.
+
+        Returns:
+            dict[int, Songs]: The songs that were found, keyed by ID. IDs that do not
+                              exist in the catalog are absent from the result.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        unique_ids = list(dict.fromkeys(song_ids))
+        logger.info(f"Attempting to retrieve {len(unique_ids)} songs by ID")
+
+        songs = {}
+        try:
+            for start in range(0, len(unique_ids), SQLITE_MAX_IN_PARAMS):
+                chunk = unique_ids[start:start + SQLITE_MAX_IN_PARAMS]
+                for song in cls.query.filter(cls.id.in_(chunk)).all():
+                    songs[song.id] = song
+
+            logger.info(f"Retrieved {len(songs)} of {len(unique_ids)} requested songs")
+            return songs
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while retrieving songs by ID: {e}")
+            raise
+
+    @classmethod
+    def get_song_snapshots_by_ids(cls, song_ids: list[int]) -> dict[int, SongSnapshot]:
+        """
+        Retrieves many songs as immutable snapshots, without creating ORM instances.
+
+        Only the snapshot columns are selected, and each result row is turned straight
+        into a SongSnapshot, so nothing is added to the session's identity map. IDs are
+        looked up in chunks of SQLITE_MAX_IN_PARAMS like get_songs_by_ids.
+
+        Args:
+            song_ids (list[int]): The IDs of the songs to retrieve.
+
+        Returns:
+            dict[int, SongSnapshot]: The songs that were found, keyed by ID. IDs that do
+                                     not exist in the catalog are absent from the result.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        unique_ids = list(dict.fromkeys(song_ids))
+        logger.info(f"Attempting to retrieve {len(unique_ids)} song snapshots by ID")
+
+        table = cls.__table__
+        columns = [table.c[field] for field in SongSnapshot.__slots__]
+        snapshots = {}
+        try:
+            for start in range(0, len(unique_ids), SQLITE_MAX_IN_PARAMS):
+                chunk = unique_ids[start:start + SQLITE_MAX_IN_PARAMS]
+                for row in db.session.execute(select(*columns).where(table.c.id.in_(chunk))):
+                    snapshots[row[0]] = SongSnapshot.from_row(row)
+
+            logger.info(f"Retrieved {len(snapshots)} of {len(unique_ids)} requested song snapshots")
+            return snapshots
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while retrieving song snapshots by ID: {e}")
+            raise
+
     @classmethod
     def get_song_by_compound_key(cls, artist: str, title: str, year: int) -> "Songs":
         """
@@ -243,29 +448,357 @@ class Songs(db.Model):
             logger.error(f"Database error while retrieving all songs: {e}")
             raise
 
+    @classmethod
+    def iter_all_songs(cls, sort_by_play_count: bool = False, batch_size: int = 1000) -> Iterator[dict]:
+        """
+        Streams every song in the catalog as a dictionary without loading the whole table.
+
+        Rows are read from a cursor ``batch_size`` at a time (``yield_per``), so memory use
+        stays flat no matter how large the catalog is. No ORM objects are built.
+
+        Args:
+            sort_by_play_count (bool): If True, sort the songs by play count in descending order.
+            batch_size (int): The number of rows fetched from the database at a time.
+
+        Yields:
+            dict: One song, with the same keys as get_all_songs.
+
+        Raises:
+            SQLAlchemyError: If any database error occurs.
+        """
+        logger.info(f"Streaming all songs from the catalog (sort_by_play_count={sort_by_play_count})")
+
+        query = select(cls.id, cls.artist, cls.title, cls.year, cls.genre, cls.duration, cls.play_count)
+        if sort_by_play_count:
+            query = query.order_by(cls.play_count.desc(), cls.id)
+
+        count = 0
+        try:
+            result = db.session.execute(query.execution_options(yield_per=batch_size))
+            for row in result:
+                count += 1
+                yield dict(row._mapping)
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while streaming songs: {e}")
+            raise
+
+        logger.info(f"Streamed {count} songs from the catalog")
+
+    @classmethod
+    def get_leaderboard(
+        cls,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        min_plays: int = 0
+    ) -> tuple[list[dict], Optional[str]]:
+        """
+        Retrieves songs ordered by play count, one page at a time.
+
+        Pages are fetched with keyset pagination on (play_count DESC, id ASC), which the
+        ix_songs_play_count_id index serves directly, so a deep page costs the same as
+        the first one. Only the needed columns are selected; no ORM objects are built.
+
+        Args:
+            limit (int, optional): The maximum number of songs to return. If None, all
+                                   remaining songs are returned.
+            cursor (str, optional): The next_cursor value from the previous page.
+            min_plays (int, optional): Only include songs with at least this many plays.
+
+        Returns:
+            tuple[list[dict], Optional[str]]: The page of songs, and the cursor for the next
+                                              page (None if this is the last page).
+
+        Raises:
+            ValueError: If the limit, cursor or min_plays is invalid.
+            SQLAlchemyError: If any database error occurs.
+        """
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be a positive integer")
+        if min_plays < 0:
+            raise ValueError("min_plays must be a non-negative integer")
+
+        logger.info(f"Retrieving leaderboard page (limit={limit}, cursor={cursor}, min_plays={min_plays})")
+
+        query = select(
+            cls.id, cls.artist, cls.title, cls.year, cls.genre, cls.duration, cls.play_count
+        ).order_by(cls.play_count.desc(), cls.id)
+
+        if min_plays:
+            query = query.where(cls.play_count >= min_plays)
+
+        if cursor:
+            last_play_count, last_id = cls._decode_leaderboard_cursor(cursor)
+            # The first term bounds an index range scan; the second skips the rows already returned
+            query = query.where(and_(
+                cls.play_count <= last_play_count,
+                or_(cls.play_count < last_play_count, cls.id > last_id)
+            ))
+
+        if limit is not None:
+            query = query.limit(limit + 1)
+
+        try:
+            rows = db.session.execute(query).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while retrieving leaderboard: {e}")
+            raise
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1].play_count}:{rows[-1].id}"
+
+        results = [dict(row._mapping) for row in rows]
+        logger.info(f"Retrieved {len(results)} leaderboard entries")
+        return results, next_cursor
+
+    @classmethod
+    def search_songs(cls, query: str, limit: int = 20, offset: int = 0) -> tuple[list[dict], bool]:
+        """
+        Full-text searches the catalog by artist, title and genre.
+
+        Every word in the query must match (as a prefix) in one of the columns. Results
+        are ranked with BM25, weighting title matches over artist and artist over genre.
+
+        Args:
+            query (str): The search text.
+            limit (int): The maximum number of results to return.
+            offset (int): The number of ranked results to skip.
+
+        Returns:
+            tuple[list[dict], bool]: The matching songs, best first, and whether more
+                                     results exist past this page.
+
+        Raises:
+            ValueError: If the query has no searchable words or limit/offset are invalid.
+            SQLAlchemyError: If any database error occurs.
+        """
+        terms = re.findall(r"\w+", query or "")
+        if not terms:
+            raise ValueError("Search query must contain at least one word")
+        if limit < 1 or offset < 0:
+            raise ValueError("limit must be positive and offset must be non-negative")
+
+        # Quote each word so FTS5 operators in user input are treated as plain text
+        match = " ".join(f'"{term}"*' for term in terms)
+        logger.info(f"Searching songs for {match!r} (limit={limit}, offset={offset})")
+
+        weights = ", ".join(str(weight) for weight in SEARCH_BM25_WEIGHTS)
+        statement = text(f"""
+            SELECT s.id, s.artist, s.title, s.year, s.genre, s.duration, s.play_count
+            FROM songs_fts
+            JOIN Songs AS s ON s.id = songs_fts.rowid
+            WHERE songs_fts MATCH :match
+            ORDER BY bm25(songs_fts, {weights})
+            LIMIT :limit OFFSET :offset
+        """)
+
+        try:
+            rows = db.session.execute(statement, {"match": match, "limit": limit + 1, "offset": offset}).all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while searching songs: {e}")
+            raise
+
+        has_more = len(rows) > limit
+        results = [dict(row._mapping) for row in rows[:limit]]
+        logger.info(f"Found {len(results)} songs matching {match!r}")
+        return results, has_more
+
+    @classmethod
+    def ensure_search_index(cls) -> None:
+        """
+        Creates the full-text search index if it is missing, and fills it from the catalog.
+
+        New databases get the index when the Songs table is created. This covers databases
+        whose Songs table predates the index.
+
+        Raises:
+            SQLAlchemyError: If any database error occurs.
+        """
+        if db.engine.dialect.name != "sqlite":
+            return
+
+        with db.engine.begin() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'songs_fts'")
+            ).first()
+            if exists:
+                return
+
+            logger.info("Creating and populating the songs full-text search index")
+            _create_search_index(connection)
+            connection.execute(text("INSERT INTO songs_fts(songs_fts) VALUES ('rebuild')"))
+
+    @staticmethod
+    def _decode_leaderboard_cursor(cursor: str) -> tuple[int, int]:
+        """Parses a leaderboard cursor of the form "<play_count>:<id>"."""
+        try:
+            play_count, song_id = cursor.split(":")
+            return int(play_count), int(song_id)
+        except ValueError:
+            raise ValueError(f"Invalid leaderboard cursor: {cursor}")
+
     @classmethod
     def get_random_song(cls) -> dict:
         """
         Retrieves a random song from the catalog as a dictionary.
 
+        An ID is drawn uniformly from [min(id), max(id)] (both read from the primary key
+        index in O(1)) and fetched with a single primary key lookup. If deletes have left
+        a hole at that ID, another ID is drawn. After RANDOM_SONG_MAX_PROBES misses the
+        catalog is treated as sparse and a random position among the live rows is used
+        instead, drawn again if concurrent deletes leave it past the end. Either way every
+        live song is equally likely.
+
         Returns:
             dict: A randomly selected song dictionary.
+
+        Raises:
+            ValueError: If the song catalog is empty, or keeps shrinking during the draw.
+            SQLAlchemyError: If any database error occurs.
         """
-        all_songs = cls.get_all_songs()
+        columns = (cls.id, cls.artist, cls.title, cls.year, cls.genre, cls.duration, cls.play_count)
 
-        if not all_songs:
-            logger.warning("Cannot retrieve random song because the song catalog is empty.")
-            raise ValueError("The song catalog is empty.")
+        try:
+            min_id, max_id = db.session.execute(select(func.min(cls.id), func.max(cls.id))).one()
+            if min_id is None:
+                logger.warning("Cannot retrieve random song because the song catalog is empty.")
+                raise ValueError("The song catalog is empty.")
+
+            for _ in range(RANDOM_SONG_MAX_PROBES):
+                song_id = min_id + get_pooled_random(max_id - min_id + 1) - 1
+                row = db.session.execute(select(*columns).where(cls.id == song_id)).first()
+                if row is not None:
+                    logger.info(f"Random song ID selected: {song_id} (ID range {min_id}-{max_id})")
+                    return dict(row._mapping)
+                logger.debug(f"Random song ID {song_id} was deleted; drawing again")
+
+            # Rows deleted between the count and the OFFSET query can leave the position past
+            # the end, so the position is drawn again from a fresh count
+            for _ in range(RANDOM_SONG_MAX_REDRAWS):
+                count = db.session.execute(select(func.count()).select_from(cls)).scalar()
+                if not count:
+                    logger.warning("Cannot retrieve random song because the song catalog is empty.")
+                    raise ValueError("The song catalog is empty.")
+
+                index = get_pooled_random(count)
+                row = db.session.execute(select(*columns).order_by(cls.id).offset(index - 1).limit(1)).first()
+                if row is not None:
+                    logger.info(f"Random index selected: {index} (total songs: {count})")
+                    return dict(row._mapping)
+                logger.debug(f"Random index {index} is past the end after concurrent deletes; drawing again")
+
+            logger.warning("The song catalog kept shrinking while a random song was drawn")
+            raise ValueError("The song catalog changed while drawing a random song; please try again.")
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while retrieving a random song: {e}")
+            raise
+
+    @classmethod
+    def get_popular_random_song(cls) -> dict:
+        """
+        Retrieves a random song from the catalog, favoring songs that are played more.
 
-        index = get_random(len(all_songs))
-        logger.info(f"Random index selected: {index} (total songs: {len(all_songs)})")
+        Each song is drawn with weight ``play_count + 1``, so unplayed songs can still come
+        up. Draws come from an alias table built over every song's play count, which costs
+        one uniform value from the random pool and one primary key lookup per call. The
+        table is rebuilt on the next draw after songs are added or removed, or after play
+        counts have drifted past POPULAR_SAMPLER_DRIFT (default 0.1) of the total weight.
 
-        return all_songs[index - 1]
+        Returns:
+            dict: A randomly selected song dictionary.
+
+        Raises:
+            ValueError: If the song catalog is empty.
+            SQLAlchemyError: If any database error occurs.
+        """
+        columns = (cls.id, cls.artist, cls.title, cls.year, cls.genre, cls.duration, cls.play_count)
+
+        try:
+            for _ in range(RANDOM_SONG_MAX_PROBES):
+                song_id = popularity_sampler.sample(random_pool.uniform())
+                if song_id is None:
+                    logger.warning("Cannot retrieve popular random song because the song catalog is empty.")
+                    raise ValueError("The song catalog is empty.")
+
+                row = db.session.execute(select(*columns).where(cls.id == song_id)).first()
+                if row is not None:
+                    logger.info(f"Popularity-weighted random song ID selected: {song_id}")
+                    return dict(row._mapping)
+
+                # Deleted by another worker since the table was built
+                logger.debug(f"Popular random song ID {song_id} was deleted; rebuilding the sampler")
+                popularity_sampler.invalidate()
+
+            logger.warning("Popularity-weighted draws kept missing; falling back to a uniform draw")
+            return cls.get_random_song()
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while retrieving a popular random song: {e}")
+            raise
+
+    @classmethod
+    def _load_popularity_weights(cls) -> tuple[list[int], list[int]]:
+        """Returns every song ID and its draw weight, ``play_count + 1``."""
+        rows = db.session.execute(select(cls.id, cls.play_count)).all()
+        return [row.id for row in rows], [row.play_count + 1 for row in rows]
+
+    @classmethod
+    def increment_play_counts(cls, increments: dict[int, int]) -> None:
+        """
+        Atomically adds to the play counts of many songs in a single transaction.
+
+        Each song is updated with ``UPDATE Songs SET play_count = play_count + :n``,
+        so concurrent writers never lose increments. IDs that no longer exist are
+        skipped.
+
+        Args:
+            increments (dict[int, int]): The number of plays to add, keyed by song ID.
+
+        Raises:
+            SQLAlchemyError: If any database error occurs.
+        """
+        if not increments:
+            return
+
+        logger.info(f"Incrementing play counts for {len(increments)} songs")
+
+        table = cls.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("song_id"))
+            .values(play_count=table.c.play_count + bindparam("increment"))
+        )
+
+        try:
+            db.session.execute(statement, [
+                {"song_id": song_id, "increment": increment}
+                for song_id, increment in increments.items()
+            ])
+            song_ids = list(increments)
+            for start in range(0, len(song_ids), SQLITE_MAX_IN_PARAMS):
+                CatalogChanges.record_from_query(
+                    select(cls.id).where(cls.id.in_(song_ids[start:start + SQLITE_MAX_IN_PARAMS])),
+                    "play_count"
+                )
+            db.session.commit()
+            logger.info(f"Play counts incremented for {len(increments)} songs")
+            play_counts_updated.send(cls, increments=dict(increments))
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while incrementing play counts: {e}")
+            db.session.rollback()
+            raise
 
     def update_play_count(self) -> None:
         """
         Increments the play count of the current song instance.
 
+        The increment is applied in the database rather than read-modified-written
+        in Python, so concurrent plays are never lost.
+
         Raises:
             ValueError: If the song does not exist in the database.
             SQLAlchemyError: If any database error occurs.
@@ -273,18 +806,68 @@ class Songs(db.Model):
 
         logger.info(f"Attempting to update play count for song with ID {self.id}")
 
+        table = Songs.__table__
         try:
-            song = Songs.query.get(self.id)
-            if not song:
+            result = db.session.execute(
+                update(table)
+                .where(table.c.id == self.id)
+                .values(play_count=table.c.play_count + 1)
+            )
+            if result.rowcount == 0:
+                db.session.rollback()
                 logger.warning(f"Cannot update play count: Song with ID {self.id} not found.")
                 raise ValueError(f"Song with ID {self.id} not found")
 
-            song.play_count += 1
+            CatalogChanges.record([self.id], "play_count")
             db.session.commit()
 
             logger.info(f"Play count incremented for song with ID: {self.id}")
+            play_counts_updated.send(Songs, increments={self.id: 1})
 
         except SQLAlchemyError as e:
             logger.error(f"Database error while updating play count for song with ID {self.id}: {e}")
             db.session.rollback()
             raise
+
+
+def _create_search_index(connection) -> None:
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+
+
+@event.listens_for(Songs.__table__, "after_create")
+def _create_search_index_with_table(target, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        _create_search_index(connection)
+
+
+@event.listens_for(Songs.__table__, "before_drop")
+def _drop_search_index_with_table(target, connection, **kw) -> None:
+    # The triggers go away with the Songs table; the virtual table has to be dropped explicitly
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS songs_fts"))
+
+
+@event.listens_for(Songs.__table__, "after_drop")
+def _send_songs_reset(target, connection, **kw) -> None:
+    songs_reset.send(Songs)
+
+
+# Shared by every request in the process; see Songs.get_popular_random_song
+popularity_sampler = LazyAliasSampler(
+    Songs._load_popularity_weights,
+    drift_threshold=float(os.getenv("POPULAR_SAMPLER_DRIFT", 0.1))
+)
+
+
+@songs_created.connect
+@songs_updated.connect
+@songs_deleted.connect
+@songs_reset.connect
+def _invalidate_popularity_sampler(sender, **kwargs) -> None:
+    popularity_sampler.invalidate()
+
+
+@play_counts_updated.connect
+def _record_popularity_drift(sender, increments: dict) -> None:
+    popularity_sampler.record_drift(sum(increments.values()))
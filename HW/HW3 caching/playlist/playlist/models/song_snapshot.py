@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+
+@dataclass(frozen=True)
+class SongSnapshot:
+    """
+    An immutable, detached copy of a song's catalog row.
+
+    Snapshots are what the playlist caches hold and return. Unlike ORM instances they
+    carry no session state, never expire or detach, and can be shared freely between
+    requests and threads. ``__slots__`` is declared by hand so that instances have no
+    ``__dict__``, which keeps each cached song small.
+
+    """
+
+    __slots__ = ("id", "artist", "title", "year", "genre", "duration", "play_count")
+
+    id: int
+    artist: str
+    title: str
+    year: int
+    genre: str
+    duration: int
+    play_count: int
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "SongSnapshot":
+        """Builds a snapshot from a row whose columns are in ``__slots__`` order.
+
+        Args:
+            row (Sequence[Any]): A result row or tuple of (id, artist, title, year,
+                                 genre, duration, play_count).
+
+        Returns:
+            SongSnapshot: The snapshot.
+        """
+        return cls(*row)
+
+    @classmethod
+    def from_song(cls, song: Any) -> "SongSnapshot":
+        """Copies the catalog fields of a song object, such as a Songs ORM instance.
+
+        Args:
+            song (Any): An object with the song attributes.
+
+        Returns:
+            SongSnapshot: The snapshot.
+        """
+        if isinstance(song, cls):
+            return song
+        return cls(*(getattr(song, field) for field in cls.__slots__))
+
+    def to_row(self) -> tuple:
+        """Returns the fields as a tuple in ``__slots__`` order."""
+        return tuple(getattr(self, field) for field in self.__slots__)
@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from playlist.signals import songs_deleted, songs_reset
+from playlist.utils.logger import configure_logger
+from playlist.utils.sliding_window import SlidingWindowCounter
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Window name -> (length in seconds, number of buckets)
+TRENDING_WINDOWS: Dict[str, Tuple[int, int]] = {
+    "15m": (15 * 60, 15),
+    "1h": (60 * 60, 60),
+    "24h": (24 * 60 * 60, 96),
+}
+
+
+class TrendingSongs:
+    """
+    In-memory play counts over recent sliding windows, for ranking trending songs.
+
+    Every play is counted in each window in TRENDING_WINDOWS (the last 15 minutes, hour
+    and day) and updates that window's top songs as it goes, so asking for the trending
+    songs costs O(K log K) and never touches the catalog. Counts are per process and are
+    lost on restart; the all-time play_count column is unaffected.
+
+    """
+
+    def __init__(
+        self,
+        top_k_capacity: Optional[int] = None,
+        sketch_width: Optional[int] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        """Initializes empty windows.
+
+        The settings default to the environment variables "TRENDING_TOP_K_CAPACITY" (100
+        candidate songs per window) and "TRENDING_SKETCH_WIDTH". If the sketch width is
+        set and non-zero, counts are kept in count-min sketches of that width instead of
+        per song, so memory stays fixed however large the catalog is.
+
+        Args:
+            top_k_capacity (int, optional): How many candidate top songs each window keeps.
+            sketch_width (int, optional): Count with sketches of this width. 0 counts exactly.
+            clock (Callable[[], float], optional): Returns the current time in seconds.
+
+        """
+        self.top_k_capacity = (
+            top_k_capacity if top_k_capacity is not None else int(os.getenv("TRENDING_TOP_K_CAPACITY", 100))
+        )
+        self.sketch_width = sketch_width if sketch_width is not None else int(os.getenv("TRENDING_SKETCH_WIDTH", 0))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._windows: Dict[str, SlidingWindowCounter] = {}
+        self.clear()
+
+        songs_deleted.connect(self._on_songs_deleted)
+        songs_reset.connect(self._on_songs_reset)
+
+    @property
+    def windows(self) -> List[str]:
+        """The names of the windows, shortest first."""
+        return list(TRENDING_WINDOWS)
+
+    def record(self, song_id: int, count: int = 1) -> None:
+        """Counts plays of a song in every window.
+
+        Args:
+            song_id (int): The ID of the song that was played.
+            count (int, optional): The number of plays. Defaults to 1.
+        """
+        now = self._clock()
+        with self._lock:
+            for window in self._windows.values():
+                window.add(song_id, count, now)
+        logger.debug(f"Counted {count} trending play(s) for song ID {song_id}")
+
+    def top(self, window: str, limit: int = 10) -> List[Tuple[int, int]]:
+        """Returns the most played songs in a window.
+
+        Args:
+            window (str): The name of the window, such as "1h".
+            limit (int, optional): The maximum number of songs. Defaults to 10.
+
+        Returns:
+            List[Tuple[int, int]]: (song ID, plays) pairs, most plays first.
+
+        Raises:
+            ValueError: If the window is unknown or limit is not positive.
+        """
+        if window not in self._windows:
+            raise ValueError(f"Unknown window '{window}'; expected one of {', '.join(self.windows)}")
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+
+        now = self._clock()
+        with self._lock:
+            return self._windows[window].top(limit, now)
+
+    def forget(self, song_ids: List[int]) -> None:
+        """Drops songs' counts from every window, such as after they are deleted.
+
+        Counted with sketches, the songs only leave the rankings; see
+        SlidingWindowCounter.forget.
+        """
+        with self._lock:
+            for window in self._windows.values():
+                for song_id in song_ids:
+                    window.forget(song_id)
+
+    def clear(self) -> None:
+        """Drops every count."""
+        with self._lock:
+            self._windows = {
+                name: SlidingWindowCounter(
+                    seconds,
+                    buckets,
+                    top_k_capacity=self.top_k_capacity,
+                    sketch_width=self.sketch_width or None
+                )
+                for name, (seconds, buckets) in TRENDING_WINDOWS.items()
+            }
+        logger.info("Cleared trending play counts")
+
+    def _on_songs_deleted(self, sender, song_ids: List[int]) -> None:
+        self.forget(song_ids)
+
+    def _on_songs_reset(self, sender) -> None:
+        # Song IDs are reused after a reset
+        self.clear()
@@ -0,0 +1,279 @@
+import logging
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from playlist.db import db
+from playlist.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class StalePlaylistError(ValueError):
+    """Raised when a playlist was changed by another worker since it was loaded."""
+
+
+class PlaylistEntries(db.Model):
+    """One song in a stored playlist, at a 1-indexed position (its track number)."""
+
+    __tablename__ = "playlist_entries"
+
+    playlist_id = db.Column(db.Integer, db.ForeignKey("playlists.id", ondelete="CASCADE"), primary_key=True)
+    song_id = db.Column(db.Integer, db.ForeignKey("Songs.id"), primary_key=True)
+    position = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("playlist_id", "position", name="uq_playlist_entries_position"),
+    )
+
+
+class Playlists(db.Model):
+    """A user's playlist, stored so that any worker process can serve it.
+
+    Every change bumps ``version`` with a compare-and-set, so a worker holding an
+    older copy in memory is told to reload instead of overwriting newer changes.
+    Reorders move whole ranges of positions with a single UPDATE. The current track
+    number is playback state rather than content: it is stored without a version bump.
+    """
+
+    __tablename__ = "playlists"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), unique=True, nullable=False)
+    current_track_number = db.Column(db.Integer, nullable=False, default=1)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def load_for_user(cls, user_id: int) -> tuple[int, list[int], int, int]:
+        """
+        Loads a user's playlist, creating an empty one on first use.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            tuple[int, list[int], int, int]: The playlist ID, the song IDs in track order,
+                                             the current track number and the version.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        try:
+            row = db.session.execute(
+                select(cls.id, cls.current_track_number, cls.version).where(cls.user_id == user_id)
+            ).first()
+            if row is None:
+                playlist = cls(user_id=user_id, current_track_number=1, version=0)
+                db.session.add(playlist)
+                db.session.commit()
+                logger.info(f"Created stored playlist {playlist.id} for user {user_id}")
+                return playlist.id, [], 1, 0
+
+            song_ids = db.session.execute(
+                select(PlaylistEntries.song_id)
+                .where(PlaylistEntries.playlist_id == row.id)
+                .order_by(PlaylistEntries.position)
+            ).scalars().all()
+            logger.info(f"Loaded stored playlist {row.id} for user {user_id} ({len(song_ids)} songs, v{row.version})")
+            return row.id, list(song_ids), row.current_track_number, row.version
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while loading the playlist of user {user_id}: {e}")
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def get_version(cls, playlist_id: int) -> Optional[int]:
+        """Returns the current version of a playlist, or None if it no longer exists."""
+        return db.session.execute(select(cls.version).where(cls.id == playlist_id)).scalar()
+
+    @classmethod
+    def append_song(cls, playlist_id: int, version: int, song_id: int, position: int) -> int:
+        """Adds a song at the given position, which must be one past the last track."""
+        def apply():
+            db.session.execute(insert(PlaylistEntries).values(
+                playlist_id=playlist_id, song_id=song_id, position=position
+            ))
+        return cls._change(playlist_id, version, apply)
+
+    @classmethod
+    def insert_song(cls, playlist_id: int, version: int, song_id: int, position: int) -> int:
+        """Inserts a song at a position, shifting that track and every later one down by one."""
+        def apply():
+            cls._shift(playlist_id, position, None, 1)
+            db.session.execute(insert(PlaylistEntries).values(
+                playlist_id=playlist_id, song_id=song_id, position=position
+            ))
+        return cls._change(playlist_id, version, apply)
+
+    @classmethod
+    def remove_at(cls, playlist_id: int, version: int, position: int) -> int:
+        """Removes the song at a position and closes the gap with one bulk UPDATE."""
+        def apply():
+            db.session.execute(delete(PlaylistEntries).where(
+                PlaylistEntries.playlist_id == playlist_id, PlaylistEntries.position == position
+            ))
+            cls._shift(playlist_id, position + 1, None, -1)
+        return cls._change(playlist_id, version, apply)
+
+    @classmethod
+    def move_song(cls, playlist_id: int, version: int, from_position: int, to_position: int) -> int:
+        """Moves the song at one position to another, shifting the tracks in between."""
+        def apply():
+            if from_position == to_position:
+                return
+            cls._set_position(playlist_id, from_position, 0)
+            if from_position < to_position:
+                cls._shift(playlist_id, from_position + 1, to_position, -1)
+            else:
+                cls._shift(playlist_id, to_position, from_position - 1, 1)
+            cls._set_position(playlist_id, 0, to_position)
+        return cls._change(playlist_id, version, apply)
+
+    @classmethod
+    def swap_positions(cls, playlist_id: int, version: int, position_1: int, position_2: int) -> int:
+        """Exchanges the songs at two positions."""
+        def apply():
+            cls._set_position(playlist_id, position_1, 0)
+            cls._set_position(playlist_id, position_2, position_1)
+            cls._set_position(playlist_id, 0, position_2)
+        return cls._change(playlist_id, version, apply)
+
+    @classmethod
+    def replace_songs(cls, playlist_id: int, version: int, song_ids: Iterable[int]) -> int:
+        """Replaces every entry of a playlist with the given songs, in order."""
+        song_ids = list(song_ids)
+
+        def apply():
+            db.session.execute(delete(PlaylistEntries).where(PlaylistEntries.playlist_id == playlist_id))
+            if song_ids:
+                db.session.execute(insert(PlaylistEntries), [
+                    {"playlist_id": playlist_id, "song_id": song_id, "position": position}
+                    for position, song_id in enumerate(song_ids, start=1)
+                ])
+        return cls._change(playlist_id, version, apply)
+
+    @classmethod
+    def store_current_tracks(cls, current_tracks: Dict[int, int]) -> None:
+        """
+        Stores the current track number of many playlists in one transaction.
+
+        Versions are left alone, so moving through a playlist neither makes other
+        workers reload it nor conflicts with their changes.
+
+        Args:
+            current_tracks (Dict[int, int]): Maps playlist IDs to their current track numbers.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        if not current_tracks:
+            return
+        try:
+            db.session.execute(
+                update(cls.__table__)
+                .where(cls.__table__.c.id == bindparam("playlist_id"))
+                .values(current_track_number=bindparam("track_number")),
+                [
+                    {"playlist_id": playlist_id, "track_number": track_number}
+                    for playlist_id, track_number in current_tracks.items()
+                ]
+            )
+            db.session.commit()
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while storing current tracks: {e}")
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def clear_all(cls, delete_playlists: bool = False) -> None:
+        """
+        Empties every stored playlist, for use when the songs or users they refer to are reset.
+
+        Every playlist's version is bumped so that workers holding one in memory reload it.
+
+        Args:
+            delete_playlists (bool, optional): Also delete the playlists themselves, as when
+                                               the users they belong to are gone. Defaults to False.
+
+        Raises:
+            SQLAlchemyError: If a database error occurs.
+        """
+        try:
+            db.session.execute(delete(PlaylistEntries))
+            if delete_playlists:
+                db.session.execute(delete(cls))
+            else:
+                db.session.execute(update(cls).values(current_track_number=1, version=cls.version + 1))
+            db.session.commit()
+            logger.info(f"Cleared all stored playlists (deleted: {delete_playlists})")
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while clearing stored playlists: {e}")
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def _change(cls, playlist_id: int, version: int, apply, **values) -> int:
+        """
+        Applies a change in one transaction if the playlist is still at ``version``.
+
+        Returns:
+            int: The new version.
+
+        Raises:
+            StalePlaylistError: If another worker changed the playlist first.
+            SQLAlchemyError: If a database error occurs.
+        """
+        try:
+            result = db.session.execute(
+                update(cls)
+                .where(cls.id == playlist_id, cls.version == version)
+                .values(version=cls.version + 1, **values)
+            )
+            if result.rowcount == 0:
+                db.session.rollback()
+                logger.warning(f"Stored playlist {playlist_id} changed since version {version}")
+                raise StalePlaylistError("The playlist was changed by another request; please retry")
+
+            apply()
+            db.session.commit()
+            return version + 1
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while updating stored playlist {playlist_id}: {e}")
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def _set_position(playlist_id: int, position: int, new_position: int) -> None:
+        db.session.execute(
+            update(PlaylistEntries)
+            .where(PlaylistEntries.playlist_id == playlist_id, PlaylistEntries.position == position)
+            .values(position=new_position)
+        )
+
+    @staticmethod
+    def _shift(playlist_id: int, first: int, last: Optional[int], delta: int) -> None:
+        """Adds ``delta`` to every position in [first, last] (or [first, end) if last is None).
+
+        SQLite checks the position uniqueness constraint row by row, so shifting a range
+        in place could collide midway. The range is first moved to negative positions
+        and then flipped back, both as single statements.
+        """
+        in_range = [PlaylistEntries.playlist_id == playlist_id, PlaylistEntries.position >= first]
+        if last is not None:
+            in_range.append(PlaylistEntries.position <= last)
+
+        db.session.execute(
+            update(PlaylistEntries).where(*in_range).values(position=-(PlaylistEntries.position + delta))
+        )
+        db.session.execute(
+            update(PlaylistEntries)
+            .where(PlaylistEntries.playlist_id == playlist_id, PlaylistEntries.position < 0)
+            .values(position=-PlaylistEntries.position)
+        )
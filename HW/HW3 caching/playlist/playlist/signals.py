@@ -0,0 +1,26 @@
+"""Change events for the song catalog.
+
+Every signal is sent by the Songs model after its transaction commits, with the
+Songs class as the sender. Receivers such as the playlist song cache use them to
+invalidate or update what they hold.
+
+Signals:
+    songs_created: ``song_ids`` (list[int] or None) - new songs. None means the IDs are
+                   not known, as after a bulk insert.
+    songs_updated: ``song_ids`` (list[int] or None) - songs whose fields were overwritten.
+                   None means the IDs are not known, as after a bulk upsert.
+    songs_deleted: ``song_ids`` (list[int]) - songs removed from the catalog.
+    play_counts_updated: ``increments`` (dict[int, int]) - plays added, keyed by song ID.
+    songs_reset: no arguments - the Songs table was dropped, so every song is gone.
+
+"""
+from blinker import Namespace
+
+
+_signals = Namespace()
+
+songs_created = _signals.signal("songs-created")
+songs_updated = _signals.signal("songs-updated")
+songs_deleted = _signals.signal("songs-deleted")
+play_counts_updated = _signals.signal("play-counts-updated")
+songs_reset = _signals.signal("songs-reset")
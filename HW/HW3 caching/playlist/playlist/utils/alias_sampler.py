@@ -0,0 +1,164 @@
+import logging
+import threading
+from typing import Callable, Generic, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+from playlist.utils.logger import configure_logger
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+K = TypeVar("K", bound=Hashable)
+
+
+class AliasTable:
+    """
+    A Walker/Vose alias table for drawing indices in proportion to fixed weights.
+
+    Building the table is O(n). Each draw is O(1) and needs a single uniform value:
+    its whole part picks a column and its fractional part decides between the column
+    and its alias.
+
+    """
+
+    __slots__ = ("_probability", "_alias")
+
+    def __init__(self, weights: Sequence[float]):
+        """Builds the table with Vose's method.
+
+        Args:
+            weights (Sequence[float]): The non-negative weight of each index.
+
+        Raises:
+            ValueError: If there are no weights, any weight is negative, or they sum to zero.
+        """
+        n = len(weights)
+        if n == 0:
+            raise ValueError("Cannot build an alias table without weights")
+        if any(weight < 0 for weight in weights):
+            raise ValueError("Weights must not be negative")
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("Weights must not all be zero")
+
+        probability = [0.0] * n
+        alias = list(range(n))
+        scaled = [weight * n / total for weight in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+
+        # Whatever is left is 1 up to rounding error
+        for i in small + large:
+            probability[i] = 1.0
+
+        self._probability = probability
+        self._alias = alias
+
+    def __len__(self) -> int:
+        return len(self._probability)
+
+    def sample(self, uniform: float) -> int:
+        """Returns an index drawn in proportion to its weight.
+
+        Args:
+            uniform (float): A uniform random value in [0, 1).
+
+        Returns:
+            int: The drawn index.
+        """
+        scaled = uniform * len(self._probability)
+        column = min(int(scaled), len(self._probability) - 1)
+        return column if scaled - column < self._probability[column] else self._alias[column]
+
+
+class LazyAliasSampler(Generic[K]):
+    """
+    Draws keys in proportion to weights that change slowly, such as play counts.
+
+    The keys and weights come from ``loader``, and an alias table is built from them on
+    the first draw. Callers report weight changes with ``record_drift``. Once the total
+    change since the last build passes ``drift_threshold`` times the total weight at
+    that build, the next draw rebuilds the table. ``invalidate`` forces a rebuild, for
+    changes such as keys being added or removed. Draws between rebuilds are O(1).
+
+    """
+
+    def __init__(self, loader: Callable[[], Tuple[List[K], List[float]]], drift_threshold: float = 0.1):
+        """Initializes the sampler without loading anything.
+
+        Args:
+            loader (Callable): Returns the keys and their weights, in matching order.
+            drift_threshold (float, optional): The fraction of the total weight that may
+                                               change before the table is rebuilt.
+        """
+        self._loader = loader
+        self.drift_threshold = drift_threshold
+        self._lock = threading.Lock()
+        # (keys, table, total weight) is replaced as a whole, so draws never see a half-built table
+        self._state: Optional[Tuple[List[K], Optional[AliasTable], float]] = None
+        self._drift = 0.0
+
+        self.builds = 0
+        self.draws = 0
+
+    def invalidate(self) -> None:
+        """Makes the next draw rebuild the table."""
+        with self._lock:
+            self._state = None
+
+    def record_drift(self, amount: float) -> None:
+        """Records that the weights changed by ``amount`` in total since the last build."""
+        with self._lock:
+            self._drift += abs(amount)
+            if self._state is not None and self._drift > self.drift_threshold * self._state[2]:
+                logger.info(f"Weights drifted by {self._drift} since the last build; rebuilding on the next draw")
+                self._state = None
+
+    def sample(self, uniform: float) -> Optional[K]:
+        """Returns a key drawn in proportion to its weight, or None if there are no keys.
+
+        Args:
+            uniform (float): A uniform random value in [0, 1).
+        """
+        state = self._state
+        if state is None:
+            state = self._build()
+
+        keys, table, _ = state
+        self.draws += 1
+        if table is None:
+            return None
+        return keys[table.sample(uniform)]
+
+    def stats(self) -> dict:
+        """Returns the table size, drift and build and draw counters."""
+        state = self._state
+        return {
+            "size": len(state[0]) if state is not None else 0,
+            "built": state is not None,
+            "drift": self._drift,
+            "drift_threshold": self.drift_threshold,
+            "builds": self.builds,
+            "draws": self.draws,
+        }
+
+    def _build(self) -> Tuple[List[K], Optional[AliasTable], float]:
+        with self._lock:
+            # Another thread may have rebuilt while this one waited
+            if self._state is not None:
+                return self._state
+
+            keys, weights = self._loader()
+            table = AliasTable(weights) if keys else None
+            self._state = (keys, table, float(sum(weights)))
+            self._drift = 0.0
+            self.builds += 1
+            logger.info(f"Built alias table over {len(keys)} keys")
+            return self._state
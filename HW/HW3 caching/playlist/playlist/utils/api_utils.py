@@ -1,5 +1,10 @@
 import logging
 import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
 import requests
 
 from playlist.utils.logger import configure_logger
@@ -8,6 +13,12 @@ from playlist.utils.logger import configure_logger
 RANDOM_ORG_BASE_URL = os.getenv("RANDOM_ORG_BASE_URL",
                                 "https://www.random.org/integers/?num=1&min=1&col=1&base=10&format=plain&rnd=new")
 
+# Bulk draws of uniform integers in [0, RANDOM_POOL_RANGE) for RandomPool
+RANDOM_POOL_RANGE = 1_000_000_000
+RANDOM_ORG_POOL_URL = os.getenv("RANDOM_ORG_POOL_URL",
+                                f"https://www.random.org/integers/?min=0&max={RANDOM_POOL_RANGE - 1}"
+                                "&col=1&base=10&format=plain&rnd=new")
+
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
@@ -58,3 +69,200 @@ def get_random(max: int) -> int:
     except requests.exceptions.RequestException as e:
         logger.error(f"Request to random.org failed: {e}")
         raise RuntimeError(f"Request to random.org failed: {e}")
+
+
+class RandomPool:
+    """
+    A pool of random integers fetched from random.org in bulk.
+
+    Each request to random.org returns ``batch_size`` integers drawn uniformly from
+    [0, RANDOM_POOL_RANGE). Draws for a given ``max`` are mapped onto [1, max] by rejection
+    sampling, so there is no modulo bias. When the pool drops below ``low_water`` it is
+    refilled on a background thread, so requests only wait on random.org if the pool
+    runs completely dry.
+
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, low_water: Optional[int] = None):
+        """Initializes an empty pool.
+
+        The sizes default to the environment variables "RANDOM_POOL_BATCH_SIZE" (1000)
+        and "RANDOM_POOL_LOW_WATER" (200).
+
+        Args:
+            batch_size (int, optional): How many integers to fetch per request to random.org.
+            low_water (int, optional): Start a background refill below this many integers.
+
+        """
+        self.batch_size = batch_size if batch_size is not None else int(os.getenv("RANDOM_POOL_BATCH_SIZE", 1000))
+        self.low_water = low_water if low_water is not None else int(os.getenv("RANDOM_POOL_LOW_WATER", 200))
+
+        self._values: deque = deque()
+        self._lock = threading.Lock()
+        self._refill_lock = threading.Lock()
+        self._refilling = False
+
+        self.refills = 0
+        self.failed_refills = 0
+        self.values_served = 0
+        self.values_discarded = 0
+        self.last_refill_seconds = 0.0
+        self.total_refill_seconds = 0.0
+
+    def get_random(self, max: int) -> int:
+        """Returns a random integer between 1 and max inclusive.
+
+        Args:
+            max (int): The upper bound (inclusive) for the random number.
+
+        Returns:
+            int: A random number between 1 and max.
+
+        Raises:
+            ValueError: If max is out of range or random.org returns an invalid response.
+            RuntimeError: If the pool is empty and the request to random.org fails.
+        """
+        if max < 1:
+            raise ValueError("max must be at least 1")
+        if max > RANDOM_POOL_RANGE:
+            raise ValueError(f"max must be at most {RANDOM_POOL_RANGE}")
+
+        # Values at or above the largest multiple of max would make low results more likely
+        limit = RANDOM_POOL_RANGE - RANDOM_POOL_RANGE % max
+        while True:
+            value = self._take()
+            if value < limit:
+                return value % max + 1
+            with self._lock:
+                self.values_discarded += 1
+
+    def uniform(self) -> float:
+        """Returns a random float in [0, 1) built from one pooled integer.
+
+        Raises:
+            ValueError: If random.org returns an invalid response.
+            RuntimeError: If the pool is empty and the request to random.org fails.
+        """
+        return self._take() / RANDOM_POOL_RANGE
+
+    def refill(self) -> None:
+        """Fetches one batch of integers from random.org and adds it to the pool.
+
+        Raises:
+            ValueError: If the response from random.org is not a list of integers.
+            RuntimeError: If the request to random.org fails.
+        """
+        with self._refill_lock:
+            self._fetch()
+
+    def stats(self) -> dict:
+        """Returns the pool depth and refill counters and latency.
+
+        Returns:
+            dict: Random pool statistics.
+        """
+        with self._lock:
+            return {
+                "depth": len(self._values),
+                "batch_size": self.batch_size,
+                "low_water": self.low_water,
+                "refills": self.refills,
+                "failed_refills": self.failed_refills,
+                "values_served": self.values_served,
+                "values_discarded": self.values_discarded,
+                "last_refill_seconds": self.last_refill_seconds,
+                "average_refill_seconds": self.total_refill_seconds / self.refills if self.refills else 0.0,
+            }
+
+    def _take(self) -> int:
+        while True:
+            with self._lock:
+                if self._values:
+                    value = self._values.popleft()
+                    self.values_served += 1
+                    if len(self._values) < self.low_water and not self._refilling:
+                        self._refilling = True
+                        threading.Thread(target=self._background_refill, daemon=True).start()
+                    return value
+
+            # The pool is dry: wait for random.org on the request path, unless a refill
+            # that finished while this thread waited for the lock has already filled it
+            with self._refill_lock:
+                with self._lock:
+                    if self._values:
+                        continue
+                self._fetch()
+
+    def _fetch(self) -> None:
+        # Callers hold _refill_lock
+        url = f"{RANDOM_ORG_POOL_URL}&num={self.batch_size}"
+        logger.info(f"Refilling random pool from {url}")
+        start = time.monotonic()
+
+        try:
+            response = requests.get(url, timeout=5)
+            response.raise_for_status()
+
+        except requests.exceptions.Timeout:
+            self._record_failed_refill()
+            logger.error("Request to random.org timed out.")
+            raise RuntimeError("Request to random.org timed out.")
+
+        except requests.exceptions.RequestException as e:
+            self._record_failed_refill()
+            logger.error(f"Request to random.org failed: {e}")
+            raise RuntimeError(f"Request to random.org failed: {e}")
+
+        try:
+            values = [int(line) for line in response.text.split()]
+            if not values:
+                raise ValueError("no integers returned")
+
+        except ValueError:
+            self._record_failed_refill()
+            logger.error(f"Invalid response from random.org: {response.text[:100]}")
+            raise ValueError(f"Invalid response from random.org: {response.text[:100]}")
+
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self._values.extend(values)
+            self.refills += 1
+            self.last_refill_seconds = elapsed
+            self.total_refill_seconds += elapsed
+
+        logger.info(f"Added {len(values)} random integers to the pool in {elapsed:.3f}s")
+
+    def _record_failed_refill(self) -> None:
+        with self._lock:
+            self.failed_refills += 1
+
+    def _background_refill(self) -> None:
+        try:
+            self.refill()
+        except (RuntimeError, ValueError) as e:
+            logger.warning(f"Background refill of the random pool failed: {e}")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+
+random_pool = RandomPool()
+
+
+def get_pooled_random(max: int) -> int:
+    """
+    Returns a random integer between 1 and max inclusive from the shared random.org pool.
+
+    Unlike get_random this rarely makes a request on the caller's thread.
+
+    Args:
+        max (int): The upper bound (inclusive) for the random number.
+
+    Returns:
+        int: A random number between 1 and max.
+
+    Raises:
+        RuntimeError: If the pool is empty and the request to random.org fails.
+        ValueError: If max is out of range or the response from random.org is invalid.
+    """
+    return random_pool.get_random(max)
@@ -0,0 +1,123 @@
+import contextlib
+import logging
+import threading
+import time
+from typing import Callable, ContextManager, List, Optional
+
+from playlist.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class _Target:
+    """A flush callback and when it is next due."""
+
+    __slots__ = ("name", "flush", "interval", "next_due")
+
+    def __init__(self, name: str, flush: Callable[[], object], interval: float, next_due: float):
+        self.name = name
+        self.flush = flush
+        self.interval = interval
+        self.next_due = next_due
+
+
+class BackgroundFlusher:
+    """
+    A daemon thread that calls write-behind buffers' flush methods on their intervals.
+
+    Buffers such as PlayCountBuffer only check their time threshold when something is
+    recorded, so on a worker that goes quiet their last writes would wait indefinitely.
+    Registering them here flushes them every interval whether or not anything else
+    happens. One thread serves every registered buffer, sleeping until the next is due.
+
+    """
+
+    def __init__(
+        self,
+        context: Optional[Callable[[], ContextManager]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Initializes a flusher with nothing registered.
+
+        Args:
+            context (Callable[[], ContextManager], optional): Entered around every flush,
+                                                              such as ``app.app_context``.
+            clock (Callable[[], float], optional): Returns the current time in seconds.
+
+        """
+        self._context = context or contextlib.nullcontext
+        self._clock = clock
+        self._targets: List[_Target] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, flush: Callable[[], object], interval_seconds: float) -> None:
+        """Calls ``flush`` every ``interval_seconds``. Intervals of 0 or less are ignored.
+
+        Args:
+            name (str): What is flushed, for logging.
+            flush (Callable[[], object]): The flush method to call.
+            interval_seconds (float): How often to call it.
+        """
+        if interval_seconds <= 0:
+            logger.info(f"Not flushing {name} in the background: interval is {interval_seconds}")
+            return
+        with self._lock:
+            self._targets.append(_Target(name, flush, interval_seconds, self._clock() + interval_seconds))
+        self._wake.set()
+
+    def start(self) -> None:
+        """Starts the background thread, if it is not already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="background-flusher", daemon=True)
+        self._thread.start()
+        logger.info("Started the background flusher")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the background thread, waiting up to ``timeout`` seconds for it to finish."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_due(self) -> float:
+        """Flushes every target that is due and returns the seconds until the next one is.
+
+        A failed flush is logged and retried on the next interval; the buffers keep
+        what they could not write.
+
+        Returns:
+            float: Seconds until the next flush is due, or 60 if nothing is registered.
+        """
+        now = self._clock()
+        with self._lock:
+            due = [target for target in self._targets if target.next_due <= now]
+            for target in due:
+                target.next_due = now + target.interval
+
+        for target in due:
+            try:
+                with self._context():
+                    target.flush()
+            except Exception as e:
+                logger.error(f"Background flush of {target.name} failed: {e}")
+
+        with self._lock:
+            if not self._targets:
+                return 60.0
+            return max(0.0, min(target.next_due for target in self._targets) - self._clock())
+
+    def _run(self) -> None:
+        while True:
+            # Cleared before running so a registration or stop during the run still wakes the wait
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self._wake.wait(self.run_due())
@@ -0,0 +1,333 @@
+import contextlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+from playlist.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class _Flight:
+    """A load in progress for one key, shared by every caller waiting on it."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class _Batch:
+    """The keys invalidated while a batch load is in progress."""
+
+    __slots__ = ("invalidated", "cleared")
+
+    def __init__(self):
+        self.invalidated = set()
+        self.cleared = False
+
+
+class TTLCache:
+    """
+    A bounded in-process cache with LRU eviction and per-entry TTL.
+
+    Entries are kept in two orderings: recency of use (for LRU eviction) and
+    time of last write (for expiry). Because every entry shares the same TTL,
+    write order is also expiry order, so a sweep only ever looks at the entries
+    that have actually expired.
+
+    get_or_load coalesces concurrent misses so that only one caller per key runs the
+    loader. Expired entries can be kept for a further ``stale_seconds``; while one
+    caller refreshes such an entry, the others are served the stale value instead of
+    waiting. batch_load gives the same protection against invalidations to callers
+    that load many keys at once.
+
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        sweep_interval: float = 1.0,
+        stale_seconds: float = 0.0
+    ):
+        """Initializes an empty cache.
+
+        Args:
+            max_entries (int): The maximum number of entries to hold before evicting
+                               the least recently used one.
+            ttl_seconds (float): How long an entry stays valid after it is written.
+            sweep_interval (float, optional): Minimum number of seconds between
+                                              amortized sweeps of expired entries.
+            stale_seconds (float, optional): How long after expiry get_or_load may still
+                                             serve an entry while it is being refreshed.
+
+        Raises:
+            ValueError: If max_entries is less than 1.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.stale_seconds = stale_seconds
+
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._expires_at: OrderedDict[Hashable, float] = OrderedDict()
+        self._in_flight: dict[Hashable, _Flight] = {}
+        self._batches: set = set()
+        self._lock = threading.RLock()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.stale_hits = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for a key, or None if it is missing or expired.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_sweep(now)
+
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            if self._expires_at[key] <= now:
+                self._expire_if_past_stale(key, now)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value for a key, calling loader at most once per key on a miss.
+
+        The first caller to miss runs the loader and stores its result. Callers that
+        miss while that load is in flight wait for it and receive the same value, or
+        the same exception. If the entry expired less than ``stale_seconds`` ago, those
+        callers get the stale value immediately instead of waiting.
+
+        Args:
+            key (Hashable): The cache key.
+            loader (Callable[[], Any]): Produces the value on a miss. Called without the
+                                        cache lock held.
+
+        Returns:
+            Any: The cached, stale or freshly loaded value.
+
+        Raises:
+            Exception: Whatever the loader raised, for the loading caller and its waiters.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_sweep(now)
+
+            if key in self._entries:
+                if self._expires_at[key] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key]
+                self._expire_if_past_stale(key, now)
+
+            flight = self._in_flight.get(key)
+            if flight is not None and key in self._entries:
+                self.stale_hits += 1
+                logger.debug(f"Serving stale cache entry {key} while it is refreshed")
+                return self._entries[key]
+
+            self.misses += 1
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+                self.loads += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            with self._lock:
+                # An invalidation during the load detaches the flight; its result is then stale
+                if self._in_flight.get(key) is flight:
+                    self.set(key, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is flight:
+                    del self._in_flight[key]
+            flight.done.set()
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores a value, refreshing its TTL and evicting the LRU entry if full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_sweep(now)
+
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._expires_at[key] = now + self.ttl_seconds
+            self._expires_at.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                lru_key = next(iter(self._entries))
+                self._remove(lru_key)
+                self.evictions += 1
+                logger.debug(f"Evicted cache entry {lru_key}")
+
+    @contextlib.contextmanager
+    def batch_load(self) -> Iterator[Callable[[Hashable, Any], bool]]:
+        """Stores the results of a load of many keys unless they change while it runs.
+
+        Enter it before reading the source. The yielded ``store(key, value)`` writes a
+        value like set, except that keys invalidated since the block was entered, or
+        every key once the cache has been cleared, are skipped so the stale result is
+        not written back.
+
+        Yields:
+            Callable[[Hashable, Any], bool]: Stores one loaded value; returns whether it was stored.
+        """
+        batch = _Batch()
+        with self._lock:
+            self._batches.add(batch)
+
+        def store(key: Hashable, value: Any) -> bool:
+            with self._lock:
+                if batch.cleared or key in batch.invalidated:
+                    logger.debug(f"Not caching {key}: it was invalidated during the load")
+                    return False
+                self.set(key, value)
+                return True
+
+        try:
+            yield store
+        finally:
+            with self._lock:
+                self._batches.discard(batch)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Removes a single entry from the cache if present.
+
+        A load already in flight for the key, single or batched, still answers its
+        callers, but its result is not stored.
+
+        Args:
+            key (Hashable): The cache key.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._in_flight.pop(key, None)
+            for batch in self._batches:
+                batch.invalidated.add(key)
+
+    def clear(self) -> None:
+        """Removes every entry from the cache. Counters are left untouched."""
+        with self._lock:
+            self._entries.clear()
+            self._expires_at.clear()
+            self._in_flight.clear()
+            for batch in self._batches:
+                batch.cleared = True
+
+    def sweep(self) -> int:
+        """Removes all expired entries.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        with self._lock:
+            return self._sweep(time.monotonic())
+
+    def stats(self) -> dict:
+        """Returns the current size, capacity and hit/miss counters.
+
+        Returns:
+            dict: Cache statistics.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "stale_seconds": self.stale_seconds,
+                "loads": self.loads,
+                "coalesced": self.coalesced,
+                "stale_hits": self.stale_hits,
+                "in_flight": len(self._in_flight),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries and self._expires_at[key] > time.monotonic()
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+    def _expire_if_past_stale(self, key: Hashable, now: float) -> None:
+        if self._expires_at[key] + self.stale_seconds <= now:
+            self._remove(key)
+            self.expirations += 1
+
+    def _sweep(self, now: float) -> int:
+        removed = 0
+        while self._expires_at:
+            key, expires_at = next(iter(self._expires_at.items()))
+            if expires_at + self.stale_seconds > now:
+                break
+            self._remove(key)
+            removed += 1
+
+        self.expirations += removed
+        self._next_sweep = now + self.sweep_interval
+        if removed:
+            logger.debug(f"Swept {removed} expired cache entries")
+        return removed
+
+    def _remove(self, key: Hashable) -> None:
+        del self._entries[key]
+        del self._expires_at[key]
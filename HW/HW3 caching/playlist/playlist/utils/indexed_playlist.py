@@ -0,0 +1,265 @@
+import random
+from typing import Iterable, Iterator, List, Optional
+
+
+class _Node:
+    """A treap node holding one song ID. Subtree sizes give each node its position."""
+
+    __slots__ = ("song_id", "priority", "size", "left", "right", "parent")
+
+    def __init__(self, song_id: int, priority: float):
+        self.song_id = song_id
+        self.priority = priority
+        self.size = 1
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+        self.parent: Optional["_Node"] = None
+
+
+def _size(node: Optional[_Node]) -> int:
+    return node.size if node is not None else 0
+
+
+class IndexedPlaylist:
+    """
+    An ordered collection of unique song IDs with fast positional edits.
+
+    The order is stored in an implicit treap (a randomized balanced tree keyed by
+    position rather than value), and a dict maps each song ID to its tree node.
+    That gives O(1) membership and swaps, and O(log n) expected time for lookups
+    by position, position of an ID, inserts and removals anywhere in the order.
+
+    The class mirrors the parts of the ``list`` API that PlaylistModel uses, with
+    0-based indices like a list. Song IDs must be unique. ``version`` goes up on
+    every change, so callers can tell whether anything changed since they last looked.
+
+    """
+
+    def __init__(self, song_ids: Iterable[int] = ()):
+        """Initializes the playlist with the given song IDs, in order.
+
+        Args:
+            song_ids (Iterable[int], optional): The initial song IDs.
+
+        Raises:
+            ValueError: If a song ID appears more than once.
+        """
+        self._root: Optional[_Node] = None
+        self._nodes: dict[int, _Node] = {}
+        self._random = random.Random()
+        self.version = 0
+        self.extend(song_ids)
+
+    ##################################################
+    # List-like API
+    ##################################################
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, song_id: object) -> bool:
+        return song_id in self._nodes
+
+    def __iter__(self) -> Iterator[int]:
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.song_id
+            node = node.right
+
+    def __getitem__(self, index: int) -> int:
+        return self._node_at(self._normalize_index(index)).song_id
+
+    def __setitem__(self, index: int, song_id: int) -> None:
+        node = self._node_at(self._normalize_index(index))
+        if song_id == node.song_id:
+            return
+        self._check_not_present(song_id)
+        del self._nodes[node.song_id]
+        node.song_id = song_id
+        self._nodes[song_id] = node
+        self.version += 1
+
+    def __delitem__(self, index: int) -> None:
+        self._delete_at(self._normalize_index(index))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (IndexedPlaylist, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"IndexedPlaylist({list(self)!r})"
+
+    def append(self, song_id: int) -> None:
+        """Adds a song ID to the end of the playlist.
+
+        Raises:
+            ValueError: If the song ID is already present.
+        """
+        self._check_not_present(song_id)
+        self._root = self._merge(self._root, self._new_node(song_id))
+        self._root.parent = None
+        self.version += 1
+
+    def extend(self, song_ids: Iterable[int]) -> None:
+        """Adds several song IDs to the end of the playlist, in order."""
+        for song_id in song_ids:
+            self.append(song_id)
+
+    def insert(self, index: int, song_id: int) -> None:
+        """Inserts a song ID before the given 0-based index, clamping like list.insert.
+
+        Raises:
+            ValueError: If the song ID is already present.
+        """
+        self._check_not_present(song_id)
+        length = len(self)
+        if index < 0:
+            index = max(0, length + index)
+        index = min(index, length)
+
+        left, right = self._split(self._root, index)
+        self._root = self._merge(self._merge(left, self._new_node(song_id)), right)
+        self._root.parent = None
+        self.version += 1
+
+    def remove(self, song_id: int) -> None:
+        """Removes a song ID from the playlist.
+
+        Raises:
+            ValueError: If the song ID is not present.
+        """
+        self._delete_at(self.index(song_id))
+
+    def index(self, song_id: int) -> int:
+        """Returns the 0-based position of a song ID.
+
+        Raises:
+            ValueError: If the song ID is not present.
+        """
+        node = self._nodes.get(song_id)
+        if node is None:
+            raise ValueError(f"{song_id} is not in playlist")
+
+        position = _size(node.left)
+        while node.parent is not None:
+            parent = node.parent
+            if parent.right is node:
+                position += _size(parent.left) + 1
+            node = parent
+        return position
+
+    def swap(self, song1_id: int, song2_id: int) -> None:
+        """Swaps the positions of two song IDs in O(1).
+
+        Raises:
+            ValueError: If either song ID is not present.
+        """
+        for song_id in (song1_id, song2_id):
+            if song_id not in self._nodes:
+                raise ValueError(f"{song_id} is not in playlist")
+
+        node1, node2 = self._nodes[song1_id], self._nodes[song2_id]
+        node1.song_id, node2.song_id = song2_id, song1_id
+        self._nodes[song1_id], self._nodes[song2_id] = node2, node1
+        self.version += 1
+
+    def clear(self) -> None:
+        """Removes every song ID from the playlist."""
+        self._root = None
+        self._nodes.clear()
+        self.version += 1
+
+    def to_list(self) -> List[int]:
+        """Returns the song IDs as a plain list, in order."""
+        return list(self)
+
+    ##################################################
+    # Treap internals
+    ##################################################
+
+    def _new_node(self, song_id: int) -> _Node:
+        node = _Node(song_id, self._random.random())
+        self._nodes[song_id] = node
+        return node
+
+    def _check_not_present(self, song_id: int) -> None:
+        if song_id in self._nodes:
+            raise ValueError(f"{song_id} is already in playlist")
+
+    def _normalize_index(self, index: int) -> int:
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("playlist index out of range")
+        return index
+
+    def _node_at(self, index: int) -> _Node:
+        node = self._root
+        while True:
+            left_size = _size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def _delete_at(self, index: int) -> None:
+        left, rest = self._split(self._root, index)
+        removed, right = self._split(rest, 1)
+        del self._nodes[removed.song_id]
+
+        self._root = self._merge(left, right)
+        if self._root is not None:
+            self._root.parent = None
+        self.version += 1
+
+    @staticmethod
+    def _pull(node: _Node) -> None:
+        node.size = 1 + _size(node.left) + _size(node.right)
+        if node.left is not None:
+            node.left.parent = node
+        if node.right is not None:
+            node.right.parent = node
+
+    def _split(self, node: Optional[_Node], count: int):
+        """Splits a subtree into its first ``count`` nodes and the rest."""
+        if node is None:
+            return None, None
+
+        if count <= _size(node.left):
+            left, node.left = self._split(node.left, count)
+            self._pull(node)
+            if left is not None:
+                left.parent = None
+            return left, node
+
+        node.right, right = self._split(node.right, count - _size(node.left) - 1)
+        self._pull(node)
+        if right is not None:
+            right.parent = None
+        return node, right
+
+    def _merge(self, left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+        """Concatenates two subtrees, keeping heap order on priorities."""
+        if left is None:
+            return right
+        if right is None:
+            return left
+
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            self._pull(left)
+            return left
+
+        right.left = self._merge(left, right.left)
+        self._pull(right)
+        return right
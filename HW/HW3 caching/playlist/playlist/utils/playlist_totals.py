@@ -0,0 +1,87 @@
+from typing import Any, Dict, Iterable, Tuple
+
+
+class PlaylistTotals:
+    """
+    Running totals over the songs of a playlist: total duration, and the song count
+    and duration per genre.
+
+    Each song's genre and duration are remembered when it is added, so adding or
+    removing a song updates the totals in O(1) without looking the song up again.
+
+    """
+
+    __slots__ = ("duration", "genres", "_entries")
+
+    def __init__(self, songs: Iterable[Any] = ()):
+        """Initializes the totals with the given songs.
+
+        Args:
+            songs (Iterable[Any], optional): Objects with ``id``, ``genre`` and ``duration``
+                                             attributes, such as SongSnapshot values.
+        """
+        self.duration = 0
+        self.genres: Dict[str, list] = {}
+        self._entries: Dict[int, Tuple[str, int]] = {}
+        for song in songs:
+            self.add(song)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, song_id: object) -> bool:
+        return song_id in self._entries
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PlaylistTotals):
+            return NotImplemented
+        return self.duration == other.duration and self.genres == other.genres
+
+    def __repr__(self) -> str:
+        return f"PlaylistTotals(songs={len(self)}, duration={self.duration}, genres={self.genres!r})"
+
+    def add(self, song: Any) -> None:
+        """Counts a song in the totals.
+
+        Raises:
+            ValueError: If the song is already counted.
+        """
+        if song.id in self._entries:
+            raise ValueError(f"Song ID {song.id} is already counted")
+
+        self._entries[song.id] = (song.genre, song.duration)
+        self.duration += song.duration
+        genre = self.genres.setdefault(song.genre, [0, 0])
+        genre[0] += 1
+        genre[1] += song.duration
+
+    def remove(self, song_id: int) -> None:
+        """Takes a song out of the totals, using the genre and duration it was added with.
+
+        Raises:
+            ValueError: If the song is not counted.
+        """
+        try:
+            genre_name, duration = self._entries.pop(song_id)
+        except KeyError:
+            raise ValueError(f"Song ID {song_id} is not counted") from None
+
+        self.duration -= duration
+        genre = self.genres[genre_name]
+        genre[0] -= 1
+        genre[1] -= duration
+        if genre[0] == 0:
+            del self.genres[genre_name]
+
+    def clear(self) -> None:
+        """Resets every total to zero."""
+        self.duration = 0
+        self.genres.clear()
+        self._entries.clear()
+
+    def genre_breakdown(self) -> Dict[str, Dict[str, int]]:
+        """Returns the song count and total duration of each genre."""
+        return {
+            genre: {"count": count, "duration": duration}
+            for genre, (count, duration) in sorted(self.genres.items())
+        }
@@ -0,0 +1,128 @@
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+
+
+F = TypeVar("F", bound=Callable)
+
+
+class RWLock:
+    """
+    A readers-writer lock that lets many readers or one writer in at a time.
+
+    Writers are preferred: once a writer is waiting, new readers queue behind it so a
+    steady stream of reads cannot starve writes. The lock is reentrant for both sides,
+    and the thread holding the write lock may also take the read lock, so locked
+    methods can call each other. Upgrading a read lock to a write lock is not allowed,
+    since two upgrading readers would deadlock.
+
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers: dict[int, int] = {}
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+
+    def acquire_read(self) -> None:
+        """Blocks until the calling thread holds the read lock."""
+        me = threading.get_ident()
+        with self._cond:
+            # Re-entry must not wait on queued writers, or a nested read would deadlock
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def release_read(self) -> None:
+        """Releases one level of the calling thread's read lock.
+
+        Raises:
+            RuntimeError: If the calling thread does not hold the read lock.
+        """
+        me = threading.get_ident()
+        with self._cond:
+            count = self._readers.get(me)
+            if not count:
+                raise RuntimeError("release_read called without holding the read lock")
+            if count == 1:
+                del self._readers[me]
+                if not self._readers:
+                    self._cond.notify_all()
+            else:
+                self._readers[me] = count - 1
+
+    def acquire_write(self) -> None:
+        """Blocks until the calling thread holds the write lock.
+
+        Raises:
+            RuntimeError: If the calling thread holds only the read lock.
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a read lock to a write lock")
+
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        """Releases one level of the calling thread's write lock.
+
+        Raises:
+            RuntimeError: If the calling thread does not hold the write lock.
+        """
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("release_write called without holding the write lock")
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Context manager holding the read lock for its block."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Context manager holding the write lock for its block."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def read_locked(method: F) -> F:
+    """Runs a method while holding its instance's ``_lock`` (an RWLock) for reading."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def write_locked(method: F) -> F:
+    """Runs a method while holding its instance's ``_lock`` (an RWLock) for writing."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
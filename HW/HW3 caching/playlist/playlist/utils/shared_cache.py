@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from playlist.utils.logger import configure_logger
+
+try:
+    import redis
+except ImportError:  # redis is only needed when REDIS_URL is set
+    redis = None
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# Errors that make the shared tier fall back to the database instead of failing the request
+_REDIS_ERRORS = (redis.RedisError,) if redis is not None else ()
+
+
+class SharedCache:
+    """
+    A Redis-backed cache tier shared by every worker process.
+
+    Values are stored under ``<namespace>:<key>`` with a TTL. Invalidations delete
+    the Redis keys and are published on ``<namespace>:invalidate`` so that every
+    subscribed worker can drop its own in-process copies. Redis errors are logged
+    and treated as misses, so an unavailable Redis only costs extra database reads.
+
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        ttl_seconds: float,
+        namespace: str = "playlist:song",
+        dumps: Callable[[Any], str] = json.dumps,
+        loads: Callable[[str], Any] = json.loads
+    ):
+        """Initializes the tier on top of an existing Redis client.
+
+        Args:
+            client (redis.Redis): The Redis client to use.
+            ttl_seconds (float): How long a value stays in Redis after it is written.
+            namespace (str, optional): Prefix for keys and the invalidation channel.
+            dumps (Callable[[Any], str], optional): Serializes a value for Redis.
+            loads (Callable[[str], Any], optional): Deserializes a value read from Redis.
+
+        """
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.channel = f"{namespace}:invalidate"
+        self._dumps = dumps
+        self._loads = loads
+
+        self._lock = threading.Lock()
+        self._pubsub = None
+        self._listener = None
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations_published = 0
+        self.invalidations_received = 0
+
+    @classmethod
+    def from_env(cls, **kwargs) -> Optional["SharedCache"]:
+        """Builds a shared tier from the "REDIS_URL" environment variable.
+
+        The TTL defaults to the "REDIS_CACHE_TTL" environment variable, falling back
+        to "TTL" (60 seconds).
+
+        Args:
+            **kwargs: Passed through to the constructor.
+
+        Returns:
+            Optional[SharedCache]: The shared tier, or None if REDIS_URL is not set
+                                   or the redis package is not installed.
+        """
+        url = os.getenv("REDIS_URL")
+        if not url:
+            return None
+        if redis is None:
+            logger.warning("REDIS_URL is set but the redis package is not installed; shared cache disabled")
+            return None
+
+        kwargs.setdefault("ttl_seconds", int(os.getenv("REDIS_CACHE_TTL", os.getenv("TTL", 60))))
+        logger.info(f"Using shared Redis cache at {url}")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the value stored for a key, or None on a miss or Redis error.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Optional[Any]: The deserialized value, or None.
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[Hashable]) -> dict:
+        """Returns every stored value for the given keys with a single MGET.
+
+        Args:
+            keys (Iterable[Hashable]): The cache keys.
+
+        Returns:
+            dict: The deserialized values of the keys that were found.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        try:
+            raw_values = self.client.mget([self._redis_key(key) for key in keys])
+        except _REDIS_ERRORS as e:
+            self._record_error("read", e)
+            return {}
+
+        found = {key: self._loads(raw) for key, raw in zip(keys, raw_values) if raw is not None}
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores a value with the tier's TTL.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+        """
+        self.set_many({key: value})
+
+    def set_many(self, values: dict) -> None:
+        """Stores several values in one round trip, each with the tier's TTL.
+
+        Args:
+            values (dict): The values to store, keyed by cache key.
+        """
+        if not values:
+            return
+
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for key, value in values.items():
+                pipeline.set(self._redis_key(key), self._dumps(value), ex=self._ttl())
+            pipeline.execute()
+        except _REDIS_ERRORS as e:
+            self._record_error("write", e)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Deletes keys from Redis and tells every worker to drop its copies.
+
+        Args:
+            *keys (Hashable): The cache keys to invalidate.
+        """
+        if not keys:
+            return
+
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.delete(*[self._redis_key(key) for key in keys])
+            pipeline.publish(self.channel, json.dumps(list(keys)))
+            pipeline.execute()
+        except _REDIS_ERRORS as e:
+            self._record_error("invalidate", e)
+            return
+
+        with self._lock:
+            self.invalidations_published += 1
+
+    def clear(self) -> None:
+        """Deletes every key in the namespace and tells every worker to clear its copies."""
+        try:
+            stale = list(self.client.scan_iter(match=f"{self.namespace}:*", count=1000))
+            pipeline = self.client.pipeline(transaction=False)
+            if stale:
+                pipeline.delete(*stale)
+            pipeline.publish(self.channel, json.dumps(None))
+            pipeline.execute()
+        except _REDIS_ERRORS as e:
+            self._record_error("clear", e)
+            return
+
+        with self._lock:
+            self.invalidations_published += 1
+
+    def subscribe(self, callback: Callable[[Optional[list]], None]) -> None:
+        """Listens for invalidations in a background thread.
+
+        The callback receives the list of invalidated keys, or None when the whole
+        namespace was cleared. Keys arrive as they were JSON encoded, so integer keys
+        stay integers.
+
+        Args:
+            callback (Callable[[Optional[list]], None]): Called for every invalidation.
+        """
+        def handle(message: dict) -> None:
+            with self._lock:
+                self.invalidations_received += 1
+            try:
+                callback(json.loads(message["data"]))
+            except Exception as e:
+                logger.error(f"Failed to apply shared cache invalidation: {e}")
+
+        try:
+            self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self.channel: handle})
+            self._listener = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+        except _REDIS_ERRORS as e:
+            self._record_error("subscribe", e)
+            return
+
+        logger.info(f"Subscribed to shared cache invalidations on {self.channel}")
+
+    def close(self) -> None:
+        """Stops the invalidation listener, if one is running."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+    def stats(self) -> dict:
+        """Returns the hit, miss, error and invalidation counters.
+
+        Returns:
+            dict: Shared cache statistics.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "invalidations_published": self.invalidations_published,
+                "invalidations_received": self.invalidations_received,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _redis_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _ttl(self) -> int:
+        # Redis expiries are whole seconds; never round a positive TTL down to "no expiry"
+        return max(1, int(self.ttl_seconds))
+
+    def _record_error(self, operation: str, error: Exception) -> None:
+        with self._lock:
+            self.errors += 1
+        logger.warning(f"Shared cache {operation} failed, falling back to the database: {error}")
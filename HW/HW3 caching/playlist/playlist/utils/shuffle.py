@@ -0,0 +1,116 @@
+import random
+from typing import Iterable, List, Optional
+
+
+class ShuffleOrder:
+    """
+    A shuffled play order over a set of song IDs, walked one song at a time.
+
+    The order is a Fisher-Yates permutation drawn from a private PRNG seeded once, so
+    stepping through it needs no further random.org calls. Songs before the cursor
+    have been played in this cycle and songs after it have not. Once every song has
+    been played, a new permutation is drawn from the same PRNG.
+
+    Songs can be added and removed without reshuffling: a new song is swapped into a
+    uniformly random unplayed slot, and a removed song's slot is filled from the end of
+    its region. Stepping, adding and removing are all O(1).
+
+    """
+
+    def __init__(self, song_ids: Iterable[int], seed: int):
+        """Shuffles the given song IDs.
+
+        Args:
+            song_ids (Iterable[int]): The song IDs to shuffle. They must be unique.
+            seed (int): The seed for the PRNG that draws every permutation.
+        """
+        self._random = random.Random(seed)
+        self._order: List[int] = []
+        self._positions: dict[int, int] = {}
+        self._cursor = 0
+        self.reset(song_ids)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, song_id: object) -> bool:
+        return song_id in self._positions
+
+    @property
+    def remaining(self) -> int:
+        """The number of songs not yet played in this cycle."""
+        return len(self._order) - self._cursor
+
+    def reset(self, song_ids: Iterable[int]) -> None:
+        """Starts a new cycle over the given song IDs, shuffled with the existing PRNG."""
+        self._order = list(song_ids)
+        self._shuffle()
+
+    def next(self) -> Optional[int]:
+        """Returns the next song ID in the shuffled order, or None if there are no songs.
+
+        When the cycle is finished, a new one is shuffled first. Its first song is never
+        the song that ended the previous cycle, unless it is the only song.
+        """
+        if not self._order:
+            return None
+
+        if self._cursor == len(self._order):
+            last = self._order[-1]
+            self._shuffle()
+            if len(self._order) > 1 and self._order[0] == last:
+                self._swap(0, self._random.randrange(1, len(self._order)))
+
+        song_id = self._order[self._cursor]
+        self._cursor += 1
+        return song_id
+
+    def add(self, song_id: int) -> None:
+        """Adds a song at a uniformly random position among the unplayed songs.
+
+        Raises:
+            ValueError: If the song ID is already in the order.
+        """
+        if song_id in self._positions:
+            raise ValueError(f"{song_id} is already in the shuffle order")
+
+        self._order.append(song_id)
+        self._positions[song_id] = len(self._order) - 1
+        # One inside-out Fisher-Yates step over the unplayed region
+        self._swap(len(self._order) - 1, self._random.randrange(self._cursor, len(self._order)))
+
+    def remove(self, song_id: int) -> None:
+        """Removes a song, keeping the played and unplayed songs on their sides of the cursor.
+
+        Raises:
+            ValueError: If the song ID is not in the order.
+        """
+        position = self._positions.get(song_id)
+        if position is None:
+            raise ValueError(f"{song_id} is not in the shuffle order")
+
+        if position < self._cursor:
+            # Fill the hole with the last played song, then hand its slot to the last song
+            self._swap(position, self._cursor - 1)
+            position = self._cursor - 1
+            self._cursor -= 1
+        self._swap(position, len(self._order) - 1)
+
+        self._order.pop()
+        del self._positions[song_id]
+
+    def _shuffle(self) -> None:
+        order = self._order
+        for i in range(len(order) - 1, 0, -1):
+            j = self._random.randint(0, i)
+            order[i], order[j] = order[j], order[i]
+        self._positions = {song_id: position for position, song_id in enumerate(order)}
+        self._cursor = 0
+
+    def _swap(self, i: int, j: int) -> None:
+        if i == j:
+            return
+        order = self._order
+        order[i], order[j] = order[j], order[i]
+        self._positions[order[i]] = i
+        self._positions[order[j]] = j
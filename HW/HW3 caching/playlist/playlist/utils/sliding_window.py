@@ -0,0 +1,258 @@
+import heapq
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class CountMinSketch:
+    """
+    Approximate counts for an unbounded set of keys in fixed memory.
+
+    ``depth`` rows of ``width`` counters each; a key adds to one counter per row, and
+    its estimate is the smallest of those counters. Estimates never undercount and
+    overcount by at most about ``e / width`` of the total with high probability.
+    Sketches of the same shape can be added and subtracted counter by counter.
+
+    """
+
+    __slots__ = ("width", "depth", "rows")
+
+    def __init__(self, width: int, depth: int = 4):
+        """Initializes a sketch with every counter at zero.
+
+        Raises:
+            ValueError: If width or depth is less than 1.
+        """
+        if width < 1 or depth < 1:
+            raise ValueError("Sketch width and depth must be at least 1")
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def _columns(self, key: Hashable) -> List[int]:
+        return [hash((row, key)) % self.width for row in range(self.depth)]
+
+    def add(self, key: Hashable, count: int = 1) -> None:
+        """Adds ``count`` to a key."""
+        for row, column in zip(self.rows, self._columns(key)):
+            row[column] += count
+
+    def estimate(self, key: Hashable) -> int:
+        """Returns an upper bound on a key's count."""
+        return min(row[column] for row, column in zip(self.rows, self._columns(key)))
+
+    def subtract(self, other: "CountMinSketch") -> None:
+        """Removes every count recorded in another sketch of the same shape."""
+        for row, other_row in zip(self.rows, other.rows):
+            for column, count in enumerate(other_row):
+                if count:
+                    row[column] -= count
+
+    def clear(self) -> None:
+        """Resets every counter to zero."""
+        for row in self.rows:
+            row[:] = [0] * self.width
+
+
+class TopKTracker:
+    """
+    The keys with the highest counts, kept up to date as their counts change.
+
+    Holds at most ``capacity`` candidate keys with their current counts, and a min-heap
+    over them so the weakest candidate is found in O(log capacity). Heap entries are not
+    removed when a count changes; outdated entries are skipped when they reach the top.
+    A key outside the candidates gets in once an update shows it beating the weakest.
+    Keep ``capacity`` a few times larger than the number of keys asked for, so that keys
+    whose counts fall as a window slides are not ranked against ones that left too early.
+
+    """
+
+    def __init__(self, capacity: int):
+        """Initializes an empty tracker.
+
+        Raises:
+            ValueError: If capacity is less than 1.
+        """
+        if capacity < 1:
+            raise ValueError("Top-K capacity must be at least 1")
+        self.capacity = capacity
+        self._counts: Dict[Hashable, int] = {}
+        self._heap: List[Tuple[int, Hashable]] = []
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._counts
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def update(self, key: Hashable, count: int) -> None:
+        """Records a key's current count, which may have gone up or down."""
+        if count <= 0:
+            self._counts.pop(key, None)
+            return
+
+        if key not in self._counts and len(self._counts) >= self.capacity:
+            weakest = self._weakest()
+            if count <= self._counts[weakest]:
+                return
+            del self._counts[weakest]
+
+        self._counts[key] = count
+        heapq.heappush(self._heap, (count, key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, key) for key, count in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def keys(self) -> List[Hashable]:
+        """Returns the candidate keys, in no particular order."""
+        return list(self._counts)
+
+    def top(self, k: int) -> List[Tuple[Hashable, int]]:
+        """Returns up to ``k`` (key, count) pairs, highest count first."""
+        return heapq.nlargest(k, self._counts.items(), key=lambda item: item[1])
+
+    def clear(self) -> None:
+        """Forgets every key."""
+        self._counts.clear()
+        self._heap.clear()
+
+    def _weakest(self) -> Hashable:
+        while True:
+            count, key = self._heap[0]
+            if self._counts.get(key) == count:
+                return key
+            heapq.heappop(self._heap)
+
+
+class SlidingWindowCounter:
+    """
+    Per-key counts over the last ``window_seconds``, with the top keys kept current.
+
+    The window is a ring of ``bucket_count`` buckets, each covering an equal slice of
+    time. Counts go into the bucket for the current slice; when the window slides past
+    a bucket, its counts are subtracted from the window totals and the bucket is reused.
+    Counts therefore age out one bucket at a time, so the window is exact to within
+    one bucket width.
+
+    Totals are exact per key by default. With ``sketch_width`` set, each bucket and the
+    window total are count-min sketches instead, bounding memory however many keys are
+    counted at the cost of slight overcounts.
+
+    Not thread-safe; callers lock around it.
+
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        bucket_count: int,
+        top_k_capacity: int = 100,
+        sketch_width: Optional[int] = None,
+        sketch_depth: int = 4
+    ):
+        """Initializes an empty window.
+
+        Args:
+            window_seconds (float): The length of the window.
+            bucket_count (int): How many buckets the window is split into.
+            top_k_capacity (int, optional): How many candidate top keys to keep.
+            sketch_width (int, optional): If given, count with sketches of this width.
+            sketch_depth (int, optional): The number of rows of each sketch.
+
+        Raises:
+            ValueError: If window_seconds or bucket_count is not positive.
+        """
+        if window_seconds <= 0 or bucket_count < 1:
+            raise ValueError("window_seconds and bucket_count must be positive")
+
+        self.window_seconds = window_seconds
+        self.bucket_count = bucket_count
+        self.bucket_seconds = window_seconds / bucket_count
+        self.sketched = sketch_width is not None
+
+        if self.sketched:
+            self._buckets = [CountMinSketch(sketch_width, sketch_depth) for _ in range(bucket_count)]
+            self._totals = CountMinSketch(sketch_width, sketch_depth)
+        else:
+            self._buckets = [{} for _ in range(bucket_count)]
+            self._totals = {}
+        # The absolute slice number each bucket currently holds
+        self._slices = [None] * bucket_count
+        self._current_slice: Optional[int] = None
+        self.top_k = TopKTracker(top_k_capacity)
+
+    def add(self, key: Hashable, count: int, now: float) -> None:
+        """Counts ``count`` events for a key at time ``now`` (in seconds)."""
+        self.advance(now)
+        index = self._current_slice % self.bucket_count
+        bucket = self._buckets[index]
+
+        if self.sketched:
+            bucket.add(key, count)
+            self._totals.add(key, count)
+            total = self._totals.estimate(key)
+        else:
+            bucket[key] = bucket.get(key, 0) + count
+            total = self._totals.get(key, 0) + count
+            self._totals[key] = total
+        self.top_k.update(key, total)
+
+    def count(self, key: Hashable, now: float) -> int:
+        """Returns a key's count in the window ending at ``now``."""
+        self.advance(now)
+        if self.sketched:
+            return self._totals.estimate(key)
+        return self._totals.get(key, 0)
+
+    def top(self, k: int, now: float) -> List[Tuple[Hashable, int]]:
+        """Returns up to ``k`` (key, count) pairs for the window ending at ``now``, highest first."""
+        self.advance(now)
+        return self.top_k.top(k)
+
+    def forget(self, key: Hashable) -> None:
+        """Drops a key from the rankings and, when counting exactly, from every bucket.
+
+        A sketch cannot take one key's counts out without taking them from the keys that
+        share its counters, so under a sketch they stay until they age out: if the key is
+        counted again within the window, its total still includes them.
+        """
+        self.top_k.update(key, 0)
+        if self.sketched:
+            return
+        self._totals.pop(key, None)
+        for bucket in self._buckets:
+            bucket.pop(key, None)
+
+    def advance(self, now: float) -> None:
+        """Slides the window forward to ``now``, expiring buckets that fell out of it."""
+        current = int(now // self.bucket_seconds)
+        if self._current_slice is not None and current <= self._current_slice:
+            return
+
+        # Any slice older than the window is expired; at most bucket_count buckets need work
+        first = current - self.bucket_count + 1
+        start = first if self._current_slice is None else max(first, self._current_slice + 1)
+        for slice_number in range(start, current + 1):
+            index = slice_number % self.bucket_count
+            if self._slices[index] is not None:
+                self._expire(index)
+            self._slices[index] = slice_number
+        self._current_slice = current
+
+    def _expire(self, index: int) -> None:
+        bucket = self._buckets[index]
+        if self.sketched:
+            self._totals.subtract(bucket)
+            # Only candidate keys are re-ranked; the rest are not known under a sketch
+            for key in self.top_k.keys():
+                self.top_k.update(key, self._totals.estimate(key))
+            bucket.clear()
+            return
+
+        for key, count in bucket.items():
+            total = self._totals[key] - count
+            if total:
+                self._totals[key] = total
+            else:
+                del self._totals[key]
+            if key in self.top_k:
+                self.top_k.update(key, total)
+        bucket.clear()
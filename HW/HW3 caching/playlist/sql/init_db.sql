@@ -12,4 +12,5 @@ CREATE TABLE songs (
 
 CREATE INDEX idx_songs_artist_title ON songs(artist, title);
 CREATE INDEX idx_songs_year ON songs(year);
-CREATE INDEX idx_songs_play_count ON songs(play_count);
\ No newline at end of file
+CREATE INDEX idx_songs_play_count ON songs(play_count);
+CREATE INDEX idx_songs_play_count_id ON songs(play_count DESC, id);
@@ -20,4 +20,12 @@ def client(app):
 @pytest.fixture
 def session(app):
     with app.app_context():
-        yield db.session
\ No newline at end of file
+        yield db.session
+@pytest.fixture
+def logged_in_client(app, client):
+    """Fixture for a test client logged in as a fresh user."""
+    app.secret_key = "test"  # TestConfig does not set one, and logging in needs a session
+    client.put("/api/create-user", json={"username": "listener", "password": "secret"})
+    response = client.post("/api/login", json={"username": "listener", "password": "secret"})
+    assert response.status_code == 200
+    return client
@@ -0,0 +1,64 @@
+from collections import Counter
+
+import pytest
+
+from playlist.utils.alias_sampler import AliasTable, LazyAliasSampler
+
+
+def draw_grid(table, steps=10000):
+    """Draws once at each of ``steps`` evenly spaced uniform values."""
+    return Counter(table.sample((i + 0.5) / steps) for i in range(steps))
+
+
+@pytest.mark.parametrize("weights", [[1, 1, 1, 1], [1, 2, 3, 4], [10, 0, 1], [5]])
+def test_alias_table_matches_weights(weights):
+    """Test that draws over evenly spaced uniforms follow the weights."""
+    counts = draw_grid(AliasTable(weights))
+
+    total = sum(weights)
+    for index, weight in enumerate(weights):
+        assert counts[index] == pytest.approx(10000 * weight / total, abs=2)
+
+
+@pytest.mark.parametrize("weights", [[], [0, 0], [1, -1]])
+def test_alias_table_invalid_weights(weights):
+    """Test that empty, all-zero and negative weights are rejected."""
+    with pytest.raises(ValueError):
+        AliasTable(weights)
+
+
+def test_lazy_sampler_builds_once_until_drift():
+    """Test that the table is rebuilt only after weights drift past the threshold."""
+    weights = {"a": 1, "b": 9}
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return list(weights), list(weights.values())
+
+    sampler = LazyAliasSampler(loader, drift_threshold=0.5)
+    assert sampler.sample(0.0) == "a"
+    assert sampler.sample(0.99) == "b"
+    assert len(loads) == 1
+
+    sampler.record_drift(4)
+    sampler.sample(0.5)
+    assert len(loads) == 1
+
+    weights["a"] = 100
+    sampler.record_drift(2)
+    assert sampler.sample(0.25) == "a"
+    assert len(loads) == 2
+    assert sampler.stats()["builds"] == 2
+
+
+def test_lazy_sampler_invalidate_and_empty():
+    """Test that invalidate forces a rebuild and an empty load draws nothing."""
+    keys = []
+    sampler = LazyAliasSampler(lambda: (list(keys), [1] * len(keys)))
+    assert sampler.sample(0.5) is None
+
+    keys.append(7)
+    assert sampler.sample(0.5) is None
+    sampler.invalidate()
+    assert sampler.sample(0.5) == 7
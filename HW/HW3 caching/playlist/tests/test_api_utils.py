@@ -1,7 +1,9 @@
+import threading
+
 import pytest
 import requests
 
-from playlist.utils.api_utils import get_random
+from playlist.utils.api_utils import RandomPool, get_random
 
 
 RANDOM_NUMBER = 4
@@ -58,3 +60,105 @@ def test_get_random_invalid_response(mock_random_org):
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
         get_random(10)
+
+
+##################################################
+# Random Pool
+##################################################
+
+
+@pytest.fixture
+def mock_random_org_batch(mocker):
+    """Patch requests.get to return a batch of pooled integers."""
+    mock_response = mocker.Mock()
+    mock_response.text = "7\n999999999\n12\n"
+    mocker.patch("requests.get", return_value=mock_response)
+    return mock_response
+
+
+def test_random_pool_fetches_a_batch(mock_random_org_batch):
+    """Test that one request to random.org serves several draws."""
+    pool = RandomPool(batch_size=3, low_water=0)
+
+    assert pool.get_random(10) == 8
+    assert pool.get_random(10) == 10
+    assert pool.get_random(10) == 3
+
+    requests.get.assert_called_once_with(
+        "https://www.random.org/integers/?min=0&max=999999999&col=1&base=10&format=plain&rnd=new&num=3", timeout=5
+    )
+    assert pool.stats()["depth"] == 0
+
+
+def test_random_pool_rejects_biased_values(mock_random_org_batch):
+    """Test that values above the largest multiple of max are discarded, not wrapped."""
+    pool = RandomPool(batch_size=3, low_water=0)
+    pool.get_random(10)
+
+    # 999999999 is below the limit for max=10, but not for max=7
+    assert pool.get_random(7) == 12 % 7 + 1
+    assert pool.stats()["values_discarded"] == 1
+
+
+def test_random_pool_background_refill(mock_random_org_batch, mocker):
+    """Test that dropping below the low-water mark starts a background refill."""
+    mock_thread = mocker.patch("playlist.utils.api_utils.threading.Thread")
+    pool = RandomPool(batch_size=3, low_water=5)
+
+    pool.get_random(10)
+
+    mock_thread.assert_called_once_with(target=pool._background_refill, daemon=True)
+    mock_thread.return_value.start.assert_called_once_with()
+
+
+def test_random_pool_refill_failure(mocker):
+    """Test that a failed refill on an empty pool surfaces as a RuntimeError."""
+    mocker.patch("requests.get", side_effect=requests.exceptions.RequestException("Connection error"))
+    pool = RandomPool(batch_size=3, low_water=0)
+
+    with pytest.raises(RuntimeError, match="Request to random.org failed: Connection error"):
+        pool.get_random(10)
+    assert pool.stats()["failed_refills"] == 1
+
+
+def test_random_pool_refill_invalid_url(mocker):
+    """Test that a request error that is also a ValueError is reported as a failed request."""
+    mocker.patch("requests.get", side_effect=requests.exceptions.InvalidURL("Invalid URL"))
+    pool = RandomPool(batch_size=3, low_water=0)
+
+    with pytest.raises(RuntimeError, match="Request to random.org failed: Invalid URL"):
+        pool.get_random(10)
+    assert pool.stats()["failed_refills"] == 1
+
+
+def test_random_pool_skips_refill_filled_while_waiting(mock_random_org_batch):
+    """Test that a dry pool refilled by another thread during the wait is not fetched again."""
+    pool = RandomPool(batch_size=3, low_water=0)
+    results = []
+
+    # Hold the refill lock as an in-flight refill would, so the draw waits for it
+    pool._refill_lock.acquire()
+    drawer = threading.Thread(target=lambda: results.append(pool.get_random(10)))
+    drawer.start()
+    drawer.join(0.1)
+    with pool._lock:
+        pool._values.append(7)
+    pool._refill_lock.release()
+    drawer.join(5)
+
+    assert results == [8]
+    requests.get.assert_not_called()
+
+
+def test_random_pool_invalid_max():
+    """Test that max must be within the pooled range."""
+    pool = RandomPool(batch_size=3, low_water=0)
+    with pytest.raises(ValueError, match="max must be at least 1"):
+        pool.get_random(0)
+
+
+def test_random_pool_stats_route_requires_login(logged_in_client):
+    """Test that random pool statistics are only served to logged-in users."""
+    assert logged_in_client.get("/api/random-pool-stats").status_code == 200
+    logged_in_client.post("/api/logout")
+    assert logged_in_client.get("/api/random-pool-stats").status_code == 401
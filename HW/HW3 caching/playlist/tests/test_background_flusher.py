@@ -0,0 +1,68 @@
+import threading
+
+from playlist.utils.background_flusher import BackgroundFlusher
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_run_due_flushes_only_due_targets():
+    """Test that each target is flushed on its own interval."""
+    clock = FakeClock()
+    flusher = BackgroundFlusher(clock=clock)
+    calls = []
+    flusher.register("fast", lambda: calls.append("fast"), 1)
+    flusher.register("slow", lambda: calls.append("slow"), 5)
+
+    assert flusher.run_due() == 1
+    assert calls == []
+
+    clock.now = 1
+    assert flusher.run_due() == 1
+    assert calls == ["fast"]
+
+    clock.now = 5
+    flusher.run_due()
+    assert calls == ["fast", "fast", "slow"]
+
+
+def test_run_due_survives_a_failing_flush():
+    """Test that one failing flush does not stop the others."""
+    clock = FakeClock()
+    flusher = BackgroundFlusher(clock=clock)
+    calls = []
+
+    def fail():
+        raise RuntimeError("database is down")
+
+    flusher.register("broken", fail, 1)
+    flusher.register("working", lambda: calls.append("working"), 1)
+
+    clock.now = 1
+    flusher.run_due()
+    assert calls == ["working"]
+
+
+def test_register_ignores_non_positive_intervals():
+    """Test that a zero interval turns background flushing off for that target."""
+    flusher = BackgroundFlusher(clock=FakeClock())
+    flusher.register("off", lambda: None, 0)
+    assert flusher.run_due() == 60
+
+
+def test_thread_flushes_without_any_other_activity():
+    """Test that the background thread flushes a quiet buffer and stops cleanly."""
+    flushed = threading.Event()
+    flusher = BackgroundFlusher()
+    flusher.register("buffer", flushed.set, 0.01)
+
+    flusher.start()
+    try:
+        assert flushed.wait(2)
+    finally:
+        flusher.stop(timeout=2)
@@ -0,0 +1,212 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from playlist.utils.cache import TTLCache
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture to control the monotonic clock used by the cache."""
+    now = [1000.0]
+    mocker.patch("playlist.utils.cache.time.monotonic", side_effect=lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(clock):
+    """Fixture to provide a small cache with a 10 second TTL."""
+    return TTLCache(max_entries=2, ttl_seconds=10)
+
+
+def test_get_miss_then_hit(cache):
+    """Test that a missing key counts as a miss and a stored key as a hit."""
+    assert cache.get(1) is None
+    cache.set(1, "song")
+    assert cache.get(1) == "song"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_lru_eviction(cache):
+    """Test that the least recently used entry is evicted once the cache is full."""
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)  # 2 is now least recently used
+    cache.set(3, "c")
+
+    assert 2 not in cache
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entry_is_a_miss(cache, clock):
+    """Test that an entry past its TTL is dropped and counted as an expiration."""
+    cache.set(1, "a")
+    clock[0] += 11
+
+    assert cache.get(1) is None
+    assert len(cache) == 0
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sweep_removes_only_expired_entries(clock):
+    """Test that a sweep drops expired entries and keeps fresh ones."""
+    cache = TTLCache(max_entries=10, ttl_seconds=10)
+    cache.set(1, "a")
+    clock[0] += 5
+    cache.set(2, "b")
+    clock[0] += 6
+
+    assert cache.sweep() == 1
+    assert 1 not in cache
+    assert 2 in cache
+
+
+def test_amortized_sweep_on_access(clock):
+    """Test that expired entries are swept during normal access without an explicit sweep."""
+    cache = TTLCache(max_entries=10, ttl_seconds=10, sweep_interval=1)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    clock[0] += 11
+
+    cache.set(3, "c")
+    assert len(cache) == 1
+    assert cache.stats()["expirations"] == 2
+
+
+def test_invalidate_and_clear(cache):
+    """Test removing one entry and clearing the cache."""
+    cache.set(1, "a")
+    cache.set(2, "b")
+
+    cache.invalidate(1)
+    assert 1 not in cache
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_invalid_capacity():
+    """Test that a cache must hold at least one entry."""
+    with pytest.raises(ValueError, match="max_entries must be at least 1"):
+        TTLCache(max_entries=0, ttl_seconds=10)
+
+
+def test_get_or_load_coalesces_concurrent_misses():
+    """Test that concurrent misses on one key run the loader once and share its result."""
+    cache = TTLCache(max_entries=10, ttl_seconds=10)
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "song"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get_or_load, 1, loader) for _ in range(8)]
+        while cache.stats()["coalesced"] < 7:
+            threading.Event().wait(0.001)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert results == ["song"] * 8
+    assert len(calls) == 1
+    assert cache.get(1) == "song"
+
+
+def test_get_or_load_shares_loader_errors():
+    """Test that waiters receive the loader's exception and nothing is cached."""
+    cache = TTLCache(max_entries=10, ttl_seconds=10)
+    started, release = threading.Event(), threading.Event()
+
+    def loader():
+        started.set()
+        release.wait(timeout=5)
+        raise ValueError("Song ID 1 not found in database")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(cache.get_or_load, 1, loader)
+        started.wait(timeout=5)
+        waiter = pool.submit(cache.get_or_load, 1, loader)
+        while cache.stats()["coalesced"] < 1:
+            threading.Event().wait(0.001)
+        release.set()
+
+        for future in (leader, waiter):
+            with pytest.raises(ValueError, match="not found"):
+                future.result(timeout=5)
+
+    assert 1 not in cache
+    assert cache.stats()["in_flight"] == 0
+
+
+def test_stale_entry_served_while_refreshing(clock):
+    """Test that callers get the stale value while another caller refreshes it."""
+    cache = TTLCache(max_entries=10, ttl_seconds=10, stale_seconds=5)
+    cache.set(1, "old")
+    clock[0] += 12
+
+    def loader():
+        # A second caller arrives while the refresh is running
+        assert cache.get_or_load(1, pytest.fail) == "old"
+        return "new"
+
+    assert cache.get_or_load(1, loader) == "new"
+    assert cache.get(1) == "new"
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_entry_past_stale_window_is_reloaded(clock):
+    """Test that an entry expired beyond the stale window is dropped and loaded again."""
+    cache = TTLCache(max_entries=10, ttl_seconds=10, stale_seconds=5)
+    cache.set(1, "old")
+    clock[0] += 16
+
+    assert cache.get_or_load(1, lambda: "new") == "new"
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate_during_load_discards_result():
+    """Test that a load racing an invalidation does not store its stale result."""
+    cache = TTLCache(max_entries=10, ttl_seconds=10)
+
+    def loader():
+        cache.invalidate(1)
+        return "stale"
+
+    assert cache.get_or_load(1, loader) == "stale"
+    assert 1 not in cache
+
+
+def test_batch_load_skips_keys_invalidated_during_load():
+    """Test that a batch load does not store keys invalidated after it began."""
+    cache = TTLCache(max_entries=10, ttl_seconds=10)
+
+    with cache.batch_load() as store:
+        cache.invalidate(1)
+        assert store(1, "stale") is False
+        assert store(2, "fresh") is True
+
+    assert 1 not in cache
+    assert cache.get(2) == "fresh"
+
+
+def test_batch_load_skips_everything_after_clear():
+    """Test that a clear during a batch load discards all of its results."""
+    cache = TTLCache(max_entries=10, ttl_seconds=10)
+
+    with cache.batch_load() as store:
+        cache.clear()
+        assert store(1, "stale") is False
+
+    assert len(cache) == 0
+
+    # Later batches are not affected by invalidations of earlier ones
+    with cache.batch_load() as store:
+        assert store(1, "fresh") is True
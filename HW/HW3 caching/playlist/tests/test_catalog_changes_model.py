@@ -0,0 +1,172 @@
+import time
+
+import pytest
+
+from playlist.models.catalog_changes_model import CatalogChanges, ChangesCompactedError
+from playlist.models.song_model import Songs
+
+
+def create(title, year=2000):
+    Songs.create_song("Artist", title, year, "Rock", 200)
+    return Songs.get_song_by_compound_key("Artist", title, year).id
+
+
+def kinds(feed):
+    return [(change["song_id"], change["kind"]) for change in feed["changes"]]
+
+
+##################################################
+# Recording Test Cases
+##################################################
+
+
+def test_song_writes_are_recorded_in_order(session):
+    """Test that create, play count and delete each record a change with increasing seq."""
+    first = create("One")
+    second = create("Two")
+    Songs.increment_play_counts({first: 2, 999: 1})
+    Songs.delete_song(second)
+
+    rows = session.query(CatalogChanges).order_by(CatalogChanges.seq).all()
+    assert [(row.song_id, row.kind) for row in rows] == [
+        (first, "created"), (second, "created"), (first, "play_count"), (second, "deleted")
+    ]
+    assert [row.seq for row in rows] == sorted(row.seq for row in rows)
+
+
+def test_failed_create_records_nothing(session):
+    """Test that a rolled-back write leaves no change behind."""
+    create("One")
+    with pytest.raises(ValueError):
+        create("One")
+
+    assert session.query(CatalogChanges).count() == 1
+
+
+def test_bulk_insert_records_new_and_updated_songs(session):
+    """Test that a bulk upsert records only the rows it inserted as created and the rest as updated."""
+    existing = create("One")
+    Songs.bulk_insert_songs([
+        {"artist": "Artist", "title": "One", "year": 2000, "genre": "Pop", "duration": 100},
+        {"artist": "Artist", "title": "Two", "year": 2000, "genre": "Pop", "duration": 100},
+    ], on_conflict="upsert")
+    new = Songs.get_song_by_compound_key("Artist", "Two", 2000).id
+
+    feed = CatalogChanges.get_changes(1)
+    assert sorted(kinds(feed)) == sorted([(existing, "updated"), (new, "created")])
+
+
+##################################################
+# Feed Test Cases
+##################################################
+
+
+def test_get_changes_collapses_to_latest_per_song(session):
+    """Test that a song changed several times is returned once, at its latest change."""
+    first = create("One")
+    second = create("Two")
+    Songs.increment_play_counts({first: 1})
+
+    feed = CatalogChanges.get_changes(0)
+
+    assert kinds(feed) == [(second, "created"), (first, "play_count")]
+    assert feed["latest_seq"] == 3
+    assert feed["next_since"] == 3
+    assert feed["has_more"] is False
+    assert feed["reset"] is False
+    assert CatalogChanges.get_changes(feed["next_since"])["changes"] == []
+
+
+def test_get_changes_pages_with_limit(session):
+    """Test that a limited page reports has_more and resumes where it stopped."""
+    ids = [create(f"Song {i}") for i in range(3)]
+
+    page = CatalogChanges.get_changes(0, limit=2)
+    assert [change["song_id"] for change in page["changes"]] == ids[:2]
+    assert page["has_more"] is True
+
+    rest = CatalogChanges.get_changes(page["next_since"], limit=2)
+    assert [change["song_id"] for change in rest["changes"]] == ids[2:]
+    assert rest["has_more"] is False
+
+
+def test_get_changes_after_reset(session):
+    """Test that only changes after the latest reset are returned, flagged as a reset."""
+    create("Old")
+    CatalogChanges.record_reset()
+    CatalogChanges.record([42], "created")
+
+    feed = CatalogChanges.get_changes(0)
+
+    assert feed["reset"] is True
+    assert kinds(feed) == [(42, "created")]
+
+
+def test_get_changes_rejects_invalid_arguments(session):
+    """Test that a negative since or a non-positive limit is rejected."""
+    with pytest.raises(ValueError):
+        CatalogChanges.get_changes(-1)
+    with pytest.raises(ValueError):
+        CatalogChanges.get_changes(0, limit=0)
+
+
+##################################################
+# Compaction Test Cases
+##################################################
+
+
+def test_compact_drops_old_changes_but_keeps_the_newest(session):
+    """Test that compaction removes aged changes and never empties the feed."""
+    create("One")
+    create("Two")
+
+    deleted = CatalogChanges.compact(60, now=time.time() + 3600)
+
+    assert deleted == 1
+    assert session.query(CatalogChanges).count() == 1
+
+
+def test_get_changes_after_compaction_requires_resync(session):
+    """Test that asking for compacted changes raises with the latest seq to resume from."""
+    for title in ("One", "Two", "Three"):
+        create(title)
+    CatalogChanges.compact(60, now=time.time() + 3600)
+
+    with pytest.raises(ChangesCompactedError) as excinfo:
+        CatalogChanges.get_changes(0)
+    assert excinfo.value.latest_seq == 3
+
+    assert [change["seq"] for change in CatalogChanges.get_changes(2)["changes"]] == [3]
+
+
+##################################################
+# Route Test Cases
+##################################################
+
+
+def test_catalog_changes_route(logged_in_client, session):
+    """Test that the route returns changed songs with their current data."""
+    song_id = create("One")
+    deleted_id = create("Two")
+    Songs.delete_song(deleted_id)
+
+    response = logged_in_client.get("/api/catalog-changes?since=0")
+
+    assert response.status_code == 200
+    changes = response.get_json()["changes"]
+    assert [(change["song_id"], change["kind"]) for change in changes] == [
+        (song_id, "created"), (deleted_id, "deleted")
+    ]
+    assert changes[0]["song"]["title"] == "One"
+    assert changes[1]["song"] is None
+
+
+def test_catalog_changes_route_rejects_bad_since(logged_in_client):
+    """Test that a non-integer since is a 400."""
+    response = logged_in_client.get("/api/catalog-changes?since=abc")
+    assert response.status_code == 400
+
+
+def test_catalog_changes_route_requires_login(client):
+    """Test that the feed of song rows is not served anonymously."""
+    assert client.get("/api/catalog-changes?since=0").status_code == 401
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from playlist.utils.indexed_playlist import IndexedPlaylist
+
+
+@pytest.fixture
+def indexed_playlist():
+    """Fixture to provide a playlist holding song IDs 1 through 5."""
+    return IndexedPlaylist([1, 2, 3, 4, 5])
+
+
+def test_order_and_positions(indexed_playlist):
+    """Test iteration order, positional lookup and position of an ID."""
+    assert list(indexed_playlist) == [1, 2, 3, 4, 5]
+    assert indexed_playlist[0] == 1
+    assert indexed_playlist[-1] == 5
+    assert indexed_playlist.index(4) == 3
+    assert 3 in indexed_playlist
+    assert 6 not in indexed_playlist
+
+
+def test_insert_remove_and_delete(indexed_playlist):
+    """Test positional inserts and removals."""
+    indexed_playlist.remove(3)
+    indexed_playlist.insert(0, 3)
+    del indexed_playlist[2]
+
+    assert indexed_playlist == [3, 1, 4, 5]
+    assert indexed_playlist.index(5) == 3
+
+
+def test_swap(indexed_playlist):
+    """Test swapping two IDs in place."""
+    indexed_playlist.swap(1, 5)
+    assert indexed_playlist == [5, 2, 3, 4, 1]
+    assert indexed_playlist.index(1) == 4
+
+
+def test_duplicate_id_rejected(indexed_playlist):
+    """Test that an ID cannot appear twice."""
+    with pytest.raises(ValueError, match="already in playlist"):
+        indexed_playlist.append(2)
+
+
+def test_missing_id_and_bad_index(indexed_playlist):
+    """Test errors for unknown IDs and out-of-range indices."""
+    with pytest.raises(ValueError, match="not in playlist"):
+        indexed_playlist.remove(42)
+    with pytest.raises(IndexError):
+        indexed_playlist[5]
+
+
+def test_matches_list_under_random_edits():
+    """Test that a long run of random edits produces the same order as a plain list."""
+    rng = random.Random(411)
+    expected = list(range(200))
+    indexed_playlist = IndexedPlaylist(expected)
+    next_id = 200
+
+    for _ in range(2000):
+        op = rng.choice(["insert", "remove", "move", "swap"])
+        if op == "insert" or not expected:
+            position = rng.randint(0, len(expected))
+            expected.insert(position, next_id)
+            indexed_playlist.insert(position, next_id)
+            next_id += 1
+        elif op == "remove":
+            song_id = rng.choice(expected)
+            expected.remove(song_id)
+            indexed_playlist.remove(song_id)
+        elif op == "move":
+            song_id = rng.choice(expected)
+            position = rng.randint(0, len(expected) - 1)
+            expected.remove(song_id)
+            expected.insert(position, song_id)
+            indexed_playlist.remove(song_id)
+            indexed_playlist.insert(position, song_id)
+        else:
+            a, b = rng.choice(expected), rng.choice(expected)
+            if a != b:
+                i, j = expected.index(a), expected.index(b)
+                expected[i], expected[j] = expected[j], expected[i]
+                indexed_playlist.swap(a, b)
+
+        probe = rng.choice(expected)
+        assert indexed_playlist.index(probe) == expected.index(probe)
+
+    assert list(indexed_playlist) == expected
+    assert len(indexed_playlist) == len(expected)
+
+
+def test_version_counts_changes(indexed_playlist):
+    """Test that every change bumps the version and reads do not."""
+    version = indexed_playlist.version
+    indexed_playlist.index(3)
+    list(indexed_playlist)
+    assert indexed_playlist.version == version
+
+    indexed_playlist.append(6)
+    indexed_playlist.insert(0, 7)
+    indexed_playlist.remove(1)
+    indexed_playlist.swap(2, 3)
+    indexed_playlist[0] = 8
+    indexed_playlist.clear()
+    assert indexed_playlist.version == version + 6
@@ -0,0 +1,88 @@
+import io
+
+import pytest
+
+from playlist import ingest
+from playlist.ingest import ingest_songs, normalize_row
+from playlist.models.song_model import Songs
+
+
+CSV_INPUT = """artist,title,year,genre,duration
+The Beatles,Come Together,1969,Rock,259
+Nirvana,Smells Like Teen Spirit,1991,Grunge,301
+Nobody,Bad Year,1800,Pop,100
+"""
+
+
+def test_normalize_row_casts_and_strips():
+    """Test that CSV strings are stripped and cast to the model's types."""
+    song = normalize_row({"artist": " Queen ", "title": "Bohemian Rhapsody", "year": "1975", "genre": "Rock", "duration": "354"})
+    assert song == {"artist": "Queen", "title": "Bohemian Rhapsody", "year": 1975, "genre": "Rock", "duration": 354}
+
+
+@pytest.mark.parametrize("raw, expected_error", [
+    ('{"artist": "Queen"}', "Missing required fields"),
+    ('not json', "Expecting value"),
+    ({"artist": "A", "title": "T", "year": "soon", "genre": "Pop", "duration": 100}, "invalid literal"),
+    ({"artist": "A", "title": "T", "year": 2000, "genre": "Pop", "duration": 0}, "Duration must be a positive integer"),
+])
+def test_normalize_row_invalid(raw, expected_error):
+    """Test that malformed rows are rejected with a useful message."""
+    with pytest.raises(ValueError, match=expected_error):
+        normalize_row(raw)
+
+
+def test_ingest_csv_reports_invalid_rows(session):
+    """Test loading a CSV with one invalid row."""
+    report = ingest_songs(io.StringIO(CSV_INPUT), fmt="csv", workers=1)
+
+    assert report["received"] == 3
+    assert report["written"] == 2
+    assert report["invalid"] == 1
+    assert report["errors"][0]["row"] == 3
+    assert session.query(Songs).count() == 2
+
+
+def test_ingest_jsonl_in_worker_processes(session):
+    """Test loading JSONL with validation spread over worker processes."""
+    lines = "".join(
+        f'{{"artist": "Artist", "title": "Song {i}", "year": 2000, "genre": "Pop", "duration": 200}}\n'
+        for i in range(50)
+    )
+    report = ingest_songs(io.StringIO(lines), fmt="jsonl", workers=2, batch_size=10)
+
+    assert report["written"] == 50
+    assert session.query(Songs).count() == 50
+
+
+def test_ingest_workers_are_spawned_not_forked(session, mocker):
+    """Test that worker processes do not inherit the parent's threads and locks by forking."""
+    pool = mocker.spy(ingest, "ProcessPoolExecutor")
+    row = "artist,title,year,genre,duration\nQueen,Bohemian Rhapsody,1975,Rock,354\n"
+
+    ingest_songs(io.StringIO(row), fmt="csv", workers=2)
+
+    assert pool.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+
+
+def test_ingest_conflict_policies(session):
+    """Test that existing songs are skipped by default and updated with upsert."""
+    Songs.create_song("The Beatles", "Come Together", 1969, "Pop", 100)
+    row = "artist,title,year,genre,duration\nThe Beatles,Come Together,1969,Rock,259\n"
+
+    report = ingest_songs(io.StringIO(row), fmt="csv", on_conflict="skip", workers=1)
+    assert report["written"] == 0
+    assert Songs.get_song_by_compound_key("The Beatles", "Come Together", 1969).genre == "Pop"
+
+    report = ingest_songs(io.StringIO(row), fmt="csv", on_conflict="upsert", workers=1)
+    assert report["written"] == 1
+    song = Songs.get_song_by_compound_key("The Beatles", "Come Together", 1969)
+    session.refresh(song)
+    assert song.genre == "Rock"
+    assert song.duration == 259
+
+
+def test_ingest_invalid_policy(app):
+    """Test that an unknown conflict policy is rejected."""
+    with pytest.raises(ValueError, match="Invalid conflict policy"):
+        ingest_songs(io.StringIO(""), on_conflict="replace")
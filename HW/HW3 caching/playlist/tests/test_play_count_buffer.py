@@ -0,0 +1,102 @@
+import pytest
+
+from playlist.models.play_count_buffer import PlayCountBuffer
+from playlist.models.song_model import Songs
+from playlist.utils.background_flusher import BackgroundFlusher
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def song_beatles(session):
+    """Fixture for The Beatles - Hey Jude."""
+    song = Songs(artist="The Beatles", title="Hey Jude", year=1968, genre="Rock", duration=431)
+    session.add(song)
+    session.commit()
+    return song
+
+
+@pytest.fixture
+def song_nirvana(session):
+    """Fixture for Nirvana - Smells Like Teen Spirit."""
+    song = Songs(artist="Nirvana", title="Smells Like Teen Spirit", year=1991, genre="Grunge", duration=301)
+    session.add(song)
+    session.commit()
+    return song
+
+
+def test_record_buffers_until_flush(session, song_beatles):
+    """Test that plays are held in memory until flushed."""
+    buffer = PlayCountBuffer(flush_size=100, flush_interval=3600)
+
+    buffer.record(song_beatles.id)
+    buffer.record(song_beatles.id)
+
+    session.refresh(song_beatles)
+    assert song_beatles.play_count == 0
+    assert buffer.pending(song_beatles.id) == 2
+
+    assert buffer.flush() == 2
+    session.refresh(song_beatles)
+    assert song_beatles.play_count == 2
+    assert buffer.pending(song_beatles.id) == 0
+
+
+def test_flush_on_size_threshold(session, song_beatles, song_nirvana):
+    """Test that reaching the size threshold writes every buffered song in one flush."""
+    buffer = PlayCountBuffer(flush_size=3, flush_interval=3600)
+
+    buffer.record(song_beatles.id)
+    buffer.record(song_nirvana.id)
+    buffer.record(song_nirvana.id)
+
+    session.refresh(song_beatles)
+    session.refresh(song_nirvana)
+    assert song_beatles.play_count == 1
+    assert song_nirvana.play_count == 2
+    assert buffer.pending_counts() == {}
+
+
+def test_flush_failure_keeps_plays(song_beatles, mocker):
+    """Test that plays survive a failed flush."""
+    buffer = PlayCountBuffer(flush_size=100, flush_interval=3600)
+    mocker.patch("playlist.models.play_count_buffer.Songs.increment_play_counts", side_effect=RuntimeError("db down"))
+
+    buffer.record(song_beatles.id)
+    with pytest.raises(RuntimeError):
+        buffer.flush()
+
+    assert buffer.pending(song_beatles.id) == 1
+
+
+def test_increment_play_counts_is_relative(session, song_beatles):
+    """Test that increments are added to the stored count rather than overwriting it."""
+    song_beatles.play_count = 5
+    session.commit()
+
+    Songs.increment_play_counts({song_beatles.id: 3, 999: 1})
+
+    session.refresh(song_beatles)
+    assert song_beatles.play_count == 8
+
+
+def test_background_flusher_writes_an_idle_buffer(app, session, song_beatles):
+    """Test that buffered plays are written on the interval even if nothing else is recorded."""
+    buffer = PlayCountBuffer(flush_size=100, flush_interval=3600)
+    buffer.record(song_beatles.id)
+
+    clock = FakeClock()
+    flusher = BackgroundFlusher(context=app.app_context, clock=clock)
+    flusher.register("play counts", buffer.flush, 60)
+    clock.now = 60
+    flusher.run_due()
+
+    session.refresh(song_beatles)
+    assert song_beatles.play_count == 1
+    assert buffer.pending(song_beatles.id) == 0
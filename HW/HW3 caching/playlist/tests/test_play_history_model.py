@@ -0,0 +1,185 @@
+import pytest
+
+from playlist.models.play_event_log import PlayEventLog
+from playlist.models.play_history_model import (
+    ANONYMOUS_USER_ID, DAY_SECONDS, HOUR_SECONDS, PlayEvents, PlayRollupsDaily, PlayRollupsHourly
+)
+from playlist.models.playlist_model import PlaylistModel
+from playlist.models.song_snapshot import SongSnapshot
+from playlist.models.user_model import Users
+from playlist.utils.background_flusher import BackgroundFlusher
+
+
+# 2024-01-01T00:00:00Z
+DAY_ONE = 1_704_067_200
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+##################################################
+# Play Log and Rollup Test Cases
+##################################################
+
+
+def test_append_many_writes_events_and_rollups(session):
+    """Test that a batch lands in the log and adds to both rollups."""
+    PlayEvents.append_many([
+        (1, 7, DAY_ONE + 10),
+        (1, 7, DAY_ONE + 20),
+        (2, None, DAY_ONE + HOUR_SECONDS + 5),
+    ])
+    PlayEvents.append_many([(1, 7, DAY_ONE + DAY_SECONDS)])
+
+    assert session.query(PlayEvents).count() == 4
+    assert PlayRollupsHourly.get_stats(DAY_ONE, DAY_ONE + 2 * DAY_SECONDS) == [
+        {"bucket_start": DAY_ONE, "plays": 2},
+        {"bucket_start": DAY_ONE + HOUR_SECONDS, "plays": 1},
+        {"bucket_start": DAY_ONE + DAY_SECONDS, "plays": 1},
+    ]
+    assert PlayRollupsDaily.get_stats(DAY_ONE, DAY_ONE + 2 * DAY_SECONDS) == [
+        {"bucket_start": DAY_ONE, "plays": 3},
+        {"bucket_start": DAY_ONE + DAY_SECONDS, "plays": 1},
+    ]
+
+
+def test_rollups_accumulate_across_batches(session):
+    """Test that a later batch for the same bucket adds to it instead of replacing it."""
+    PlayEvents.append_many([(1, 7, DAY_ONE)])
+    PlayEvents.append_many([(1, 7, DAY_ONE + 60), (1, 7, DAY_ONE + 120)])
+
+    row = session.get(PlayRollupsHourly, (DAY_ONE, 7, 1))
+    assert row.plays == 3
+
+
+def test_get_stats_groups_and_filters(session):
+    """Test per-song and per-user totals and filtering by user or song."""
+    PlayEvents.append_many([(1, 7, DAY_ONE), (2, 7, DAY_ONE), (2, 8, DAY_ONE), (2, None, DAY_ONE)])
+    until = DAY_ONE + DAY_SECONDS
+
+    assert PlayRollupsDaily.get_stats(DAY_ONE, until, group_by="song") == [
+        {"song_id": 2, "plays": 3}, {"song_id": 1, "plays": 1}
+    ]
+    assert PlayRollupsDaily.get_stats(DAY_ONE, until, group_by="user", song_id=2) == [
+        {"user_id": ANONYMOUS_USER_ID, "plays": 1}, {"user_id": 7, "plays": 1}, {"user_id": 8, "plays": 1}
+    ]
+    assert PlayRollupsDaily.get_stats(DAY_ONE, until, user_id=7) == [{"bucket_start": DAY_ONE, "plays": 2}]
+    assert PlayRollupsDaily.get_stats(until, until + DAY_SECONDS) == []
+
+    with pytest.raises(ValueError, match="Invalid group_by"):
+        PlayRollupsDaily.get_stats(DAY_ONE, until, group_by="genre")
+
+
+def test_append_many_splits_large_batches(session):
+    """Test that a batch larger than one statement's parameter limit is written whole."""
+    PlayEvents.append_many([(song_id, 1, DAY_ONE) for song_id in range(1, 1001)])
+
+    assert session.query(PlayEvents).count() == 1000
+    assert session.query(PlayRollupsHourly).count() == 1000
+
+
+def test_delete_all(session):
+    """Test that the log and both rollups are emptied."""
+    PlayEvents.append_many([(1, 7, DAY_ONE)])
+    PlayEvents.delete_all()
+
+    for table in (PlayEvents, PlayRollupsHourly, PlayRollupsDaily):
+        assert session.query(table).count() == 0
+
+
+##################################################
+# Play Event Log Test Cases
+##################################################
+
+
+def test_play_event_log_buffers_until_size(session):
+    """Test that plays are written in one batch once the size threshold is reached."""
+    log = PlayEventLog(flush_size=3, flush_interval_ms=3_600_000, clock=FakeClock(DAY_ONE))
+
+    log.record(1, 7)
+    log.record(2, 7)
+    assert session.query(PlayEvents).count() == 0
+    assert log.pending() == 2
+
+    log.record(1)
+    assert log.pending() == 0
+    assert session.query(PlayEvents).count() == 3
+
+
+def test_play_event_log_flushes_on_interval(session, mocker):
+    """Test that a play arriving after the interval triggers a write."""
+    log = PlayEventLog(flush_size=100, flush_interval_ms=500, clock=FakeClock(DAY_ONE))
+    log.record(1, 7)
+    assert log.pending() == 1
+
+    mocker.patch("playlist.models.play_event_log.time.monotonic", return_value=log._last_flush + 1)
+    log.record(2, 7)
+    assert log.pending() == 0
+    assert session.query(PlayEvents).count() == 2
+
+
+def test_play_event_log_failure_keeps_plays(mocker):
+    """Test that plays survive a failed write, in order."""
+    log = PlayEventLog(flush_size=100, flush_interval_ms=3_600_000, clock=FakeClock(DAY_ONE))
+    mocker.patch("playlist.models.play_event_log.PlayEvents.append_many", side_effect=RuntimeError("db down"))
+
+    log.record(1, 7)
+    with pytest.raises(RuntimeError):
+        log.flush()
+    log.record(2, 7)
+
+    assert log._pending == [(1, 7, DAY_ONE), (2, 7, DAY_ONE)]
+
+
+def test_playing_a_song_is_logged(mocker):
+    """Test that PlaylistModel appends each play, with its user, to the play log."""
+    log = PlayEventLog(flush_size=100, flush_interval_ms=3_600_000, clock=FakeClock(DAY_ONE))
+    model = PlaylistModel(play_log=log)
+    mocker.patch.object(model.play_count_buffer, "record")
+    model.song_cache.songs.set(1, SongSnapshot(1, "Artist", "Title", 2000, "Rock", 100, 0))
+    model.playlist.append(1)
+
+    model.play_current_song()
+
+    assert log._pending == [(1, None, DAY_ONE)]
+
+
+def test_background_flusher_writes_an_idle_log(app, session):
+    """Test that logged plays are written on the interval even if no further play arrives."""
+    log = PlayEventLog(flush_size=100, flush_interval_ms=3_600_000, clock=FakeClock(DAY_ONE))
+    log.record(1, 7)
+
+    clock = FakeClock(0)
+    flusher = BackgroundFlusher(context=app.app_context, clock=clock)
+    flusher.register("play log", log.flush, 1)
+    clock.now = 1
+    flusher.run_due()
+
+    assert log.pending() == 0
+    assert session.query(PlayEvents).count() == 1
+
+
+##################################################
+# Route Test Cases
+##################################################
+
+
+def test_play_stats_route_only_counts_own_plays(logged_in_client, session):
+    """Test that the route requires login and only reports the caller's plays."""
+    user_id = Users.get_id_by_username("listener")
+    PlayEvents.append_many([(1, user_id, DAY_ONE), (1, user_id + 1, DAY_ONE)])
+    query = f"/api/play-stats?since={DAY_ONE}&until={DAY_ONE + DAY_SECONDS}&group_by=user"
+
+    response = logged_in_client.get(query)
+    assert response.status_code == 200
+    assert response.get_json()["stats"] == [{"user_id": user_id, "plays": 1}]
+
+    assert logged_in_client.get(f"{query}&user_id={user_id + 1}").status_code == 403
+
+    logged_in_client.post("/api/logout")
+    assert logged_in_client.get(query).status_code == 401
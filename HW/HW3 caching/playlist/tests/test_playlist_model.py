@@ -1,7 +1,19 @@
+import dataclasses
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fakeredis
 import pytest
 
+from playlist.models.play_count_buffer import PlayCountBuffer
 from playlist.models.playlist_model import PlaylistModel
+from playlist.models.song_cache import dump_song, load_song
 from playlist.models.song_model import Songs
+from playlist.models.song_snapshot import SongSnapshot
+from playlist.signals import songs_reset, songs_updated
+from playlist.utils.playlist_totals import PlaylistTotals
+from playlist.utils.shared_cache import SharedCache
 
 
 @pytest.fixture()
@@ -50,7 +62,7 @@ def sample_playlist(song_beatles, song_nirvana):
 
 def test_add_song_to_playlist(playlist_model, song_beatles, mocker):
     """Test adding a song to the playlist."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", return_value=song_beatles)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", return_value=song_beatles)
     playlist_model.add_song_to_playlist(1)
     assert len(playlist_model.playlist) == 1
     assert playlist_model.playlist[0] == 1
@@ -58,15 +70,15 @@ def test_add_song_to_playlist(playlist_model, song_beatles, mocker):
 
 def test_add_duplicate_song_to_playlist(playlist_model, song_beatles, mocker):
     """Test error when adding a duplicate song to the playlist by ID."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", side_effect=[song_beatles] * 2)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=[song_beatles] * 2)
     playlist_model.add_song_to_playlist(1)
     with pytest.raises(ValueError, match="Song with ID 1 already exists in the playlist"):
         playlist_model.add_song_to_playlist(1)
 
 
-def test_remove_song_from_playlist_by_song_id(playlist_model, mocker):
+def test_remove_song_from_playlist_by_song_id(playlist_model, song_beatles, mocker):
     """Test removing a song from the playlist by song_id."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", return_value=song_beatles)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", return_value=song_beatles)
 
     playlist_model.playlist = [1,2]
 
@@ -100,7 +112,7 @@ def test_clear_playlist(playlist_model):
 
 def test_move_song_to_track_number(playlist_model, sample_playlist, mocker):
     """Test moving a song to a specific track number in the playlist."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", side_effect=sample_playlist)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=sample_playlist)
 
     playlist_model.playlist.extend([1, 2])
 
@@ -111,7 +123,7 @@ def test_move_song_to_track_number(playlist_model, sample_playlist, mocker):
 
 def test_swap_songs_in_playlist(playlist_model, sample_playlist, mocker):
     """Test swapping the positions of two songs in the playlist."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", side_effect=sample_playlist)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=sample_playlist)
 
     playlist_model.playlist.extend([1, 2])
 
@@ -122,7 +134,7 @@ def test_swap_songs_in_playlist(playlist_model, sample_playlist, mocker):
 
 def test_swap_song_with_itself(playlist_model, song_beatles, mocker):
     """Test swapping the position of a song with itself raises an error."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", side_effect=[song_beatles] * 2)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=[song_beatles] * 2)
     playlist_model.playlist.append(1)
 
     with pytest.raises(ValueError, match="Cannot swap a song with itself"):
@@ -131,7 +143,7 @@ def test_swap_song_with_itself(playlist_model, song_beatles, mocker):
 
 def test_move_song_to_end(playlist_model, sample_playlist, mocker):
     """Test moving a song to the end of the playlist."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", side_effect=sample_playlist)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=sample_playlist)
 
     playlist_model.playlist.extend([1, 2])
 
@@ -141,7 +153,7 @@ def test_move_song_to_end(playlist_model, sample_playlist, mocker):
 
 def test_move_song_to_beginning(playlist_model, sample_playlist, mocker):
     """Test moving a song to the beginning of the playlist."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", side_effect=sample_playlist)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=sample_playlist)
 
     playlist_model.playlist.extend([1, 2])
 
@@ -156,7 +168,7 @@ def test_move_song_to_beginning(playlist_model, sample_playlist, mocker):
 
 def test_get_song_by_track_number(playlist_model, song_beatles, mocker):
     """Test successfully retrieving a song from the playlist by track number."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", return_value=song_beatles)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", return_value=song_beatles)
     playlist_model.playlist.append(1)
 
     retrieved_song = playlist_model.get_song_by_track_number(1)
@@ -170,7 +182,7 @@ def test_get_song_by_track_number(playlist_model, song_beatles, mocker):
 
 def test_get_all_songs(playlist_model, sample_playlist, mocker):
     """Test successfully retrieving all songs from the playlist."""
-    mocker.patch("playlist.models.playlist_model.PlaylistModel._get_song_from_cache_or_db", side_effect=sample_playlist)
+    mocker.patch("playlist.models.playlist_model.PlaylistModel._get_songs_from_cache_or_db", return_value=sample_playlist)
 
     playlist_model.playlist.extend([1, 2])
 
@@ -183,7 +195,7 @@ def test_get_all_songs(playlist_model, sample_playlist, mocker):
 
 def test_get_song_by_song_id(playlist_model, song_beatles, mocker):
     """Test successfully retrieving a song from the playlist by song ID."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", return_value=song_beatles)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", return_value=song_beatles)
     playlist_model.playlist.append(1)
 
     retrieved_song = playlist_model.get_song_by_song_id(1)
@@ -198,7 +210,7 @@ def test_get_song_by_song_id(playlist_model, song_beatles, mocker):
 
 def test_get_current_song(playlist_model, song_beatles, mocker):
     """Test successfully retrieving the current song from the playlist."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", return_value=song_beatles)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", return_value=song_beatles)
 
     playlist_model.playlist.append(1)
 
@@ -219,11 +231,398 @@ def test_get_playlist_length(playlist_model):
 
 def test_get_playlist_duration(playlist_model, sample_playlist, mocker):
     """Test getting the total duration of the playlist."""
-    mocker.patch("playlist.models.playlist_model.PlaylistModel._get_song_from_cache_or_db", side_effect=sample_playlist)
+    mocker.patch("playlist.models.playlist_model.PlaylistModel._get_songs_from_cache_or_db", return_value=sample_playlist)
     playlist_model.playlist.extend([1, 2])
     assert playlist_model.get_playlist_duration() == 560, "Expected playlist duration to be 560 seconds"
 
 
+@pytest.fixture
+def cached_songs(playlist_model):
+    """Fixture putting three songs in the song cache, returning them."""
+    songs = [
+        SongSnapshot(1, "The Beatles", "Come Together", 1969, "Rock", 259, 0),
+        SongSnapshot(2, "Nirvana", "Smells Like Teen Spirit", 1991, "Grunge", 301, 0),
+        SongSnapshot(3, "Queen", "Bohemian Rhapsody", 1975, "Rock", 354, 0),
+    ]
+    for song in songs:
+        playlist_model.song_cache.songs.set(song.id, song)
+    return songs
+
+
+def test_running_totals_update_without_lookups(playlist_model, cached_songs, mocker):
+    """Test that adds, removes and reorders keep the totals without recomputing them."""
+    for song in cached_songs:
+        playlist_model.add_song_to_playlist(song.id)
+    mocker.patch("playlist.models.playlist_model.PlaylistModel._get_songs_from_cache_or_db",
+                 side_effect=AssertionError("totals were recomputed"))
+
+    assert playlist_model.get_playlist_duration() == 914
+    assert playlist_model.get_genre_breakdown() == {
+        "Grunge": {"count": 1, "duration": 301},
+        "Rock": {"count": 2, "duration": 613},
+    }
+
+    playlist_model.move_song_to_beginning(3)
+    playlist_model.swap_songs_in_playlist(1, 2)
+    playlist_model.remove_song_by_song_id(2)
+    assert playlist_model.get_playlist_duration() == 613
+    assert playlist_model.get_genre_breakdown() == {"Rock": {"count": 2, "duration": 613}}
+
+    playlist_model.remove_song_by_track_number(1)
+    assert playlist_model.get_playlist_duration() == 259
+
+    playlist_model.clear_playlist()
+    assert playlist_model.get_playlist_duration() == 0
+    assert playlist_model.get_genre_breakdown() == {}
+
+
+def test_running_totals_rebuilt_after_direct_edit(playlist_model, cached_songs):
+    """Test that editing the playlist directly makes the next read rebuild the totals."""
+    playlist_model.add_song_to_playlist(1)
+    playlist_model.playlist.append(2)
+    assert playlist_model.get_playlist_duration() == 560
+
+    playlist_model.playlist = [3]
+    assert playlist_model.get_playlist_duration() == 354
+
+
+def test_running_totals_rebuilt_when_songs_updated(playlist_model, cached_songs):
+    """Test that a catalog update of a song in the playlist makes the totals rebuild."""
+    playlist_model.add_song_to_playlist(1)
+    songs_updated.send(Songs, song_ids=[2])
+    assert playlist_model._totals_in_sync()
+
+    songs_updated.send(Songs, song_ids=[1])
+    assert not playlist_model._totals_in_sync()
+
+
+def test_running_totals_rebuilt_when_songs_updated_during_a_write(playlist_model, cached_songs, mocker):
+    """Test that a song update signalled while another song is added is not lost."""
+    playlist_model.add_song_to_playlist(1)
+    assert playlist_model.get_playlist_duration() == 259
+    add = PlaylistTotals.add
+    updated = dataclasses.replace(cached_songs[0], duration=999)
+
+    def update_then_add(totals, song):
+        songs_updated.send(Songs, song_ids=[1])
+        playlist_model.song_cache.songs.set(1, updated)
+        add(totals, song)
+
+    mocker.patch.object(PlaylistTotals, "add", autospec=True, side_effect=update_then_add)
+    playlist_model.add_song_to_playlist(2)
+
+    assert playlist_model.get_playlist_duration() == 999 + 301
+
+
+def test_running_totals_rebuild_racing_an_update_is_not_kept(playlist_model, cached_songs, mocker):
+    """Test that totals rebuilt while a song changes are returned but rebuilt again next read."""
+    playlist_model.playlist.append(1)
+    get_songs = playlist_model._get_songs_from_cache_or_db
+
+    def load_then_update(song_ids):
+        songs = get_songs(song_ids)
+        songs_updated.send(Songs, song_ids=[1])
+        return songs
+
+    mocker.patch.object(playlist_model, "_get_songs_from_cache_or_db", side_effect=load_then_update)
+    assert playlist_model.get_playlist_duration() == 259
+    assert not playlist_model._totals_in_sync()
+
+    mocker.patch.object(playlist_model, "_get_songs_from_cache_or_db", side_effect=get_songs)
+    playlist_model.song_cache.songs.set(1, cached_songs[0])
+    assert playlist_model.get_playlist_duration() == 259
+    assert playlist_model._totals_in_sync()
+
+
+def test_running_totals_rebuilt_once_by_concurrent_readers(playlist_model, cached_songs, mocker):
+    """Test that readers that all find the totals out of date rebuild them only once."""
+    playlist_model.playlist.extend([1, 2, 3])
+    spy = mocker.spy(playlist_model, "_get_songs_from_cache_or_db")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        durations = list(pool.map(lambda _: playlist_model.get_playlist_duration(), range(32)))
+
+    assert durations == [914] * 32
+    assert spy.call_count == 1
+
+
+def test_debug_checks_catch_inconsistent_totals(cached_songs):
+    """Test that debug checks compare the running totals with a full recompute."""
+    playlist_model = PlaylistModel(debug_checks=True)
+    for song in cached_songs:
+        playlist_model.song_cache.songs.set(song.id, song)
+    playlist_model.add_song_to_playlist(1)
+    assert playlist_model.get_playlist_duration() == 259
+
+    playlist_model._totals.duration += 1
+    with pytest.raises(RuntimeError, match="running totals are inconsistent"):
+        playlist_model.get_playlist_duration()
+
+
+def test_apply_batch(playlist_model, cached_songs, mocker):
+    """Test applying adds, moves and removes in one batch with one song lookup."""
+    playlist_model.add_song_to_playlist(1)
+    spy = mocker.spy(playlist_model.song_cache, "get_songs")
+
+    playlist = playlist_model.apply_batch([
+        {"op": "add", "song_id": 2},
+        {"op": "add", "song_id": 3},
+        {"op": "move", "song_id": 3, "track_number": 1},
+        {"op": "remove", "song_id": 1},
+        {"op": "add", "song_id": 1},
+    ])
+
+    assert playlist == [3, 2, 1]
+    assert playlist_model.playlist == [3, 2, 1]
+    assert spy.call_count == 1
+    assert playlist_model._totals_in_sync()
+    assert playlist_model.get_playlist_duration() == 914
+
+
+@pytest.mark.parametrize("operations, expected_error", [
+    ([{"op": "rename", "song_id": 2}], "op of 'add', 'remove' or 'move'"),
+    ([{"op": "add"}], "missing song_id"),
+    ([{"op": "add", "song_id": "abc"}], "invalid song id"),
+    ([{"op": "add", "song_id": 2}, {"op": "add", "song_id": 2}], "already exists in the playlist"),
+    ([{"op": "remove", "song_id": 2}], "not found in the playlist"),
+    ([{"op": "add", "song_id": 2}, {"op": "move", "song_id": 2, "track_number": 3}], "invalid track number"),
+])
+def test_apply_batch_invalid_leaves_playlist_unchanged(playlist_model, cached_songs, operations, expected_error):
+    """Test that an invalid operation rejects the whole batch."""
+    playlist_model.add_song_to_playlist(1)
+
+    with pytest.raises(ValueError, match=expected_error):
+        playlist_model.apply_batch(operations)
+
+    assert playlist_model.playlist == [1]
+    assert playlist_model.get_playlist_duration() == 259
+
+
+def test_apply_batch_unknown_song(playlist_model, cached_songs, mocker):
+    """Test that a batch referring to a song missing from the catalog is rejected."""
+    mocker.patch("playlist.models.song_cache.Songs.get_song_snapshots_by_ids", return_value={})
+
+    with pytest.raises(ValueError, match="not found in database"):
+        playlist_model.apply_batch([{"op": "add", "song_id": 1}, {"op": "add", "song_id": 99}])
+
+    assert len(playlist_model.playlist) == 0
+
+
+def test_song_cache_hit_skips_db(playlist_model, song_beatles, mocker):
+    """Test that a cached song is served without another DB lookup."""
+    mock_get = mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", return_value=song_beatles)
+
+    playlist_model._get_song_from_cache_or_db(1)
+    song = playlist_model._get_song_from_cache_or_db(1)
+
+    assert mock_get.call_count == 1
+    assert isinstance(song, SongSnapshot)
+    stats = playlist_model.get_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_concurrent_cache_misses_query_db_once(playlist_model, mocker):
+    """Test that simultaneous misses for one song are served by a single DB lookup."""
+    snapshot = SongSnapshot(1, "The Beatles", "Come Together", 1969, "Rock", 259, 0)
+    barrier = threading.Barrier(4)
+
+    def slow_get_song_by_id(song_id):
+        time.sleep(0.05)
+        return snapshot
+
+    mock_get = mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=slow_get_song_by_id)
+
+    def lookup():
+        barrier.wait(timeout=5)
+        return playlist_model._get_song_from_cache_or_db(1)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        songs = list(pool.map(lambda _: lookup(), range(4)))
+
+    assert songs == [snapshot] * 4
+    assert mock_get.call_count == 1
+
+
+def test_get_songs_from_cache_or_db_batches_misses(playlist_model, song_beatles, sample_playlist, mocker):
+    """Test that cache misses are loaded with a single batched lookup."""
+    playlist_model.song_cache.songs.set(1, song_beatles)
+    mock_batch = mocker.patch(
+        "playlist.models.song_cache.Songs.get_song_snapshots_by_ids",
+        return_value={2: sample_playlist[1]}
+    )
+
+    songs = playlist_model._get_songs_from_cache_or_db([2, 1, 2])
+
+    mock_batch.assert_called_once_with([2])
+    assert [song.id for song in songs] == [2, 1, 2]
+
+
+def test_get_songs_from_cache_or_db_missing_song(playlist_model, mocker):
+    """Test that a song missing from the DB raises an error."""
+    mocker.patch("playlist.models.song_cache.Songs.get_song_snapshots_by_ids", return_value={})
+
+    with pytest.raises(ValueError, match="Song ID 3 not found in database"):
+        playlist_model._get_songs_from_cache_or_db([3])
+
+
+def test_get_songs_from_cache_or_db_skips_songs_invalidated_during_load(playlist_model, song_beatles, mocker):
+    """Test that a batch load racing an invalidation returns the song but does not cache it."""
+    def load_then_invalidate(song_ids):
+        playlist_model.song_cache.invalidate([song_beatles.id])
+        return {song_beatles.id: song_beatles}
+
+    mocker.patch("playlist.models.song_cache.Songs.get_song_snapshots_by_ids", side_effect=load_then_invalidate)
+
+    assert playlist_model._get_songs_from_cache_or_db([song_beatles.id]) == [song_beatles]
+    assert song_beatles.id not in playlist_model.song_cache.songs
+
+
+def test_shared_cache_serves_other_workers(song_beatles, mocker):
+    """Test that a song loaded by one worker is served to another from the shared cache."""
+    server = fakeredis.FakeServer()
+
+    def make_worker():
+        shared = SharedCache(fakeredis.FakeRedis(server=server), ttl_seconds=30,
+                             dumps=dump_song, loads=load_song)
+        return PlaylistModel(shared_cache=shared)
+
+    worker_1, worker_2 = make_worker(), make_worker()
+    mock_get = mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", return_value=song_beatles)
+    mock_batch = mocker.patch("playlist.models.song_cache.Songs.get_song_snapshots_by_ids")
+
+    worker_1._get_song_from_cache_or_db(song_beatles.id)
+    song = worker_2._get_songs_from_cache_or_db([song_beatles.id])[0]
+
+    assert mock_get.call_count == 1
+    mock_batch.assert_not_called()
+    assert (song.id, song.artist, song.title, song.duration) == (1, "The Beatles", "Come Together", 259)
+    worker_1.song_cache.shared.close()
+    worker_2.song_cache.shared.close()
+
+
+def test_song_invalidated_during_load_is_not_shared(song_beatles, mocker):
+    """Test that a song invalidated while it loads is not published to other workers."""
+    shared = SharedCache(fakeredis.FakeRedis(server=fakeredis.FakeServer()), ttl_seconds=30,
+                         dumps=dump_song, loads=load_song)
+    model = PlaylistModel(shared_cache=shared)
+
+    def load_then_invalidate(song_id):
+        model.song_cache.invalidate([song_id])
+        return song_beatles
+
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=load_then_invalidate)
+
+    assert model._get_song_from_cache_or_db(song_beatles.id).id == song_beatles.id
+    assert song_beatles.id not in model.song_cache.songs
+    assert shared.get(song_beatles.id) is None
+    shared.close()
+
+
+def test_invalidate_songs_drops_cached_copies(playlist_model, song_beatles, song_nirvana):
+    """Test that invalidating songs removes them from the in-process cache."""
+    playlist_model.song_cache.songs.set(1, song_beatles)
+    playlist_model.song_cache.songs.set(2, song_nirvana)
+
+    playlist_model.song_cache.invalidate([1])
+
+    assert 1 not in playlist_model.song_cache.songs
+    assert 2 in playlist_model.song_cache.songs
+
+
+def test_cache_invalidated_on_play_count_update(playlist_model, song_beatles):
+    """Test that a play count update evicts the stale cached song."""
+    playlist_model._get_song_from_cache_or_db(song_beatles.id)
+
+    Songs.increment_play_counts({song_beatles.id: 3})
+
+    assert song_beatles.id not in playlist_model.song_cache.songs
+    assert playlist_model._get_song_from_cache_or_db(song_beatles.id).play_count == 3
+
+
+def test_cache_invalidated_on_delete(playlist_model, song_beatles):
+    """Test that a deleted song is no longer served from the cache."""
+    playlist_model._get_song_from_cache_or_db(song_beatles.id)
+
+    Songs.delete_song(song_beatles.id)
+
+    with pytest.raises(ValueError, match="not found in database"):
+        playlist_model._get_song_from_cache_or_db(song_beatles.id)
+
+
+def test_cache_cleared_on_bulk_insert_and_reset(playlist_model, song_beatles, song_nirvana):
+    """Test that bulk inserts and table resets clear the whole cache."""
+    playlist_model._get_songs_from_cache_or_db([song_beatles.id, song_nirvana.id])
+
+    Songs.bulk_insert_songs([{"artist": "A", "title": "T", "year": 2000, "genre": "Pop", "duration": 100}])
+    assert len(playlist_model.song_cache.songs) == 0
+
+    playlist_model._get_song_from_cache_or_db(song_beatles.id)
+    songs_reset.send(Songs)
+    assert len(playlist_model.song_cache.songs) == 0
+
+
+def test_unknown_song_id_is_negatively_cached(playlist_model, mocker):
+    """Test that repeated lookups of a missing song only query the DB once."""
+    mock_get = mocker.patch(
+        "playlist.models.song_cache.Songs.get_song_by_id",
+        side_effect=ValueError("Song with ID 99 not found")
+    )
+    mock_batch = mocker.patch("playlist.models.song_cache.Songs.get_song_snapshots_by_ids")
+
+    for _ in range(3):
+        with pytest.raises(ValueError, match="Song with id 99 not found in database"):
+            playlist_model.validate_song_id(99, check_in_playlist=False)
+    with pytest.raises(ValueError, match="Song ID 99 not found in database"):
+        playlist_model._get_songs_from_cache_or_db([99])
+
+    assert mock_get.call_count == 1
+    mock_batch.assert_not_called()
+    assert playlist_model.get_cache_stats()["negative"]["hits"] == 3
+
+
+def test_negative_cache_cleared_when_song_created(playlist_model, app):
+    """Test that creating a song makes its previously unknown ID resolvable."""
+    with pytest.raises(ValueError, match="not found in database"):
+        playlist_model._get_song_from_cache_or_db(1)
+
+    Songs.create_song("Queen", "Bohemian Rhapsody", 1975, "Rock", 354)
+
+    assert playlist_model._get_song_from_cache_or_db(1).title == "Bohemian Rhapsody"
+
+
+def test_negative_cache_skips_ids_created_during_lookup(playlist_model, mocker):
+    """Test that an ID created while its lookup is in flight is not remembered as missing."""
+    def miss_then_create(song_id):
+        playlist_model.song_cache.invalidate([song_id])
+        raise ValueError(f"Song with ID {song_id} not found")
+
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=miss_then_create)
+    with pytest.raises(ValueError, match="Song ID 7 not found in database"):
+        playlist_model._get_song_from_cache_or_db(7)
+
+    def batch_miss_then_create(song_ids):
+        playlist_model.song_cache.invalidate(song_ids)
+        return {}
+
+    mocker.patch("playlist.models.song_cache.Songs.get_song_snapshots_by_ids", side_effect=batch_miss_then_create)
+    with pytest.raises(ValueError, match="Song ID 8 not found in database"):
+        playlist_model._get_songs_from_cache_or_db([8])
+
+    assert 7 not in playlist_model.song_cache.missing
+    assert 8 not in playlist_model.song_cache.missing
+
+
+def test_negative_cache_expires(playlist_model, mocker):
+    """Test that negative entries only last for their own TTL."""
+    playlist_model.song_cache.missing.set(5, True)
+    assert 5 in playlist_model.song_cache.missing
+
+    mocker.patch("playlist.utils.cache.time.monotonic",
+                 return_value=time.monotonic() + playlist_model.song_cache.negative_ttl_seconds + 1)
+    assert playlist_model.song_cache.missing.get(5) is None
+
+
 ##################################################
 # Utility Function Test Cases
 ##################################################
@@ -276,7 +675,7 @@ def test_validate_song_id_invalid_id(playlist_model):
 
 def test_validate_song_id_not_in_playlist(playlist_model, song_nirvana, mocker):
     """Test validate_song_id raises error for song ID not in the playlist."""
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", return_value=song_nirvana)
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", return_value=song_nirvana)
     playlist_model.playlist.append(1)
     with pytest.raises(ValueError, match="Song with id 2 not found in playlist"):
         playlist_model.validate_song_id(2)
@@ -311,8 +710,8 @@ def test_validate_track_number_invalid(playlist_model, track_number, expected_er
 
 def test_play_current_song(playlist_model, sample_playlist, mocker):
     """Test playing the current song."""
-    mock_update_play_count = mocker.patch("playlist.models.playlist_model.Songs.update_play_count")
-    mocker.patch("playlist.models.playlist_model.Songs.get_song_by_id", side_effect=sample_playlist)
+    mock_record_play = mocker.patch.object(playlist_model.play_count_buffer, "record")
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=sample_playlist)
 
     playlist_model.playlist.extend([1, 2])
 
@@ -321,8 +720,8 @@ def test_play_current_song(playlist_model, sample_playlist, mocker):
     # Assert that CURRENT_TRACK_NUMBER has been updated to 2
     assert playlist_model.current_track_number == 2, f"Expected track number to be 2, but got {playlist_model.current_track_number}"
 
-    # Assert that update_play_count was called with the id of the first song
-    mock_update_play_count.assert_called_once_with()
+    # Assert that a play was recorded for the id of the first song
+    mock_record_play.assert_called_once_with(1)
 
     # Get the second song from the iterator (which will increment CURRENT_TRACK_NUMBER back to 1)
     playlist_model.play_current_song()
@@ -330,8 +729,8 @@ def test_play_current_song(playlist_model, sample_playlist, mocker):
     # Assert that CURRENT_TRACK_NUMBER has been updated back to 1
     assert playlist_model.current_track_number == 1, f"Expected track number to be 1, but got {playlist_model.current_track_number}"
 
-    # Assert that update_play_count was called with the id of the second song
-    mock_update_play_count.assert_called_with()
+    # Assert that a play was recorded for the id of the second song
+    mock_record_play.assert_called_with(2)
 
 
 def test_rewind_playlist(playlist_model):
@@ -355,24 +754,66 @@ def test_go_to_random_track(playlist_model, mocker):
     """Test that go_to_random_track sets a valid random track number."""
     playlist_model.playlist.extend([1, 2])
 
-    mocker.patch("playlist.models.playlist_model.get_random", return_value=2)
+    mocker.patch("playlist.models.playlist_model.get_pooled_random", return_value=2)
 
     playlist_model.go_to_random_track()
     assert playlist_model.current_track_number == 2, "Current track number should be set to the random value"
 
 
+def test_shuffle_mode_visits_every_track(playlist_model, cached_songs, mocker):
+    """Test that shuffle mode uses one pooled value and visits every track before repeating."""
+    mock_random = mocker.patch("playlist.models.playlist_model.get_pooled_random", return_value=12345)
+    for song in cached_songs[:2]:
+        playlist_model.add_song_to_playlist(song.id)
+
+    playlist_model.enable_shuffle()
+    assert playlist_model.shuffle_enabled
+    playlist_model.add_song_to_playlist(3)
+
+    tracks = []
+    for _ in range(3):
+        playlist_model.go_to_random_track()
+        tracks.append(playlist_model.current_track_number)
+    assert sorted(tracks) == [1, 2, 3]
+    assert mock_random.call_count == 1
+
+    playlist_model.remove_song_by_track_number(1)
+    for _ in range(4):
+        playlist_model.go_to_random_track()
+        assert playlist_model.current_track_number in (1, 2)
+
+    playlist_model.disable_shuffle()
+    mock_random.return_value = 2
+    playlist_model.go_to_random_track()
+    assert playlist_model.current_track_number == 2
+    assert mock_random.call_count == 2
+
+
+def test_shuffle_mode_recovers_from_direct_edit(playlist_model, mocker):
+    """Test that a shuffle order that no longer matches the playlist is rebuilt."""
+    mocker.patch("playlist.models.playlist_model.get_pooled_random", return_value=1)
+    playlist_model.playlist.extend([1, 2])
+    playlist_model.enable_shuffle()
+
+    playlist_model.playlist.remove(1)
+    playlist_model.go_to_random_track()
+    assert playlist_model.current_track_number == 1
+
+
 def test_play_entire_playlist(playlist_model, sample_playlist, mocker):
     """Test playing the entire playlist."""
-    mock_update_play_count = mocker.patch("playlist.models.playlist_model.Songs.update_play_count")
-    mocker.patch("playlist.models.playlist_model.PlaylistModel._get_song_from_cache_or_db", side_effect=sample_playlist)
+    mock_record_play = mocker.patch.object(playlist_model.play_count_buffer, "record")
+    mock_get_songs = mocker.patch("playlist.models.playlist_model.PlaylistModel._get_songs_from_cache_or_db",
+                                  return_value=sample_playlist)
 
     playlist_model.playlist.extend([1,2])
 
     playlist_model.play_entire_playlist()
 
-    # Check that all play counts were updated
-    mock_update_play_count.assert_any_call()
-    assert mock_update_play_count.call_count == len(playlist_model.playlist)
+    # Check that all plays were recorded, with the songs looked up in one batch
+    mock_get_songs.assert_called_once_with([1, 2])
+    mock_record_play.assert_any_call(1)
+    assert mock_record_play.call_count == len(playlist_model.playlist)
 
     # Check that the current track number was updated back to the first song
     assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
@@ -382,16 +823,79 @@ def test_play_rest_of_playlist(playlist_model, sample_playlist, mocker):
     """Test playing from the current position to the end of the playlist.
 
     """
-    mock_update_play_count = mocker.patch("playlist.models.playlist_model.Songs.update_play_count")
-    mocker.patch("playlist.models.playlist_model.PlaylistModel._get_song_from_cache_or_db", side_effect=sample_playlist)
+    mock_record_play = mocker.patch.object(playlist_model.play_count_buffer, "record")
+    mock_get_songs = mocker.patch("playlist.models.playlist_model.PlaylistModel._get_songs_from_cache_or_db",
+                                  return_value=sample_playlist[1:])
 
     playlist_model.playlist.extend([1, 2])
     playlist_model.current_track_number = 2
 
     playlist_model.play_rest_of_playlist()
 
-    # Check that play counts were updated for the remaining songs
-    mock_update_play_count.assert_any_call()
-    assert mock_update_play_count.call_count == 1
+    # Check that plays were recorded for the remaining songs
+    mock_get_songs.assert_called_once_with([2])
+    mock_record_play.assert_called_once_with(2)
+
+    assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
+
+
+def test_play_entire_playlist_records_outside_lock(playlist_model, sample_playlist, mocker):
+    """Test that plays are recorded after the write lock is released."""
+    mocker.patch("playlist.models.playlist_model.PlaylistModel._get_songs_from_cache_or_db",
+                 return_value=sample_playlist)
+    held = []
+    mocker.patch.object(playlist_model.play_count_buffer, "record",
+                        side_effect=lambda song_id: held.append(playlist_model._lock._writer is not None))
+
+    playlist_model.playlist.extend([1, 2])
+    playlist_model.play_entire_playlist()
+
+    assert held == [False, False]
+
+
+##################################################
+# Concurrency Test Cases
+##################################################
+
 
-    assert playlist_model.current_track_number == 1, "Expected to loop back to the beginning of the playlist"
\ No newline at end of file
+def test_concurrent_playlist_operations_stay_consistent(mocker):
+    """Hammer one shared model from a thread pool and check no update is lost or corrupted."""
+    songs = 20
+    plays_per_worker = 100
+    workers = 16
+
+    # Buffered plays are never flushed, so every recorded play stays countable
+    buffer = PlayCountBuffer(flush_size=10**9, flush_interval=10**9)
+    model = PlaylistModel(play_count_buffer=buffer)
+    for song_id in range(1, songs + 1):
+        model.song_cache.songs.set(song_id, SongSnapshot(song_id, f"Artist {song_id}", f"Title {song_id}", 2000, "Rock", 100, 0))
+    mocker.patch("playlist.models.song_cache.Songs.get_song_by_id", side_effect=AssertionError("cache miss"))
+    model.playlist = list(range(1, songs + 1))
+
+    def worker(seed):
+        for i in range(plays_per_worker):
+            model.play_current_song()
+            song_id = (seed + i) % songs + 1
+            if i % 3 == 0:
+                model.move_song_to_end(song_id)
+            elif i % 3 == 1:
+                model.swap_songs_in_playlist(song_id, song_id % songs + 1)
+            assert 1 <= model.get_current_song().id <= songs
+            assert model.get_playlist_duration() == songs * 100
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(worker, seed) for seed in range(workers)]:
+            future.result(timeout=30)
+
+    total_plays = plays_per_worker * workers
+    assert sum(buffer.pending_counts().values()) == total_plays
+    assert model.current_track_number == total_plays % songs + 1
+    assert sorted(model.playlist) == list(range(1, songs + 1))
+
+
+
+def test_cache_stats_route_requires_login(logged_in_client):
+    """Test that song cache statistics are only served to logged-in users."""
+    assert logged_in_client.get("/api/cache-stats").status_code == 200
+    logged_in_client.post("/api/logout")
+    assert logged_in_client.get("/api/cache-stats").status_code == 401
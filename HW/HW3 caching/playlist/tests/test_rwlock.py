@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from playlist.utils.rwlock import RWLock
+
+
+def test_readers_share_the_lock():
+    """Test that several threads can hold the read lock at once."""
+    lock = RWLock()
+    inside = threading.Barrier(3, timeout=5)
+
+    def reader():
+        with lock.read():
+            inside.wait()  # Only passes if all three readers are inside together
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert not inside.broken
+
+
+def test_writer_excludes_readers():
+    """Test that a reader waits for the writer to finish."""
+    lock = RWLock()
+    events = []
+
+    lock.acquire_write()
+    reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append("read"), lock.release_read()))
+    reader.start()
+    time.sleep(0.05)
+    events.append("write done")
+    lock.release_write()
+    reader.join(timeout=5)
+
+    assert events == ["write done", "read"]
+
+
+def test_waiting_writer_blocks_new_readers():
+    """Test that new readers queue behind a waiting writer."""
+    lock = RWLock()
+    events = []
+
+    lock.acquire_read()
+    writer = threading.Thread(target=lambda: (lock.acquire_write(), events.append("write"), lock.release_write()))
+    writer.start()
+    while not lock._writers_waiting:
+        time.sleep(0.001)
+    reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append("read"), lock.release_read()))
+    reader.start()
+    time.sleep(0.05)
+    lock.release_read()
+    writer.join(timeout=5)
+    reader.join(timeout=5)
+
+    assert events == ["write", "read"]
+
+
+def test_reentrant_write_and_read_inside_write():
+    """Test that a writer can re-acquire the write lock and take the read lock."""
+    lock = RWLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    # Fully released: another thread can now write
+    thread = threading.Thread(target=lambda: lock.write().__enter__())
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_upgrade_is_rejected():
+    """Test that a reader cannot upgrade to the write lock."""
+    lock = RWLock()
+    with lock.read():
+        with pytest.raises(RuntimeError, match="Cannot upgrade"):
+            lock.acquire_write()
+
+
+def test_release_without_holding():
+    """Test that releasing an unheld lock is an error."""
+    lock = RWLock()
+    with pytest.raises(RuntimeError):
+        lock.release_read()
+    with pytest.raises(RuntimeError):
+        lock.release_write()
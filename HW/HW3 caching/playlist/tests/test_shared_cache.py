@@ -0,0 +1,104 @@
+import time
+
+import fakeredis
+import pytest
+
+from playlist.utils.shared_cache import SharedCache
+
+
+@pytest.fixture
+def redis_client():
+    """Fixture to provide an isolated in-memory Redis server."""
+    return fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+@pytest.fixture
+def shared_cache(redis_client):
+    """Fixture to provide a shared cache on top of the fake Redis server."""
+    cache = SharedCache(redis_client, ttl_seconds=30, namespace="test:song")
+    yield cache
+    cache.close()
+
+
+def wait_for(condition, timeout=2.0):
+    """Polls until condition() is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_set_and_get(shared_cache):
+    """Test that a stored value is read back and counted as a hit."""
+    assert shared_cache.get(1) is None
+    shared_cache.set(1, {"title": "Come Together"})
+
+    assert shared_cache.get(1) == {"title": "Come Together"}
+    stats = shared_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_values_are_stored_with_ttl(shared_cache, redis_client):
+    """Test that values are namespaced and expire in Redis."""
+    shared_cache.set(1, [1, "x"])
+
+    assert 0 < redis_client.ttl("test:song:1") <= 30
+
+
+def test_get_many_returns_only_found_keys(shared_cache):
+    """Test that get_many reads several keys in one call and skips misses."""
+    shared_cache.set_many({1: "a", 2: "b"})
+
+    assert shared_cache.get_many([1, 2, 3]) == {1: "a", 2: "b"}
+    assert shared_cache.stats()["misses"] == 1
+
+
+def test_invalidate_is_published_to_other_workers(redis_client):
+    """Test that an invalidation from one worker reaches the subscriber of another."""
+    publisher = SharedCache(redis_client, ttl_seconds=30, namespace="test:song")
+    subscriber = SharedCache(redis_client, ttl_seconds=30, namespace="test:song")
+    received = []
+    subscriber.subscribe(received.append)
+    try:
+        publisher.set(5, "song")
+        publisher.invalidate(5)
+
+        assert wait_for(lambda: received == [[5]])
+        assert publisher.get(5) is None
+    finally:
+        subscriber.close()
+
+
+def test_clear_removes_namespace_and_publishes(shared_cache, redis_client):
+    """Test that clear deletes only the namespace and publishes a full invalidation."""
+    received = []
+    shared_cache.subscribe(received.append)
+    shared_cache.set_many({1: "a", 2: "b"})
+    redis_client.set("other:key", "kept")
+
+    shared_cache.clear()
+
+    assert wait_for(lambda: received == [None])
+    assert shared_cache.get_many([1, 2]) == {}
+    assert redis_client.get("other:key") == b"kept"
+
+
+def test_redis_errors_fall_back_to_miss(redis_client, mocker):
+    """Test that a Redis failure is counted and treated as a miss."""
+    import redis
+
+    cache = SharedCache(redis_client, ttl_seconds=30)
+    mocker.patch.object(redis_client, "mget", side_effect=redis.ConnectionError("down"))
+
+    assert cache.get(1) is None
+    assert cache.stats()["errors"] == 1
+
+
+def test_from_env_disabled_without_url(monkeypatch):
+    """Test that no shared cache is built when REDIS_URL is not set."""
+    monkeypatch.delenv("REDIS_URL", raising=False)
+
+    assert SharedCache.from_env() is None
@@ -0,0 +1,66 @@
+import pytest
+
+from playlist.utils.shuffle import ShuffleOrder
+
+
+def walk(shuffle, steps):
+    return [shuffle.next() for _ in range(steps)]
+
+
+def test_cycle_visits_every_song_once():
+    """Test that a cycle plays each song exactly once, then a new cycle starts."""
+    shuffle = ShuffleOrder(range(1, 11), seed=42)
+
+    first_cycle = walk(shuffle, 10)
+    assert sorted(first_cycle) == list(range(1, 11))
+    assert shuffle.remaining == 0
+
+    second_cycle = walk(shuffle, 10)
+    assert sorted(second_cycle) == list(range(1, 11))
+    assert second_cycle[0] != first_cycle[-1]
+
+
+def test_same_seed_same_order():
+    """Test that the order depends only on the seed."""
+    assert walk(ShuffleOrder(range(20), seed=7), 40) == walk(ShuffleOrder(range(20), seed=7), 40)
+
+
+def test_add_joins_unplayed_songs():
+    """Test that an added song is played later in the current cycle."""
+    shuffle = ShuffleOrder(range(1, 6), seed=1)
+    played = walk(shuffle, 3)
+
+    shuffle.add(6)
+    rest = walk(shuffle, shuffle.remaining)
+    assert 6 in rest
+    assert sorted(played + rest) == list(range(1, 7))
+
+    with pytest.raises(ValueError, match="already in the shuffle order"):
+        shuffle.add(6)
+
+
+@pytest.mark.parametrize("played_first", [True, False])
+def test_remove_keeps_cycle_intact(played_first):
+    """Test removing a played or an unplayed song from the middle of a cycle."""
+    shuffle = ShuffleOrder(range(1, 9), seed=3)
+    played = walk(shuffle, 4)
+    removed = played[1] if played_first else next(i for i in range(1, 9) if i not in played)
+
+    shuffle.remove(removed)
+    rest = walk(shuffle, shuffle.remaining)
+
+    assert len(shuffle) == 7
+    assert removed not in rest
+    assert set(rest).isdisjoint(played)
+    assert set(played + rest) == set(range(1, 9)) - (set() if played_first else {removed})
+
+    with pytest.raises(ValueError, match="not in the shuffle order"):
+        shuffle.remove(removed)
+
+
+def test_empty_order():
+    """Test that an empty order has nothing to play."""
+    shuffle = ShuffleOrder([], seed=0)
+    assert shuffle.next() is None
+    shuffle.add(1)
+    assert walk(shuffle, 3) == [1, 1, 1]
@@ -0,0 +1,86 @@
+import pytest
+
+from playlist.utils.sliding_window import CountMinSketch, SlidingWindowCounter, TopKTracker
+
+
+def test_count_min_sketch_never_undercounts():
+    """Test that estimates are upper bounds and subtracting a sketch removes its counts."""
+    sketch = CountMinSketch(width=64)
+    expiring = CountMinSketch(width=64)
+    for key in range(200):
+        sketch.add(key, key % 5 + 1)
+    expiring.add(7, 3)
+    sketch.add(7, 3)
+
+    for key in range(200):
+        assert sketch.estimate(key) >= key % 5 + 1 + (3 if key == 7 else 0)
+
+    before = sketch.estimate(7)
+    sketch.subtract(expiring)
+    assert sketch.estimate(7) == before - 3
+
+
+def test_top_k_tracker_follows_counts():
+    """Test that the weakest candidate is replaced and falling counts re-rank."""
+    tracker = TopKTracker(capacity=2)
+    tracker.update("a", 5)
+    tracker.update("b", 3)
+    tracker.update("c", 1)
+    assert tracker.top(3) == [("a", 5), ("b", 3)]
+
+    tracker.update("c", 4)
+    assert tracker.top(3) == [("a", 5), ("c", 4)]
+
+    tracker.update("a", 0)
+    tracker.update("b", 6)
+    assert tracker.top(3) == [("b", 6), ("c", 4)]
+
+
+def test_top_k_tracker_heap_is_compacted():
+    """Test that repeated updates do not grow the heap without bound."""
+    tracker = TopKTracker(capacity=3)
+    for i in range(1000):
+        tracker.update(i % 3, i)
+    assert len(tracker._heap) <= 4 * tracker.capacity
+    assert [key for key, _ in tracker.top(3)] == [0, 2, 1]
+
+
+@pytest.mark.parametrize("sketch_width", [None, 256])
+def test_sliding_window_expires_old_buckets(sketch_width):
+    """Test that counts leave the window one bucket at a time."""
+    window = SlidingWindowCounter(window_seconds=60, bucket_count=6, sketch_width=sketch_width)
+    window.add("old", 5, now=0)
+    window.add("new", 2, now=30)
+
+    assert window.top(2, now=45) == [("old", 5), ("new", 2)]
+    assert window.count("old", now=59) == 5
+
+    assert window.count("old", now=60) == 0
+    assert window.top(2, now=60) == [("new", 2)]
+
+    assert window.top(2, now=1000) == []
+    assert window.count("new", now=1000) == 0
+
+
+def test_sliding_window_forget_drops_exact_counts():
+    """Test that a forgotten key starts from zero if it is counted again."""
+    window = SlidingWindowCounter(60, 6)
+    window.add("a", 3, now=0)
+    window.add("a", 2, now=20)
+    window.add("b", 1, now=20)
+
+    window.forget("a")
+    assert window.count("a", now=20) == 0
+    assert window.top(10, now=20) == [("b", 1)]
+
+    window.add("a", 1, now=30)
+    assert sorted(window.top(10, now=30)) == [("a", 1), ("b", 1)]
+
+    # Expiring the buckets that held the forgotten counts does not go negative
+    assert window.count("a", now=75) == 1
+
+
+def test_sliding_window_rejects_bad_sizes():
+    """Test that empty windows are rejected."""
+    with pytest.raises(ValueError):
+        SlidingWindowCounter(window_seconds=0, bucket_count=1)
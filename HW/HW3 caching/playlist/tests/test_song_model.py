@@ -1,6 +1,7 @@
 import pytest
 
-from playlist.models.song_model import Songs
+from playlist.models.song_model import Songs, popularity_sampler
+from playlist.models.song_snapshot import SongSnapshot
 
 
 # --- Fixtures ---
@@ -64,6 +65,27 @@ def test_get_song_by_id_not_found(app):
         Songs.get_song_by_id(999)
 
 
+def test_get_songs_by_ids(song_beatles, song_nirvana, mocker):
+    """Test fetching several songs by ID, chunked to respect the parameter limit."""
+    mocker.patch("playlist.models.song_model.SQLITE_MAX_IN_PARAMS", 1)
+    songs = Songs.get_songs_by_ids([song_nirvana.id, song_beatles.id, 999])
+    assert set(songs) == {song_beatles.id, song_nirvana.id}
+    assert songs[song_nirvana.id].title == "Smells Like Teen Spirit"
+
+
+def test_get_song_snapshots_by_ids(session, song_beatles, song_nirvana, mocker):
+    """Test fetching songs as snapshots built from rows rather than ORM instances."""
+    mocker.patch("playlist.models.song_model.SQLITE_MAX_IN_PARAMS", 1)
+    beatles_id, nirvana_id = song_beatles.id, song_nirvana.id
+    session.expunge_all()
+
+    snapshots = Songs.get_song_snapshots_by_ids([nirvana_id, beatles_id, 999])
+
+    assert snapshots[beatles_id] == SongSnapshot(beatles_id, "The Beatles", "Hey Jude", 1968, "Rock", 431, 0)
+    assert set(snapshots) == {beatles_id, nirvana_id}
+    assert len(session.identity_map) == 0
+
+
 def test_get_song_by_compound_key(song_nirvana):
     """Test fetching a song by compound key."""
     song = Songs.get_song_by_compound_key("Nirvana", "Smells Like Teen Spirit", 1991)
@@ -105,6 +127,13 @@ def test_get_all_songs(session, song_beatles, song_nirvana):
     songs = Songs.get_all_songs()
     assert len(songs) == 2
 
+def test_iter_all_songs(session, song_beatles, song_nirvana):
+    """Test streaming all songs matches the fully loaded catalog."""
+    song_nirvana.play_count = 5
+    session.commit()
+    streamed = list(Songs.iter_all_songs(sort_by_play_count=True, batch_size=1))
+    assert streamed == Songs.get_all_songs(sort_by_play_count=True)
+
 def test_get_all_songs_sorted(session, song_beatles, song_nirvana):
     """Test retrieving songs sorted by play count."""
     song_nirvana.play_count = 5
@@ -114,6 +143,83 @@ def test_get_all_songs_sorted(session, song_beatles, song_nirvana):
     assert sorted_songs[0]["title"] == "Smells Like Teen Spirit"
 
 
+def test_get_leaderboard_pages(session, song_beatles, song_nirvana):
+    """Test walking the leaderboard one page at a time with a cursor."""
+    song_nirvana.play_count = 5
+    song_beatles.play_count = 5
+    session.add(Songs(artist="Queen", title="Bohemian Rhapsody", year=1975, genre="Rock", duration=354, play_count=9))
+    session.commit()
+
+    first_page, cursor = Songs.get_leaderboard(limit=2)
+    assert [song["title"] for song in first_page] == ["Bohemian Rhapsody", "Hey Jude"]
+    assert cursor is not None
+
+    second_page, cursor = Songs.get_leaderboard(limit=2, cursor=cursor)
+    assert [song["title"] for song in second_page] == ["Smells Like Teen Spirit"]
+    assert cursor is None
+
+
+def test_get_leaderboard_min_plays(session, song_beatles, song_nirvana):
+    """Test filtering the leaderboard by a minimum play count."""
+    song_nirvana.play_count = 2
+    session.commit()
+
+    leaderboard, _ = Songs.get_leaderboard(min_plays=1)
+    assert [song["id"] for song in leaderboard] == [song_nirvana.id]
+
+
+def test_get_leaderboard_invalid_cursor(app):
+    """Test error for a malformed cursor."""
+    with pytest.raises(ValueError, match="Invalid leaderboard cursor"):
+        Songs.get_leaderboard(limit=10, cursor="bogus")
+
+
+# --- Search ---
+
+def test_search_songs_ranks_title_matches_first(session, song_beatles, song_nirvana):
+    """Test that search matches word prefixes and ranks title matches above genre matches."""
+    Songs.create_song("Rock Steady Crew", "Hey You", 1983, "Hip Hop", 250)
+    Songs.create_song("Queen", "We Will Rock You", 1977, "Rock", 122)
+
+    results, has_more = Songs.search_songs("rock")
+    titles = [song["title"] for song in results]
+
+    assert titles[0] == "We Will Rock You"
+    assert "Hey Jude" in titles
+    assert "Smells Like Teen Spirit" not in titles
+    assert has_more is False
+
+
+def test_search_songs_tracks_updates_and_deletes(session, song_beatles, song_nirvana):
+    """Test that the search index follows edits and deletes in the Songs table."""
+    song_nirvana.genre = "Alternative"
+    session.commit()
+    assert [song["id"] for song in Songs.search_songs("altern")[0]] == [song_nirvana.id]
+
+    Songs.delete_song(song_beatles.id)
+    assert Songs.search_songs("jude")[0] == []
+
+
+def test_search_songs_paginates(session):
+    """Test paging through search results."""
+    for i in range(3):
+        Songs.create_song("Band", f"Song {i}", 2000, "Pop", 200)
+
+    first_page, has_more = Songs.search_songs("band", limit=2)
+    assert len(first_page) == 2 and has_more
+    second_page, has_more = Songs.search_songs("band", limit=2, offset=2)
+    assert len(second_page) == 1 and not has_more
+
+
+def test_search_songs_ignores_fts_syntax(session, song_beatles):
+    """Test that FTS operators in user input are treated as plain words."""
+    results, _ = Songs.search_songs('hey" OR NEAR(')
+    assert results == []
+
+    with pytest.raises(ValueError, match="at least one word"):
+        Songs.search_songs("   ")
+
+
 # --- Random Song ---
 
 def test_get_random_song(session, song_beatles, song_nirvana):
@@ -127,6 +233,81 @@ def test_get_random_song(session, song_beatles, song_nirvana):
     assert isinstance(song["play_count"], int), "Play count should be an integer"
 
 
+def test_get_random_song_probes_id_range(session, song_beatles, song_nirvana, mocker):
+    """Test that a random song is picked by drawing from the ID range."""
+    mock_random = mocker.patch("playlist.models.song_model.get_pooled_random", return_value=2)
+
+    song = Songs.get_random_song()
+
+    assert song["id"] == song_nirvana.id
+    mock_random.assert_called_once_with(2)
+
+
+def test_get_random_song_skips_deleted_ids(session, song_beatles, song_nirvana, mocker):
+    """Test that a draw landing on a deleted ID is retried."""
+    third = Songs(artist="Queen", title="Bohemian Rhapsody", year=1975, genre="Rock", duration=354)
+    session.add(third)
+    session.commit()
+    Songs.delete_song(song_nirvana.id)
+    mocker.patch("playlist.models.song_model.get_pooled_random", side_effect=[2, 3])
+
+    assert Songs.get_random_song()["id"] == third.id
+
+
+def test_get_random_song_sparse_fallback(session, song_beatles, song_nirvana, mocker):
+    """Test that a sparse catalog falls back to choosing by position."""
+    mocker.patch("playlist.models.song_model.RANDOM_SONG_MAX_PROBES", 0)
+    mock_random = mocker.patch("playlist.models.song_model.get_pooled_random", return_value=2)
+
+    assert Songs.get_random_song()["id"] == song_nirvana.id
+    mock_random.assert_called_once_with(2)
+
+
+def test_get_popular_random_song_favors_played_songs(session, song_beatles, song_nirvana, mocker):
+    """Test that popular draws are weighted by play count and rebuild after plays."""
+    mock_uniform = mocker.patch("playlist.models.song_model.random_pool.uniform", return_value=0.7)
+    assert Songs.get_popular_random_song()["id"] == song_nirvana.id
+
+    Songs.increment_play_counts({song_beatles.id: 98})
+    assert Songs.get_popular_random_song()["id"] == song_beatles.id
+    assert mock_uniform.call_count == 2
+    assert popularity_sampler.stats()["builds"] >= 2
+
+
+def test_get_popular_random_song_skips_deleted_ids(session, song_beatles, song_nirvana, mocker):
+    """Test that a draw landing on a song deleted behind the sampler's back is retried."""
+    mocker.patch("playlist.models.song_model.random_pool.uniform", return_value=0.7)
+    Songs.get_popular_random_song()
+    session.delete(song_nirvana)
+    session.commit()
+
+    assert Songs.get_popular_random_song()["id"] == song_beatles.id
+
+
+def test_get_popular_random_song_empty(session, mocker):
+    """Test error when no songs exist."""
+    mocker.patch("playlist.models.song_model.random_pool.uniform", return_value=0.5)
+    with pytest.raises(ValueError, match="empty"):
+        Songs.get_popular_random_song()
+
+
+def test_get_random_song_sparse_fallback_redraws_past_the_end(session, song_beatles, song_nirvana, mocker):
+    """Test that a position left past the end by a concurrent delete is drawn again."""
+    mocker.patch("playlist.models.song_model.RANDOM_SONG_MAX_PROBES", 0)
+    draws = iter([2, 1])
+
+    def draw_then_delete(upper):
+        position = next(draws)
+        if position == 2:
+            # Another worker deletes a song between the count and the OFFSET query
+            Songs.delete_song(song_nirvana.id)
+        return position
+
+    mocker.patch("playlist.models.song_model.get_pooled_random", side_effect=draw_then_delete)
+
+    assert Songs.get_random_song()["id"] == song_beatles.id
+
+
 def test_get_random_song_empty(session):
     """Test error when no songs exist."""
     Songs.query.delete()
@@ -0,0 +1,36 @@
+import dataclasses
+
+import pytest
+
+from playlist.models.song_snapshot import SongSnapshot
+
+
+@pytest.fixture
+def snapshot():
+    """Fixture for a snapshot of a single song."""
+    return SongSnapshot(1, "The Beatles", "Come Together", 1969, "Rock", 259, 4)
+
+
+def test_snapshot_is_immutable(snapshot):
+    """Test that snapshot fields cannot be reassigned."""
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.play_count = 5
+
+
+def test_snapshot_has_no_instance_dict(snapshot):
+    """Test that snapshots are slotted and carry no per-instance __dict__."""
+    assert not hasattr(snapshot, "__dict__")
+
+
+def test_snapshot_row_round_trip(snapshot):
+    """Test that a snapshot is rebuilt unchanged from its row tuple."""
+    assert snapshot.to_row() == (1, "The Beatles", "Come Together", 1969, "Rock", 259, 4)
+    assert SongSnapshot.from_row(snapshot.to_row()) == snapshot
+
+
+def test_from_song_copies_attributes(snapshot, mocker):
+    """Test that a snapshot is built from any object with the song attributes."""
+    song = mocker.Mock(**{field: getattr(snapshot, field) for field in SongSnapshot.__slots__})
+
+    assert SongSnapshot.from_song(song) == snapshot
+    assert SongSnapshot.from_song(snapshot) is snapshot
@@ -0,0 +1,133 @@
+from blinker import Signal
+
+from playlist.models.song_model import Songs
+from playlist.models.user_model import Users
+from playlist.models.user_playlist_model import Playlists
+from playlist.utils.table_versions import TableVersions
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+##################################################
+# Table Version Test Cases
+##################################################
+
+
+def test_bump_changes_only_that_tables_etag():
+    """Test that a bump changes the ETags built from its table and no others."""
+    versions = TableVersions(max_age_seconds=0)
+    songs_tag = versions.etag("songs")
+    playlists_tag = versions.etag("playlists")
+
+    assert versions.bump("songs") == 1
+    assert versions.get("songs") == 1
+    assert versions.etag("songs") != songs_tag
+    assert versions.etag("playlists") == playlists_tag
+
+
+def test_etag_depends_on_variant():
+    """Test that different representations of the same tables get different ETags."""
+    versions = TableVersions(max_age_seconds=0)
+    assert versions.etag("songs", variant="json") != versions.etag("songs", variant="ndjson")
+
+
+def test_etags_differ_between_instances():
+    """Test that ETags from another worker or an earlier run never match."""
+    assert TableVersions(max_age_seconds=0).etag("songs") != TableVersions(max_age_seconds=0).etag("songs")
+
+
+def test_etag_rolls_over_after_max_age():
+    """Test that an ETag expires after max_age_seconds even without a change."""
+    clock = FakeClock()
+    versions = TableVersions(max_age_seconds=60, clock=clock)
+    tag = versions.etag("songs")
+
+    clock.now = 59
+    assert versions.etag("songs") == tag
+    clock.now = 60
+    assert versions.etag("songs") != tag
+
+
+def test_track_bumps_on_signals():
+    """Test that every tracked signal bumps the table."""
+    created, deleted = Signal(), Signal()
+    versions = TableVersions(max_age_seconds=0)
+    versions.track("songs", created, deleted)
+
+    created.send(None, song_ids=[1])
+    deleted.send(None, song_ids=[1])
+
+    assert versions.get("songs") == 2
+
+
+##################################################
+# Conditional GET Test Cases
+##################################################
+
+
+def test_leaderboard_returns_304_until_play_counts_change(client, session, mocker):
+    """Test that a matching If-None-Match gets a 304 without a query, until a play is written."""
+    Songs.create_song("Artist", "Title", 2000, "Rock", 200)
+    song_id = Songs.get_song_by_compound_key("Artist", "Title", 2000).id
+    Songs.increment_play_counts({song_id: 1})
+
+    response = client.get("/api/song-leaderboard")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    get_leaderboard = mocker.spy(Songs, "get_leaderboard")
+    response = client.get("/api/song-leaderboard", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    get_leaderboard.assert_not_called()
+
+    Songs.increment_play_counts({song_id: 1})
+    response = client.get("/api/song-leaderboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.get_json()["leaderboard"][0]["play_count"] == 2
+
+
+def test_playlist_etag_sees_changes_from_other_workers(logged_in_client, session):
+    """Test that a playlist changed outside this worker is not answered with a 304."""
+    client = logged_in_client
+    for title in ("One", "Two"):
+        Songs.create_song("Artist", title, 2000, "Rock", 200)
+    song_ids = [Songs.get_song_by_compound_key("Artist", title, 2000).id for title in ("One", "Two")]
+    client.post("/api/playlist/batch", json={"operations": [{"op": "add", "song_id": song_ids[0]}]})
+
+    response = client.get("/api/get-all-songs-from-playlist")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert client.get("/api/get-all-songs-from-playlist", headers={"If-None-Match": etag}).status_code == 304
+
+    # Another worker writes the stored playlist; this worker's counters never see it
+    user_id = Users.get_id_by_username("listener")
+    playlist_id, _, _, version = Playlists.load_for_user(user_id)
+    Playlists.replace_songs(playlist_id, version, song_ids)
+
+    response = client.get("/api/get-all-songs-from-playlist", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [song["id"] for song in response.get_json()["songs"]] == song_ids
+
+
+def test_catalog_responses_vary_on_accept(logged_in_client, session):
+    """Test that full and 304 catalog responses both say the format depends on Accept."""
+    client = logged_in_client
+    Songs.create_song("Artist", "Title", 2000, "Rock", 200)
+
+    for accept in ("application/json", "application/x-ndjson"):
+        response = client.get("/api/get-all-songs-from-catalog", headers={"Accept": accept})
+        assert response.status_code == 200
+        assert "Accept" in response.vary
+
+        response = client.get("/api/get-all-songs-from-catalog",
+                              headers={"Accept": accept, "If-None-Match": response.headers["ETag"]})
+        assert response.status_code == 304
+        assert "Accept" in response.vary
@@ -0,0 +1,90 @@
+import pytest
+
+from playlist.models.playlist_model import PlaylistModel
+from playlist.models.song_snapshot import SongSnapshot
+from playlist.models.trending_songs import TrendingSongs
+from playlist.signals import songs_deleted, songs_reset
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(1_000_000.0)
+
+@pytest.fixture
+def trending(clock):
+    """Fixture for trending counters with a controllable clock."""
+    return TrendingSongs(top_k_capacity=10, sketch_width=0, clock=clock)
+
+
+def test_trending_windows_age_independently(trending, clock):
+    """Test that plays drop out of the short window before the long ones."""
+    trending.record(1, 3)
+    clock.now += 20 * 60
+    trending.record(2)
+
+    assert trending.top("15m") == [(2, 1)]
+    assert trending.top("1h") == [(1, 3), (2, 1)]
+
+    clock.now += 60 * 60
+    assert trending.top("1h") == []
+    assert trending.top("24h") == [(1, 3), (2, 1)]
+
+
+def test_trending_invalid_query(trending):
+    """Test that unknown windows and non-positive limits are rejected."""
+    with pytest.raises(ValueError, match="Unknown window"):
+        trending.top("1y")
+    with pytest.raises(ValueError, match="limit"):
+        trending.top("1h", limit=0)
+
+
+def test_trending_with_sketch(clock):
+    """Test that sketch-backed counting ranks the same as exact counting for distinct songs."""
+    trending = TrendingSongs(top_k_capacity=10, sketch_width=1024, clock=clock)
+    for song_id, plays in [(1, 2), (2, 5), (3, 1)]:
+        trending.record(song_id, plays)
+
+    assert trending.top("1h", limit=2) == [(2, 5), (1, 2)]
+
+
+def test_trending_forgets_deleted_and_reset_songs(trending):
+    """Test that deleted songs leave the rankings and a reset clears them."""
+    trending.record(1, 2)
+    trending.record(2)
+    songs_deleted.send(None, song_ids=[1])
+    assert trending.top("1h") == [(2, 1)]
+
+    # A new song that reuses the deleted ID starts from zero
+    trending.record(1)
+    assert sorted(trending.top("1h")) == [(1, 1), (2, 1)]
+
+    songs_reset.send(None)
+    assert trending.top("1h") == []
+
+
+def test_playing_a_song_counts_as_trending(trending, mocker):
+    """Test that PlaylistModel records each play in the trending counters."""
+    model = PlaylistModel(trending=trending)
+    mocker.patch.object(model.play_count_buffer, "record")
+    model.song_cache.songs.set(1, SongSnapshot(1, "Artist", "Title", 2000, "Rock", 100, 0))
+    model.playlist.append(1)
+
+    model.play_current_song()
+    model.play_current_song()
+
+    assert trending.top("15m") == [(1, 2)]
+
+
+def test_trending_route_requires_login(logged_in_client):
+    """Test that trending songs are only served to logged-in users, like the catalog."""
+    assert logged_in_client.get("/api/trending-songs?window=1h").status_code == 200
+    logged_in_client.post("/api/logout")
+    assert logged_in_client.get("/api/trending-songs?window=1h").status_code == 401
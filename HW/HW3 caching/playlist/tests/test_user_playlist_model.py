@@ -0,0 +1,202 @@
+import pytest
+
+from playlist.models.play_event_log import PlayEventLog
+from playlist.models.playlist_model import PlaylistModel
+from playlist.models.song_cache import SongCache
+from playlist.models.song_model import Songs
+from playlist.models.user_model import Users
+from playlist.models.user_playlist_model import PlaylistEntries, Playlists, StalePlaylistError
+
+
+@pytest.fixture
+def user_id(session):
+    """Fixture for a stored user, returning its ID."""
+    Users.create_user(username="testuser", password="securepassword123")
+    return Users.get_id_by_username("testuser")
+
+@pytest.fixture
+def song_ids(session):
+    """Fixture for five stored songs, returning their IDs."""
+    songs = [Songs(artist=f"Artist {i}", title=f"Title {i}", year=2000 + i, genre="Rock", duration=100 + i)
+             for i in range(1, 6)]
+    session.add_all(songs)
+    session.commit()
+    return [song.id for song in songs]
+
+@pytest.fixture
+def stored_playlist(user_id, song_ids):
+    """Fixture for a stored playlist holding every song, returning (playlist ID, version)."""
+    playlist_id, _, _, version = Playlists.load_for_user(user_id)
+    version = Playlists.replace_songs(playlist_id, version, song_ids)
+    return playlist_id, version
+
+
+def stored_song_ids(session, playlist_id):
+    """Returns the stored song IDs in position order, checking positions run 1..n."""
+    entries = session.query(PlaylistEntries).filter_by(playlist_id=playlist_id) \
+        .order_by(PlaylistEntries.position).all()
+    assert [entry.position for entry in entries] == list(range(1, len(entries) + 1))
+    return [entry.song_id for entry in entries]
+
+
+##################################################
+# Stored Playlist Test Cases
+##################################################
+
+
+def test_load_for_user_creates_empty_playlist(session, user_id):
+    """Test that a user's playlist is created on first load and reused afterwards."""
+    playlist_id, song_ids, current_track_number, version = Playlists.load_for_user(user_id)
+    assert (song_ids, current_track_number, version) == ([], 1, 0)
+
+    assert Playlists.load_for_user(user_id)[0] == playlist_id
+    assert session.query(Playlists).count() == 1
+
+def test_append_and_insert_song(session, user_id, song_ids):
+    """Test adding songs at the end and in the middle of a stored playlist."""
+    playlist_id, _, _, version = Playlists.load_for_user(user_id)
+    version = Playlists.append_song(playlist_id, version, song_ids[0], 1)
+    version = Playlists.append_song(playlist_id, version, song_ids[1], 2)
+    version = Playlists.insert_song(playlist_id, version, song_ids[2], 1)
+
+    assert version == 3
+    assert stored_song_ids(session, playlist_id) == [song_ids[2], song_ids[0], song_ids[1]]
+
+def test_remove_at_closes_gap(session, song_ids, stored_playlist):
+    """Test that removing a song renumbers the tracks after it."""
+    playlist_id, version = stored_playlist
+    Playlists.remove_at(playlist_id, version, 2)
+
+    assert stored_song_ids(session, playlist_id) == [song_ids[0]] + song_ids[2:]
+
+@pytest.mark.parametrize("from_position, to_position, expected_order", [
+    (1, 5, [1, 2, 3, 4, 0]),
+    (5, 1, [4, 0, 1, 2, 3]),
+    (2, 4, [0, 2, 3, 1, 4]),
+    (3, 3, [0, 1, 2, 3, 4]),
+])
+def test_move_song(session, song_ids, stored_playlist, from_position, to_position, expected_order):
+    """Test moving a song forwards and backwards shifts the tracks in between."""
+    playlist_id, version = stored_playlist
+    Playlists.move_song(playlist_id, version, from_position, to_position)
+
+    assert stored_song_ids(session, playlist_id) == [song_ids[i] for i in expected_order]
+
+def test_swap_positions(session, song_ids, stored_playlist):
+    """Test swapping the songs at two positions."""
+    playlist_id, version = stored_playlist
+    Playlists.swap_positions(playlist_id, version, 1, 4)
+
+    assert stored_song_ids(session, playlist_id) == [song_ids[3], song_ids[1], song_ids[2], song_ids[0], song_ids[4]]
+
+def test_stale_version_is_rejected(session, song_ids, stored_playlist):
+    """Test that a change based on an old version fails without touching the playlist."""
+    playlist_id, version = stored_playlist
+    Playlists.remove_at(playlist_id, version, 1)
+
+    with pytest.raises(StalePlaylistError, match="changed by another request"):
+        Playlists.remove_at(playlist_id, version, 1)
+
+    assert stored_song_ids(session, playlist_id) == song_ids[1:]
+    assert Playlists.get_version(playlist_id) == version + 1
+
+def test_clear_all(session, user_id, song_ids, stored_playlist):
+    """Test emptying every stored playlist, and deleting them."""
+    playlist_id, version = stored_playlist
+    Playlists.clear_all()
+
+    assert stored_song_ids(session, playlist_id) == []
+    assert Playlists.get_version(playlist_id) == version + 1
+
+    Playlists.clear_all(delete_playlists=True)
+    assert Playlists.get_version(playlist_id) is None
+
+
+##################################################
+# PlaylistModel Persistence Test Cases
+##################################################
+
+
+def test_playlist_model_persists_changes(user_id, song_ids):
+    """Test that a user's PlaylistModel is restored from the database."""
+    model = PlaylistModel(user_id=user_id)
+    for song_id in song_ids[:3]:
+        model.add_song_to_playlist(song_id)
+    model.move_song_to_beginning(song_ids[2])
+    model.remove_song_by_song_id(song_ids[0])
+    model.go_to_track_number(2)
+
+    restored = PlaylistModel(user_id=user_id)
+    assert restored.playlist.to_list() == [song_ids[2], song_ids[1]]
+    assert restored.current_track_number == 2
+
+def test_playlist_model_refreshes_after_change_elsewhere(user_id, song_ids):
+    """Test that a model picks up changes made through another worker's model."""
+    song_cache = SongCache()
+    worker_1 = PlaylistModel(song_cache=song_cache, user_id=user_id)
+    worker_2 = PlaylistModel(song_cache=song_cache, user_id=user_id)
+
+    worker_1.add_song_to_playlist(song_ids[0])
+    assert worker_2.refresh() is True
+    assert worker_2.playlist.to_list() == [song_ids[0]]
+    assert worker_2.refresh() is False
+
+def test_playlist_model_refresh_skips_write_lock_when_unchanged(user_id, song_ids, mocker):
+    """Test that refreshing an up-to-date model only checks the version."""
+    model = PlaylistModel(user_id=user_id)
+    write = mocker.spy(model._lock, "write")
+
+    assert model.refresh() is False
+    write.assert_not_called()
+
+def test_playlist_model_play_loop_stores_track_once(user_id, song_ids, mocker):
+    """Test that playing through the playlist stores the current track once, not per song."""
+    model = PlaylistModel(user_id=user_id)
+    model.apply_batch([{"op": "add", "song_id": song_id} for song_id in song_ids])
+    model.go_to_track_number(2)
+    store_current_tracks = mocker.spy(Playlists, "store_current_tracks")
+
+    model.play_rest_of_playlist()
+
+    assert store_current_tracks.call_count == 1
+    assert PlaylistModel(user_id=user_id).current_track_number == 1
+
+def test_playlist_model_writes_current_track_behind(user_id, song_ids):
+    """Test that plays move the stored track with the play log and never bump the version."""
+    play_log = PlayEventLog(flush_size=100, flush_interval_ms=3_600_000)
+    model = PlaylistModel(user_id=user_id, play_log=play_log)
+    model.apply_batch([{"op": "add", "song_id": song_id} for song_id in song_ids])
+    version = model.version
+
+    model.play_current_song()
+    model.play_current_song()
+
+    stored = PlaylistModel(user_id=user_id)
+    assert stored.current_track_number == 1
+    assert stored.version == version
+
+    play_log.flush()
+    assert PlaylistModel(user_id=user_id).current_track_number == 3
+    assert Playlists.get_version(model._playlist_id) == version
+
+def test_playlist_model_stale_write_reloads(user_id, song_ids):
+    """Test that a write from an outdated model fails and leaves it with the current playlist."""
+    worker_1 = PlaylistModel(user_id=user_id)
+    worker_2 = PlaylistModel(user_id=user_id)
+
+    worker_1.add_song_to_playlist(song_ids[0])
+    with pytest.raises(StalePlaylistError):
+        worker_2.add_song_to_playlist(song_ids[1])
+
+    assert worker_2.playlist.to_list() == [song_ids[0]]
+    worker_2.add_song_to_playlist(song_ids[1])
+    assert PlaylistModel(user_id=user_id).playlist.to_list() == song_ids[:2]
+
+def test_playlist_model_batch_is_one_stored_change(user_id, song_ids):
+    """Test that a batch is stored with a single version bump."""
+    model = PlaylistModel(user_id=user_id)
+    model.apply_batch([{"op": "add", "song_id": song_id} for song_id in song_ids]
+                      + [{"op": "move", "song_id": song_ids[-1], "track_number": 1}])
+
+    assert model._version == 1
+    assert PlaylistModel(user_id=user_id).playlist.to_list() == [song_ids[-1]] + song_ids[:-1]